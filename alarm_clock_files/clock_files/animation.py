@@ -0,0 +1,198 @@
+import math
+import threading
+
+import pwm
+
+# Frame period of the looping animations; every frame time is
+# start + n * step, so late wake-ups never push later frames back.
+TICK = 0.02
+# a wake-up at a frame's time may read the clock a hair early
+EPSILON = 1e-6
+
+EASE_STEPS = 256
+# cosine ease-in-out, 0..1 over EASE_STEPS samples
+EASE = tuple((1 - math.cos(math.pi * i / (EASE_STEPS - 1))) / 2 for i in range(EASE_STEPS))
+
+BREATHE_PERIOD = 1.6        # calibrate / set_alarm: backlight level 5 -> 100 -> 5
+ALARM_PERIOD = 1.0          # ringing: pixel and backlight pulse once a second
+ALARM_COLOR = (255, 48, 0)
+SUNRISE_MINUTES = 10        # armed: backlight and pixel ramp up before alarm_time
+SUNRISE_STEPS = 256
+SUNRISE_COLORS = ((255, 0, 0), (255, 96, 0), (255, 180, 80))
+
+# Higher wins a channel both animations drive
+PRIORITY_SUNRISE = 10
+PRIORITY_BREATHE = 20
+PRIORITY_ALARM = 30
+
+CHANNELS = ("backlight", "pixel", "pm")
+
+
+def ease(x):
+    return EASE[int(max(0.0, min(1.0, x)) * (EASE_STEPS - 1))]
+
+
+def pulse(x):
+    """0 -> 1 -> 0 over x in [0, 1), eased."""
+    return ease(2 * x if x < 0.5 else 2 - 2 * x)
+
+
+def gradient(stops, x):
+    x = max(0.0, min(1.0, x)) * (len(stops) - 1)
+    i = min(int(x), len(stops) - 2)
+    f = x - i
+    return tuple(int(round(a + (b - a) * f)) for a, b in zip(stops[i], stops[i + 1]))
+
+
+class Animation:
+    """
+    Precomputed frames, step seconds apart, for some of the channels:
+    "backlight" (PWM duty %), "pixel" ((r, g, b), brightness) and "pm"
+    (0/1). A looping animation repeats; a ramp holds its last frame.
+    """
+
+    def __init__(self, priority, step, loop, **channels):
+        self.priority = priority
+        self.step = step
+        self.loop = loop
+        self.channels = {name: tuple(frames) for name, frames in channels.items()}
+        frames = list(zip(*self.channels.values()))
+        self.frames = n = len(frames)
+        # _next[i]: the next frame index whose values differ from frame i
+        seq = frames * 2 if loop else frames
+        nxt = [None] * len(seq)
+        for i in range(len(seq) - 2, -1, -1):
+            nxt[i] = i + 1 if seq[i + 1] != seq[i] else nxt[i + 1]
+        self._next = [None if j is None or (loop and j - i >= n) else j for i, j in enumerate(nxt[:n])]
+
+    def frame(self, elapsed):
+        """(frame number since start, index into the tables)."""
+        k = int((elapsed + EPSILON) / self.step)
+        return k, (k % self.frames if self.loop else min(k, self.frames - 1))
+
+    def next_change(self, k, i):
+        """Elapsed time of the next frame that looks different, or None."""
+        j = self._next[i]
+        if j is None:
+            return None
+        return (k + j - i) * self.step
+
+
+def breathe():
+    n = round(BREATHE_PERIOD / TICK)
+    return Animation(PRIORITY_BREATHE, TICK, True,
+                     backlight=[pwm.duty(5 + 95 * pulse(i / n)) for i in range(n)])
+
+
+def alarm_pulse():
+    n = round(ALARM_PERIOD / TICK)
+    return Animation(PRIORITY_ALARM, TICK, True,
+                     backlight=[pwm.duty(30 + 70 * pulse(i / n)) for i in range(n)],
+                     pixel=[(ALARM_COLOR, round(0.1 + 0.9 * pulse(i / n), 3)) for i in range(n)])
+
+
+def sunrise():
+    xs = [i / (SUNRISE_STEPS - 1) for i in range(SUNRISE_STEPS)]
+    return Animation(PRIORITY_SUNRISE, SUNRISE_MINUTES * 60 / SUNRISE_STEPS, False,
+                     backlight=[pwm.duty(100 * ease(x)) for x in xs],
+                     pixel=[(gradient(SUNRISE_COLORS, x), round(0.02 + 0.98 * ease(x), 3)) for x in xs])
+
+
+ANIMATIONS = {"breathe": breathe(), "alarm": alarm_pulse(), "sunrise": sunrise()}
+
+
+class LedEngine:
+    """
+    Single owner of led_nood, led_PM and the Chromatek pixel.
+
+    Each channel shows its base value (set_base()) unless a playing
+    animation drives it; the highest priority one wins. run() renders the
+    frame for the current time, writes the channels whose value changed,
+    and waits until the next frame that looks different, or until play(),
+    stop() or set_base() wakes it. With nothing playing it just waits.
+
+    backlight has ChangeDutyCycle(); pixel is a leds.PixelOutput; pm(level)
+    drives the PM LED. clock is a hal clock. stats counts frames rendered
+    on schedule, channel writes, and how late those frames were ("late_max",
+    "late_total", in seconds; "dropped" is frames a full step late).
+    """
+
+    def __init__(self, clock, backlight=None, pixel=None, pm=None, animations=ANIMATIONS):
+        self.clock = clock
+        self.animations = animations
+        self._writers = {
+            "backlight": backlight.ChangeDutyCycle if backlight is not None else None,
+            "pixel": (lambda value: pixel.set(0, *value)) if pixel is not None else None,
+            "pm": pm,
+        }
+        self._lock = threading.Lock()
+        self._wake = clock.Event()
+        self._base = {"backlight": 0.0, "pixel": ((0, 0, 0), 0.0), "pm": 0}
+        self._playing = {}              # name -> start (clock.monotonic())
+        self._shown = {}
+        self.stats = {"frames": 0, "writes": 0, "dropped": 0, "late_max": 0.0, "late_total": 0.0}
+
+    def set_base(self, **values):
+        with self._lock:
+            self._base.update(values)
+        self._wake.set()
+
+    def play(self, name, elapsed=0.0):
+        """Start animation name (already elapsed seconds in); no-op if playing."""
+        with self._lock:
+            if name in self._playing:
+                return
+            self._playing[name] = self.clock.monotonic() - elapsed
+        self._wake.set()
+
+    def stop(self, *names):
+        with self._lock:
+            for name in names:
+                self._playing.pop(name, None)
+        self._wake.set()
+
+    def playing(self, name):
+        with self._lock:
+            return name in self._playing
+
+    def render(self, now):
+        """Write this frame's changed channels; returns when the next one is due, or None."""
+        with self._lock:
+            values = dict(self._base)
+            due = None
+            playing = sorted(self._playing.items(), key=lambda item: self.animations[item[0]].priority)
+            for name, start in playing:
+                anim = self.animations[name]
+                k, i = anim.frame(now - start)
+                for channel, frames in anim.channels.items():
+                    values[channel] = frames[i]
+                change = anim.next_change(k, i)
+                if change is not None and (due is None or start + change < due):
+                    due = start + change
+        for channel in CHANNELS:
+            write = self._writers[channel]
+            if write is not None and self._shown.get(channel) != values[channel]:
+                write(values[channel])
+                self._shown[channel] = values[channel]
+                self.stats["writes"] += 1
+        return due
+
+    def run(self):
+        print("[DEBUG] led engine start")
+        while True:
+            self._wake.clear()
+            now = self.clock.monotonic()
+            due = self.render(now)
+            timeout = None if due is None else max(0.0, due - now)
+            woken = self._wake.wait(timeout)
+            # let whatever else is due now (a press, the minute tick, the rest
+            # of the caller's stop_alarm() and update_chromatek()) go first,
+            # so the next frame shows all of it
+            self.clock.sleep(0)
+            if not woken and due is not None:
+                late = self.clock.monotonic() - due
+                self.stats["frames"] += 1
+                self.stats["late_total"] += late
+                self.stats["late_max"] = max(self.stats["late_max"], late)
+                if late >= TICK:
+                    self.stats["dropped"] += 1
@@ -0,0 +1,112 @@
+"""
+Memory allocated per display()/Clear() call, old list-building code vs
+the panel FrameBuffer and the shared fill() buffers.
+
+Runs on bench_spi's fake epdconfig. Each call is first checked to put
+the same bytes on the bus as the old code (the old ~x lists are masked
+to a byte, as spidev does), then measured with tracemalloc while the bus
+is not being recorded.
+
+    python bench_alloc.py
+"""
+import os
+import sys
+import tracemalloc
+
+from bench_spi import spi
+from waveshare_epd import epdbuffer, epd2in13_V2, epd7in5_V2
+
+
+# ----- reference implementations (the old driver code) -----
+def ref_7in5_display(epd, image):
+    Width = epd.width // 8
+    image1 = [0xFF] * int(epd.width * epd.height / 8)
+    for j in range(epd.height):
+        for i in range(Width):
+            image1[i + j * Width] = ~image[i + j * Width]
+    epd.send_command(0x10)
+    epd.send_data2(image1)
+    epd.send_command(0x13)
+    epd.send_data2(image)
+    epd.send_command(0x12)
+
+
+def ref_7in5_clear(epd):
+    epd.send_command(0x10)
+    epd.send_data2([0xFF] * int(epd.width * epd.height / 8))
+    epd.send_command(0x13)
+    epd.send_data2([0x00] * int(epd.width * epd.height / 8))
+    epd.send_command(0x12)
+
+
+def ref_7in5_4gray(epd, image):
+    epd.send_command(0x10)
+    epd.send_data2(epdbuffer.gray_plane(image, (1, 0, 1, 0)))
+    epd.send_command(0x13)
+    epd.send_data2(epdbuffer.gray_plane(image, (1, 1, 0, 0)))
+    epd.send_command(0x12)
+
+
+def ref_2in13_partial(epd, image):
+    linewidth = (epd.width + 7) // 8
+    buf = [0x00] * epd.height * linewidth
+    for j in range(0, epd.height):
+        for i in range(0, linewidth):
+            buf[i + j * linewidth] = ~image[i + j * linewidth]
+    epd.send_command(0x24)
+    epd.send_data2(image)
+    epd.send_command(0x26)
+    epd.send_data2(buf)
+    epd.TurnOnDisplayPart()
+
+
+def wire(fn):
+    spi.record = True
+    spi.reset()
+    fn()
+    return [(dc, b & 0xFF) for dc, b in spi.stream]
+
+
+def allocated(fn):
+    """Peak bytes allocated during one call (after a warm-up call)."""
+    spi.record = False
+    fn()
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    fn()
+    peak = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    ok = True
+    big = epd7in5_V2.EPD()
+    small = epd2in13_V2.EPD()
+    frame = bytearray(os.urandom(big.width * big.height // 8))
+    gray = bytearray(os.urandom(big.width * big.height // 4))
+    small_frame = bytearray(os.urandom((small.width + 7) // 8 * small.height))
+    cases = [
+        ("epd7in5_V2 display", lambda: ref_7in5_display(big, frame), lambda: big.display(frame)),
+        ("epd7in5_V2 Clear", lambda: ref_7in5_clear(big), big.Clear),
+        ("epd7in5_V2 4Gray", lambda: ref_7in5_4gray(big, gray), lambda: big.display_4Gray(gray)),
+        ("epd2in13_V2 partial", lambda: ref_2in13_partial(small, small_frame),
+                                lambda: small.displayPartial(small_frame)),
+    ]
+
+    print(f"{'call':>20} {'frame':>7} {'old alloc':>10} {'new alloc':>10}")
+    for label, old, new in cases:
+        same = wire(old) == wire(new)
+        old_bytes = allocated(old)
+        new_bytes = allocated(new)
+        ok &= same and new_bytes < old_bytes
+        print(f"{label:>20} {len(frame) if 'epd7' in label else len(small_frame):7} "
+              f"{old_bytes:10} {new_bytes:10}  {'ok' if same else 'MISMATCH'}")
+
+    print("PASS" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+LED animation timing: the old led_fade_thread() (duty cycle, then a 30 ms
+sleep, v += 0.04) vs animation.LedEngine playing "breathe".
+
+Both run in real time for a few seconds against a PWM that timestamps
+every ChangeDutyCycle(). Each write is compared with the time it was
+scheduled for. The old loop's schedule is its first write plus n x 30 ms.
+The engine's is the animation start plus frame x TICK. The table prints:
+- jitter: the standard deviation of the lateness
+- late: the mean and worst lateness
+- drift: the mean lateness of the last ten writes minus the first ten
+- CPU: process time per write and as a share of the wall time, with
+  nothing else running
+
+Then, on a hal.VirtualClock, checks that:
+- the alarm pulse overrides the sunrise and breathe, and the sunrise
+  comes back when the alarm stops
+- a channel is written only when its value changes
+- the engine wakes once per visible change, on time, and not at all
+  once the sunrise has reached its last frame
+
+    python bench_animation.py [seconds]
+"""
+import statistics
+import sys
+import threading
+import time
+
+import animation
+import gpio_setup
+import hal
+import leds
+import pwm
+
+OLD_PERIOD = 0.03
+
+
+class TimedPWM:
+    """ChangeDutyCycle() recorder: (perf_counter, duty) per call."""
+
+    def __init__(self):
+        self.log = []
+
+    def ChangeDutyCycle(self, duty):
+        self.log.append((time.perf_counter(), duty))
+
+
+# ----- reference implementation (the old main.led_fade_thread) -----
+def old_fade(out, running):
+    v = 0.1
+    direction = 1
+    while running.is_set():
+        out.ChangeDutyCycle(pwm.duty(v * 100))
+        v += direction * 0.04
+        if v >= 1.0:
+            v = 1.0
+            direction = -1
+        if v <= 0.05:
+            v = 0.05
+            direction = 1
+        time.sleep(OLD_PERIOD)
+
+
+def lateness(times, start, step):
+    """Seconds each write came after the schedule slot it belongs to."""
+    late = []
+    for t in times:
+        late.append(t - (start + int((t - start) / step + 1e-6) * step))
+    return late
+
+
+def drift(late):
+    return statistics.mean(late[-10:]) - statistics.mean(late[:10])
+
+
+def run_old(seconds):
+    out, running = TimedPWM(), threading.Event()
+    running.set()
+    cpu0 = time.process_time()
+    thread = threading.Thread(target=old_fade, args=(out, running), daemon=True)
+    thread.start()
+    time.sleep(seconds)
+    running.clear()
+    thread.join()
+    cpu = time.process_time() - cpu0
+    times = [t for t, _ in out.log]
+    # every iteration writes; iteration n was due at n x OLD_PERIOD
+    late = [t - (times[0] + n * OLD_PERIOD) for n, t in enumerate(times)]
+    return late, cpu
+
+
+def run_engine(seconds):
+    out = TimedPWM()
+    engine = animation.LedEngine(hal.RealClock(), backlight=out)
+    threading.Thread(target=engine.run, daemon=True).start()
+    time.sleep(0.1)
+    cpu0 = time.process_time()
+    start = time.perf_counter()
+    engine.play("breathe")
+    time.sleep(seconds)
+    engine.stop("breathe")
+    cpu = time.process_time() - cpu0
+    # the first write is the base value, before play()
+    times = [t for t, _ in out.log[1:]]
+    late = lateness(times, start, animation.TICK)
+    return late, cpu
+
+
+def virtual_engine():
+    hw = hal.SimHardware()
+    backlight = hal.SimPWM(hw.gpio, gpio_setup.led_nood, 15000)
+    strip = hw.pixels(None, 1, auto_write=False)      # the sim ignores the pin
+    pm = []
+    engine = animation.LedEngine(hw.clock, backlight=backlight, pixel=leds.PixelOutput(strip), pm=pm.append)
+    return hw.clock, engine, hw.gpio, strip, pm
+
+
+def check_priority():
+    clock, engine, gpio, strip, pm = virtual_engine()
+    sunrise = animation.ANIMATIONS["sunrise"]
+    alarm = animation.ANIMATIONS["alarm"]
+    breathe = animation.ANIMATIONS["breathe"]
+    shown = []
+
+    def frame():
+        engine.render(clock.monotonic())
+        shown.append((gpio.pwm_log[-1][2], strip[0], strip.brightness))
+
+    engine.set_base(backlight=pwm.duty(50), pixel=((255, 255, 0), 0.5))
+    frame()
+    engine.play("sunrise", elapsed=300)
+    frame()
+    engine.play("breathe")
+    frame()
+    engine.play("alarm")
+    frame()
+    engine.stop("alarm", "breathe")
+    frame()
+    engine.stop("sunrise")
+    frame()
+
+    i = sunrise.frame(300)[1]
+    rise_light = (sunrise.channels["backlight"][i],) + sunrise.channels["pixel"][i]
+    alarm_light = (alarm.channels["backlight"][0],) + alarm.channels["pixel"][0]
+    expected = [(pwm.duty(50), (255, 255, 0), 0.5),
+                rise_light,
+                (breathe.channels["backlight"][0],) + rise_light[1:],
+                alarm_light,
+                rise_light,
+                (pwm.duty(50), (255, 255, 0), 0.5)]
+    ok = shown == expected and pm == [0]
+    print(f"priority: base -> sunrise -> +breathe (backlight) -> +alarm -> sunrise -> base  "
+          f"{'ok' if ok else 'BAD'}")
+    return ok
+
+
+def check_writes():
+    clock, engine, gpio, strip, pm = virtual_engine()
+    threading.Thread(target=engine.run, daemon=True).start()
+    time.sleep(0.1)                     # let it park in its first wait
+    ok = True
+
+    # breathe: one wake-up per visible backlight change, each on time
+    breathe = animation.ANIMATIONS["breathe"]
+    periods = 5
+    changes = sum(1 for a, b in zip(breathe.channels["backlight"],
+                                    breathe.channels["backlight"][1:] + breathe.channels["backlight"][:1])
+                  if a != b)
+    engine.play("breathe")
+    clock.run_for(periods * animation.BREATHE_PERIOD - 1e-3)
+    engine.stop("breathe")
+    clock.run_for(1)
+    stats = dict(engine.stats)
+    writes = len(gpio.pwm_log)
+    breathe_ok = stats["frames"] == periods * changes and stats["late_max"] == 0 and stats["dropped"] == 0
+    # SimPWM logs changed duty cycles only, so equal counts mean no repeated writes
+    breathe_ok &= stats["writes"] == writes + strip.shows + len(pm) and strip.shows == 1 and pm == [0]
+    print(f"breathe x{periods}: {stats['frames']} wake-ups for {periods * breathe.frames} frames "
+          f"({changes} visible changes a period), {writes} PWM writes, late max {stats['late_max']} s  "
+          f"{'ok' if breathe_ok else 'BAD'}")
+    ok &= breathe_ok
+
+    # sunrise: ramps to its last frame, then the engine sleeps until told otherwise
+    sunrise = animation.ANIMATIONS["sunrise"]
+    frames0, shows0, writes0 = engine.stats["frames"], strip.shows, len(gpio.pwm_log)
+    events0 = clock.events
+    engine.play("sunrise")
+    clock.run_for(animation.SUNRISE_MINUTES * 60 + 60)
+    frames = engine.stats["frames"] - frames0
+    after = (engine.stats["frames"], strip.shows, len(gpio.pwm_log))
+    clock.run_for(3600)
+    idle = (engine.stats["frames"], strip.shows, len(gpio.pwm_log)) == after
+    last = sunrise.channels["pixel"][-1]
+    rise_ok = (frames < sunrise.frames and idle and engine.stats["late_max"] == 0
+               and gpio.pwm_log[-1][2] == sunrise.channels["backlight"][-1]
+               and strip[0] == last[0] and strip.brightness == last[1])
+    print(f"sunrise: {frames} wake-ups for {sunrise.frames} frames, {strip.shows - shows0} pixel shows, "
+          f"{len(gpio.pwm_log) - writes0} PWM writes, {clock.events - events0} clock events, "
+          f"none in the hour after  {'ok' if rise_ok else 'BAD'}")
+    ok &= rise_ok
+    return ok
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 3.0
+    ok = True
+
+    print(f"{'loop':>28} {'writes':>7} {'jitter ms':>10} {'late ms':>8} {'max ms':>7} "
+          f"{'drift ms':>9} {'CPU us/write':>13} {'CPU %':>6}")
+    rows = {}
+    for label, run in ((f"old fade ({OLD_PERIOD * 1000:.0f} ms sleeps)", run_old),
+                       (f"LedEngine breathe ({animation.TICK * 1000:.0f} ms tick)", run_engine)):
+        late, cpu = run(seconds)
+        rows[label] = late
+        print(f"{label:>28} {len(late):7} {statistics.pstdev(late) * 1000:10.3f} "
+              f"{statistics.mean(late) * 1000:8.3f} {max(late) * 1000:7.3f} "
+              f"{drift(late) * 1000:9.3f} {cpu / len(late) * 1e6:13.1f} {cpu / seconds * 100:6.2f}")
+    old, new = rows.values()
+    # chained sleeps fall further behind with every frame; the engine's schedule does not move
+    ok &= drift(new) < drift(old)
+    print()
+
+    ok &= check_priority()
+    ok &= check_writes()
+
+    print("PASS" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Check and timing for the BUSY wait in waveshare_epd.epdbusy.
+
+A fake BUSY pin is released by a timer thread after a set refresh time.
+The old driver loop (sample, then sleep poll_ms) and the shared wait are
+compared on how late they notice the release and how often they wake up;
+then the timeout, the get-status (0x71) path and the per-driver stats are
+checked.
+
+    python bench_busy.py [refresh_ms]
+"""
+import os
+import sys
+import threading
+import time
+
+libdir = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'lib')
+if os.path.exists(libdir):
+    sys.path.append(libdir)
+
+from waveshare_epd import epdbusy
+
+
+class FakeBusy:
+    """A BUSY pin that drops from busy_level after `seconds`; gpiozero-style edge wait."""
+
+    def __init__(self, busy_level, seconds):
+        self.level = busy_level
+        self.reads = 0
+        self.edge = threading.Event()
+        self.released = None
+        if seconds is not None:
+            threading.Timer(seconds, self.release).start()
+
+    def release(self):
+        self.released = time.perf_counter()
+        self.level = 1 - self.level
+        self.edge.set()
+
+    def read(self):
+        self.reads += 1
+        return self.level
+
+    def wait_edge(self, level, seconds):
+        return self.edge.wait(seconds)
+
+
+def old_loop(pin, busy_level, poll_ms):
+    """The ReadBusy() the drivers had: sample, sleep, no timeout."""
+    while pin.read() == busy_level:
+        time.sleep(poll_ms / 1000.0)
+
+
+def main():
+    refresh = (int(sys.argv[1]) if len(sys.argv) > 1 else 300) / 1000.0
+    ok = True
+
+    print(f"refresh of {refresh * 1000:.0f} ms")
+    print(f"{'wait':>22} {'late ms':>8} {'wakeups':>8}")
+    rows = [
+        ("old loop, 10 ms", lambda p: old_loop(p, 1, 10)),
+        ("old loop, 200 ms", lambda p: old_loop(p, 1, 200)),
+        ("wait_level, polled", lambda p: epdbusy.wait_level(p.read, 1, "polled", poll_ms=10)),
+        ("wait_level, edge", lambda p: epdbusy.wait_level(p.read, 1, "edge", wait_edge=p.wait_edge)),
+    ]
+    for label, wait in rows:
+        pin = FakeBusy(1, refresh)
+        wait(pin)
+        late = (time.perf_counter() - pin.released) * 1000
+        print(f"{label:>22} {late:8.2f} {pin.reads:8}")
+        if label.endswith("edge"):
+            ok &= pin.reads <= 2
+
+    # a pin that never releases must raise, not hang
+    pin = FakeBusy(0, None)
+    t0 = time.perf_counter()
+    try:
+        epdbusy.wait_level(pin.read, 0, "stuck", timeout=0.2, wait_edge=pin.wait_edge)
+        timed_out = False
+    except epdbusy.BusyTimeout as e:
+        timed_out = e.busy_level == 0 and e.name == "stuck"
+    spent = time.perf_counter() - t0
+    print(f"\nstuck pin: BusyTimeout {'raised' if timed_out else 'MISSING'} after {spent * 1000:.0f} ms")
+    ok &= timed_out and 0.2 <= spent < 0.5
+
+    # get-status before every read, re-sent every poll_ms even with an edge wait
+    pin = FakeBusy(0, 0.1)
+    sent = []
+    epdbusy.wait_level(pin.read, 0, "status", poll_ms=20, poll=lambda: sent.append(0x71), wait_edge=pin.wait_edge)
+    print(f"get-status: {len(sent)} x 0x71 for {pin.reads} reads")
+    ok &= len(sent) == pin.reads and len(sent) >= 3
+
+    print("\nbusy_stats")
+    for name, entry in sorted(epdbusy.stats.items()):
+        print(f"  {name:8} waits {entry['waits']}  max {entry['max'] * 1000:7.1f} ms  timeouts {entry['timeouts']}")
+    ok &= epdbusy.stats["stuck"]["timeouts"] == 1 and epdbusy.stats["edge"]["waits"] == 1
+    ok &= abs(epdbusy.stats["edge"]["last"] - refresh) < 0.05
+
+    print("PASS" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Golden-output check and timing for waveshare_epd.epdcolor.
+
+The per-driver getbuffer() code of the 4-color (g) and 7-color (f/e)
+panels is kept here as a reference. Every panel is fed the same RGB
+images (noise plus solid palette colors), native and rotated, and the
+new packer must return the same bytes with the default Floyd-Steinberg
+dithering. Then both are timed per panel, with the cost of the other
+dither modes alongside.
+
+    python bench_color.py [repeats]
+"""
+import os
+import sys
+import time
+
+from PIL import Image
+
+libdir = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'lib')
+if os.path.exists(libdir):
+    sys.path.append(libdir)
+
+from waveshare_epd import epdcolor
+
+PAL4 = (0, 0, 0, 255, 255, 255, 255, 255, 0, 255, 0, 0)
+PAL7 = (0, 0, 0, 255, 255, 255, 0, 255, 0, 0, 0, 255, 255, 0, 0, 255, 255, 0, 255, 128, 0)
+PAL7E = (0, 0, 0, 255, 255, 255, 255, 255, 0, 255, 0, 0, 0, 0, 0, 0, 0, 255, 0, 255, 0)
+
+
+# ----- reference implementations (the old driver code) -----
+def ref_quantize(image, width, height, palette):
+    pal_image = Image.new("P", (1, 1))
+    pal_image.putpalette(palette + (0, 0, 0) * (256 - len(palette) // 3))
+    imwidth, imheight = image.size
+    if imwidth == width and imheight == height:
+        image_temp = image
+    else:
+        image_temp = image.rotate(90, expand=True)
+    return bytearray(image_temp.convert("RGB").quantize(palette=pal_image).tobytes('raw'))
+
+
+def ref_4color(image, width, height):
+    """epd1in64g, epd3in0g, epd7in3g, ..."""
+    buf_4color = ref_quantize(image, width, height, PAL4)
+    buf = [0x00] * int(width * height / 4)
+    idx = 0
+    for i in range(0, len(buf_4color), 4):
+        buf[idx] = (buf_4color[i] << 6) + (buf_4color[i + 1] << 4) + (buf_4color[i + 2] << 2) + buf_4color[i + 3]
+        idx += 1
+    return buf
+
+
+def ref_4color_rows(image, width, height):
+    """epd2in13g: rows padded to whole bytes."""
+    buf_4color = ref_quantize(image, width, height, PAL4)
+    Width = width // 4 if width % 4 == 0 else width // 4 + 1
+    buf = [0x00] * int(Width * height)
+    idx = 0
+    for j in range(0, height):
+        for i in range(0, Width):
+            if i == Width - 1:
+                buf[i + j * Width] = (buf_4color[idx] << 6) + (buf_4color[idx + 1] << 4)
+                idx = idx + 2
+            else:
+                buf[i + j * Width] = ((buf_4color[idx] << 6) + (buf_4color[idx + 1] << 4) +
+                                      (buf_4color[idx + 2] << 2) + buf_4color[idx + 3])
+                idx = idx + 4
+    return buf
+
+
+def ref_7color(image, width, height, palette=PAL7):
+    """epd5in65f, epd7in3f; epd7in3e with its own palette."""
+    buf_7color = ref_quantize(image, width, height, palette)
+    buf = [0x00] * int(width * height / 2)
+    idx = 0
+    for i in range(0, len(buf_7color), 2):
+        buf[idx] = (buf_7color[i] << 4) + buf_7color[i + 1]
+        idx += 1
+    return buf
+
+
+EXACT = {(0, 0, 0): 0, (255, 255, 255): 1, (0, 255, 0): 2, (0, 0, 255): 3,
+         (255, 0, 0): 4, (255, 255, 0): 5, (255, 128, 0): 6}
+
+
+def ref_7color_exact(image, width, height):
+    """epd4in01f (the if/elif chain written as a dict lookup)."""
+    buf = [0x00] * int(width * height / 2)
+    image_monocolor = image.convert('RGB')
+    imwidth, imheight = image_monocolor.size
+    pixels = image_monocolor.load()
+    for y in range(imheight):
+        for x in range(imwidth):
+            if imwidth == width:
+                newx, newy = x, y
+            else:
+                newx, newy = y, height - x - 1
+            Add = int((newx + newy * width) / 2)
+            Color = EXACT.get(pixels[x, y], 0)
+            data_t = buf[Add] & (~(0xF0 >> ((newx % 2) * 4)))
+            buf[Add] = data_t | ((Color << 4) >> ((newx % 2) * 4))
+    return buf
+
+
+# driver: (width, height, reference, new)
+PANELS = {
+    "epd1in64g": (168, 168, ref_4color, epdcolor.pack_4color),
+    "epd2in13g": (122, 250, ref_4color_rows, epdcolor.pack_4color),
+    "epd2in15g": (160, 296, ref_4color, epdcolor.pack_4color),
+    "epd2in36g": (168, 296, ref_4color, epdcolor.pack_4color),
+    "epd2in66g": (184, 360, ref_4color, epdcolor.pack_4color),
+    "epd3in0g": (168, 400, ref_4color, epdcolor.pack_4color),
+    "epd4in37g": (512, 368, ref_4color, epdcolor.pack_4color),
+    "epd5in79g": (792, 272, ref_4color, epdcolor.pack_4color),
+    "epd7in3g": (800, 480, ref_4color, epdcolor.pack_4color),
+    "epd5in65f": (600, 448, ref_7color, epdcolor.pack_7color),
+    "epd7in3f": (800, 480, ref_7color, epdcolor.pack_7color),
+    "epd7in3e": (800, 480, lambda im, w, h: ref_7color(im, w, h, PAL7E),
+                 lambda im, w, h, **kw: epdcolor.pack_7color(im, w, h, palette=epdcolor.PALETTE_7IN3E, **kw)),
+    "epd4in01f": (640, 400, ref_7color_exact, lambda im, w, h, **kw: epdcolor.pack_7color_exact(im, w, h)),
+}
+
+
+def test_image(w, h):
+    """RGB noise with a strip of every palette color (and orange-ish near misses)."""
+    im = Image.frombytes('RGB', (w, h), os.urandom(w * h * 3))
+    colors = list(EXACT) + [(254, 128, 0), (0, 0, 1)]
+    strip = max(1, w // len(colors))
+    for n, color in enumerate(colors):
+        im.paste(color, (n * strip, 0, (n + 1) * strip, h // 3))
+    return im
+
+
+def best_of(fn, repeats):
+    best = None
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return best * 1000
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    ok = True
+
+    print("golden output (Floyd-Steinberg)")
+    for name, (width, height, ref, new) in PANELS.items():
+        for w, h in ((width, height), (height, width)):
+            im = test_image(w, h)
+            same = bytes(ref(im, width, height)) == bytes(new(im, width, height))
+            ok &= same
+            print(f"  {name:10} {w:4}x{h:<4} {'ok' if same else 'MISMATCH'}")
+
+    print(f"\n{'panel':>10} {'size':>9} {'old ms':>8} {'new ms':>8} {'speedup':>8} "
+          f"{'none ms':>8} {'ordered ms':>11}   (best of {repeats})")
+    for name, (width, height, ref, new) in PANELS.items():
+        im = test_image(width, height)
+        old_ms = best_of(lambda: ref(im, width, height), repeats)
+        new_ms = best_of(lambda: new(im, width, height), repeats)
+        none_ms = best_of(lambda: new(im, width, height, dither=epdcolor.NONE), repeats)
+        ordered_ms = best_of(lambda: new(im, width, height, dither=epdcolor.ORDERED), repeats)
+        print(f"{name:>10} {width:4}x{height:<4} {old_ms:8.1f} {new_ms:8.2f} {old_ms / new_ms:7.1f}x "
+              f"{none_ms:8.2f} {ordered_ms:11.2f}")
+
+    print("PASS" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
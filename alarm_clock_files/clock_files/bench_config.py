@@ -0,0 +1,119 @@
+"""
+Config read/write benchmark: direct config.json access vs. ConfigStore.
+
+Replays the access pattern of main.py in real time for a few seconds
+(button_polling reads every 2 ms, clock_thread reads 3x a second, an
+encoder spin writes brightness 20 times) and reports reads/sec and how
+many times config.json was rewritten.
+
+Then checks a write that lands while a flush is saving: config.json must
+end up holding the last write even when that write puts back the value
+the file had before the save.
+
+    python bench_config.py [seconds]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import config_manager
+from config_manager import ConfigStore, load_config_file, save_config_file, DEFAULT_CONFIG
+
+
+def read_throughput(read, duration=1.0):
+    n = 0
+    t_end = time.perf_counter() + duration
+    while time.perf_counter() < t_end:
+        read()
+        n += 1
+    return n / duration
+
+
+def replay_workload(read, write, seconds):
+    """Main-loop access pattern paced in real time; returns writes issued."""
+    writes = 0
+    t0 = time.perf_counter()
+    for tick in range(int(seconds * 500)):          # 2 ms button_polling pass
+        delay = t0 + tick * 0.002 - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        cfg = read()
+        if tick % 167 == 0:                         # clock_thread: 3 reads/s
+            read(); read(); read()
+        if tick % 500 == 0:                         # minute/hand bookkeeping
+            cfg["hand_position"] = (cfg.get("hand_position", 0) + 1) % 1440
+            write(cfg)
+            writes += 1
+        if 100 <= tick % 1000 < 120:                # encoder spin, 20 detents
+            cfg["brightness"] = (cfg.get("brightness", 50) + 5) % 100
+            write(cfg)
+            writes += 1
+    return writes
+
+
+def check_write_during_flush(path):
+    """write calibrate, flush, write idle while the save is on the card; disk must say idle."""
+    save_config_file(DEFAULT_CONFIG, path)
+    store = ConfigStore(path=path, flush_delay=60)      # only explicit flushes
+    saving, release = threading.Event(), threading.Event()
+    real_save = config_manager.save_config_file
+
+    def slow_save(cfg, path=None):
+        saving.set()
+        release.wait(5)
+        real_save(cfg, path)
+
+    config_manager.save_config_file = slow_save
+    try:
+        store.write(dict(DEFAULT_CONFIG, mode="calibrate"))
+        flusher = threading.Thread(target=store.flush)
+        flusher.start()
+        saving.wait(5)
+        store.write(dict(DEFAULT_CONFIG, mode="idle"))
+        release.set()
+        flusher.join()
+    finally:
+        config_manager.save_config_file = real_save
+    store.close()
+    memory, disk = store.read()["mode"], load_config_file(path)["mode"]
+    ok = memory == disk == "idle"
+    print(f"write during a flush: memory {memory!r}, disk {disk!r}  {'ok' if ok else 'BAD'}")
+    return ok
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    tmpdir = tempfile.mkdtemp()
+    path = os.path.join(tmpdir, "config.json")
+    save_config_file(DEFAULT_CONFIG, path)
+
+    # ---- before: every read/write hits the file ----
+    disk_writes = [0]
+
+    def legacy_write(cfg):
+        save_config_file(cfg, path)
+        disk_writes[0] += 1
+
+    legacy_rps = read_throughput(lambda: load_config_file(path))
+    legacy_writes = replay_workload(lambda: load_config_file(path), legacy_write, seconds)
+
+    # ---- after: in-memory store with write-behind ----
+    store = ConfigStore(path=path, flush_delay=config_manager.FLUSH_DELAY)
+    store_rps = read_throughput(store.read)
+    store_writes = replay_workload(store.read, store.write, seconds)
+    store.close()
+
+    print(f"workload: {seconds:.0f} s of main-loop traffic")
+    print(f"{'':12}{'reads/sec':>14}{'writes issued':>16}{'SD writes':>12}")
+    print(f"{'before':12}{legacy_rps:>14,.0f}{legacy_writes:>16}{disk_writes[0]:>12}")
+    print(f"{'after':12}{store_rps:>14,.0f}{store_writes:>16}{store.stats['disk_writes']:>12}")
+
+    ok = check_write_during_flush(path)
+    print("PASS" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
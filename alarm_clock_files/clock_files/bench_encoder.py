@@ -0,0 +1,207 @@
+"""
+Rotary encoder decoding: recorded edge streams replayed at several speeds
+through the old decoders and input_events.QuadratureDecoder.
+
+Each stream is a run of detents at a fixed rate, clean or with contact
+bounce. Bounce is extra toggles 0.1 ms apart on every edge. What a decoder
+sees is the level each interrupt reads, LATENCY after its edge, so
+bounce can show up as a repeated level or a level that skips a state.
+Rows:
+- latch: the old InputDispatcher, which latched DT when CLK fell and
+  emitted when CLK rose
+- poll 5 ms: the old idle.monitor_rotary_encoder, which sampled both
+  lines every 5 ms
+- table: QuadratureDecoder fed the same edges
+- table, 5 ms poll: the new idle.monitor_rotary_encoder
+- dispatcher: the edges replayed through a real InputDispatcher on a
+  hal.VirtualClock
+
+For each decoder the table prints the detents reported the right way,
+missed, duplicated and backwards, and the minutes a set_alarm detent
+moves the hands (main.ENCODER_MINUTES x steps).
+
+Checks that the table decoder and the dispatcher miss and duplicate
+nothing at every speed, bounce or not. A slow turn must move 5 minutes a
+detent, and a spin of 30 detents a second or faster 30-60 minutes
+after its first detent.
+
+The replay stands in for a unit test of the decoder, since nothing here
+runs pytest. A failed check marks its row BAD, and the script ends on
+FAIL with exit status 1.
+
+    python bench_encoder.py
+"""
+import sys
+import time
+
+import gpio_setup
+import hal
+from input_events import FakeBackend, InputDispatcher, QuadratureDecoder, REST
+
+ENCODER_MINUTES = 5             # main.ENCODER_MINUTES; importing main needs the board
+RATES = (2, 12, 30, 60)         # detents per second
+DETENTS = 24
+BOUNCE = 2                      # extra toggle pairs per edge
+BOUNCE_GAP = 0.0001
+LATENCY = 0.00015               # edge to GPIO.input() in the interrupt thread
+POLL = 0.005
+
+CLK, DT = gpio_setup.clk, gpio_setup.dt
+CW = ((CLK, 0), (DT, 0), (CLK, 1), (DT, 1))
+CCW = ((DT, 0), (CLK, 0), (DT, 1), (CLK, 1))
+
+
+def stream(direction, rate, detents=DETENTS, bounce=0):
+    """Raw (time, pin, level) edges: detents at rate a second, 4 edges each."""
+    quarter = 1.0 / rate / 4
+    edges, t = [], 0.01
+    for _ in range(detents):
+        for pin, level in (CW if direction > 0 else CCW):
+            for i in range(bounce):
+                edges.append((t + 2 * i * BOUNCE_GAP, pin, level))
+                edges.append((t + (2 * i + 1) * BOUNCE_GAP, pin, 1 - level))
+            edges.append((t + 2 * bounce * BOUNCE_GAP, pin, level))
+            t += quarter
+    return edges
+
+
+def level_at(edges, t):
+    """Line levels at time t."""
+    levels = {CLK: 1, DT: 1}
+    for te, pin, level in edges:
+        if te > t:
+            break
+        levels[pin] = level
+    return levels
+
+
+def reads(edges):
+    """(time, pin, level) as the interrupt callbacks see it: read LATENCY after each edge."""
+    out = []
+    for t, pin, _ in edges:
+        out.append((t, pin, level_at(edges, t + LATENCY)[pin]))
+    return out
+
+
+# ----- reference implementations -----
+def old_latch(seen):
+    """The old InputDispatcher._encoder_edge."""
+    levels, latch, out = {CLK: 1, DT: 1}, None, []
+    for _, pin, level in seen:
+        if levels[pin] == level:
+            continue
+        levels[pin] = level
+        if pin != CLK:
+            continue
+        if level == 0:
+            latch = 1 if levels[DT] else -1
+        elif latch is not None:
+            out.append((latch, 1))
+            latch = None
+    return out
+
+
+def old_poll(edges):
+    """The old idle.monitor_rotary_encoder, sampling every POLL."""
+    last_clk, out, t = 1, [], 0.0
+    while t < edges[-1][0] + 2 * POLL:
+        levels = level_at(edges, t)
+        if levels[CLK] != last_clk and levels[CLK] == 0:
+            out.append((1 if levels[DT] != levels[CLK] else -1, 1))
+        last_clk = levels[CLK]
+        t += POLL
+    return out
+
+
+def table(seen):
+    decoder, levels, out = QuadratureDecoder(), {CLK: 1, DT: 1}, []
+    for t, pin, level in seen:
+        if levels[pin] == level:
+            continue
+        levels[pin] = level
+        detent = decoder.update(levels[CLK], levels[DT], t)
+        if detent is not None:
+            out.append(detent)
+    return out
+
+
+def table_poll(edges):
+    decoder, out, t = QuadratureDecoder(REST), [], 0.0
+    while t < edges[-1][0] + 2 * POLL:
+        levels = level_at(edges, t)
+        detent = decoder.update(levels[CLK], levels[DT], t)
+        if detent is not None:
+            out.append(detent)
+        t += POLL
+    return out
+
+
+def dispatcher(seen):
+    """seen replayed through an InputDispatcher on a VirtualClock, at its times."""
+    clock = hal.VirtualClock()
+    backend = FakeBackend(sleep=clock.run_for)
+    out = []
+    d = InputDispatcher(backend, buttons={}, encoder=(CLK, DT), clock=clock)
+    d.start(lambda ev, name, steps=1: out.append((1 if ev == "cw" else -1, steps)))
+    time.sleep(0.05)                    # let it park on its queue
+    for t, pin, level in seen:
+        clock.run_for(max(0.0, t - clock.monotonic()))
+        backend.set_level(pin, level)
+    clock.run_for(0.1)
+    d.stop()
+    return out
+
+
+def score(out, direction, detents):
+    right = sum(1 for d, _ in out if d == direction)
+    backwards = len(out) - right
+    missed = max(0, detents - right)
+    duplicated = max(0, right - detents)
+    minutes = sum(steps for d, steps in out if d == direction) * ENCODER_MINUTES
+    return right, missed, duplicated, backwards, minutes / max(1, right)
+
+
+def main():
+    ok = True
+    print(f"{'stream':>22} {'decoder':>17} {'right':>6} {'missed':>7} {'dup':>4} {'back':>5} {'min/detent':>11}")
+    for bounce in (0, BOUNCE):
+        for rate in RATES:
+            for direction in (1, -1):
+                edges = stream(direction, rate, bounce=bounce)
+                seen = reads(edges)
+                label = f"{'cw' if direction > 0 else 'ccw'} {rate}/s{' bounce' if bounce else ''}"
+                rows = (("latch", old_latch(seen)), ("poll 5 ms", old_poll(edges)),
+                        ("table", table(seen)), ("table, 5 ms poll", table_poll(edges)),
+                        ("dispatcher", dispatcher(seen)))
+                for name, out in rows:
+                    right, missed, dup, back, per = score(out, direction, DETENTS)
+                    good = True
+                    if name in ("table", "dispatcher"):
+                        good = missed == dup == back == 0
+                        if rate <= 2:
+                            good &= per == ENCODER_MINUTES
+                        if rate >= 30:
+                            # the first detent of a spin has nothing to measure against
+                            spin = [steps * ENCODER_MINUTES for _, steps in out[1:]]
+                            good &= 30 <= min(spin) and max(spin) <= 60
+                        ok &= good
+                    print(f"{label:>22} {name:>17} {right:6} {missed:7} {dup:4} {back:5} {per:11.1f}"
+                          f"{'' if good else '  BAD'}")
+                    label = ""
+
+    # a turn and straight back: bounce and reversals cancel, no stray detent
+    edges = stream(1, 12, detents=3, bounce=BOUNCE)
+    back = [(t + edges[-1][0] + 0.2, pin, level) for t, pin, level in stream(-1, 12, detents=3, bounce=BOUNCE)]
+    out = table(reads(edges + back))
+    half = [(0.01, CLK, 0), (0.02, DT, 0), (0.03, DT, 1), (0.04, CLK, 1)]
+    rev_ok = [d for d, _ in out] == [1, 1, 1, -1, -1, -1] and table(half) == [] and out[3][1] == 1
+    print(f"\n3 cw, 3 ccw: {[d for d, _ in out]}, half a detent and back: {table(half)}  "
+          f"{'ok' if rev_ok else 'BAD'}")
+    ok &= rev_ok
+
+    print("PASS" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
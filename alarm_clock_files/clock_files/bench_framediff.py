@@ -0,0 +1,90 @@
+"""
+Bytes on the SPI bus per typical clock update: full frame vs dirty windows.
+
+Renders consecutive epd2in13_V4 frames headless (same packing as
+EPD.getbuffer), diffs them with waveshare_epd.framediff, checks that
+patching the old frame with the windows reproduces the new one and that
+merging never sends more than the unmerged windows, and prints the
+transfer size of each update. Also checks that dirty bytes at opposite
+edges of neighbouring rows stay two windows, while a band of rows with
+the same span and a one-row gap between them merge into one.
+
+    python bench_framediff.py [path/to/font.ttf]
+"""
+import os
+import sys
+
+import render
+import bench_render
+from display import framediff
+
+EPD_WIDTH = 122     # epd2in13_V4 RAM is 122 x 250, portrait
+LINE = framediff.line_bytes(EPD_WIDTH)
+
+
+def pack(image):
+    """epd2in13_V4.EPD.getbuffer() for a landscape image."""
+    return image.rotate(90, expand=True).convert('1').tobytes('raw')
+
+
+def apply(old, new, windows):
+    out = bytearray(old)
+    for window in windows:
+        x0, x1, y0, y1 = window
+        chunk = framediff.window_bytes(new, LINE, window)
+        w = x1 - x0 + 1
+        for i, y in enumerate(range(y0, y1 + 1)):
+            out[y * LINE + x0:y * LINE + x1 + 1] = chunk[i * w:(i + 1) * w]
+    return bytes(out)
+
+
+def main():
+    render.ICON_DIR = os.path.join(bench_render.REPO_DIR, "weather_icons")
+    render.DROPLET_ICON = os.path.join(bench_render.REPO_DIR, "droplet.bmp")
+    if len(sys.argv) > 1:
+        render.FONT_FILE = sys.argv[1]
+    elif not os.path.exists(render.FONT_FILE):
+        render.FONT_FILE = next(f for f in bench_render.FALLBACK_FONTS if os.path.exists(f))
+
+    fc = bench_render.FORECAST
+    frames = [
+        ("hourly refresh, time only", lambda: render.render_main_screen(fc, "Monday, Mar 02", "07:00", "07:05", "Home"),
+                                      lambda: render.render_main_screen(fc, "Monday, Mar 02", "08:00", "07:05", "Home")),
+        ("new alarm time",            lambda: render.render_main_screen(fc, "Monday, Mar 02", "08:00", "07:05", "Home"),
+                                      lambda: render.render_main_screen(fc, "Monday, Mar 02", "08:00", "06:30", "Home")),
+        ("set-alarm confirm",         lambda: render.render_set_alarm_screen("07:05"),
+                                      lambda: render.render_set_alarm_screen("07:10")),
+        ("mode change",               lambda: render.render_calibrate_screen(),
+                                      lambda: render.render_set_alarm_screen("07:10")),
+    ]
+
+    ok = True
+    print(f"{'update':>28} {'full frame':>10} {'windows':>8} {'window bytes':>13} {'saved':>6}")
+    for name, before, after in frames:
+        old, new = pack(before()), pack(after())
+        windows = framediff.dirty_windows(old, new, LINE)
+        ok &= apply(old, new, windows) == new
+        sent = framediff.transfer_size(windows)
+        ok &= sent <= framediff.transfer_size(framediff.dirty_windows(old, new, LINE, merge=False))
+        print(f"{name:>28} {len(new):>10} {len(windows):>8} {sent:>13} {100 - 100 * sent / len(new):>5.0f}%")
+
+    # far apart on neighbouring rows: one window would send most of two rows
+    old = bytes(LINE * 4)
+    new = bytearray(old)
+    new[1 * LINE] = new[2 * LINE + LINE - 1] = 0xFF
+    apart = framediff.dirty_windows(old, bytes(new), LINE)
+    # the same span on rows 0, 1 and 3: the gap row is cheaper than a window
+    new = bytearray(old)
+    for y in (0, 1, 3):
+        new[y * LINE + 4:y * LINE + 8] = b"\xff" * 4
+    band = framediff.dirty_windows(old, bytes(new), LINE)
+    merge_ok = apart == [(0, 0, 1, 1), (LINE - 1, LINE - 1, 2, 2)] and band == [(4, 7, 0, 3)]
+    print(f"\nopposite edges of rows 1-2: {apart}, one span on rows 0, 1, 3: {band}  "
+          f"{'ok' if merge_ok else 'BAD'}")
+    ok &= merge_ok
+    print("PASS" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
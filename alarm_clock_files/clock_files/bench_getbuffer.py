@@ -0,0 +1,221 @@
+"""
+Golden-output check and timing for waveshare_epd.epdbuffer.
+
+Every monochrome getbuffer() variant the drivers used to run as a
+per-pixel Python loop is kept here as a reference. For each panel size
+the reference and the shared PIL-based packer are fed the same random
+grayscale (dithered) and bilevel images, native and rotated, and must
+produce identical bytes. Then both are timed per panel size.
+
+    python bench_getbuffer.py [repeats]
+"""
+import os
+import sys
+import time
+
+from PIL import Image
+
+libdir = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'lib')
+if os.path.exists(libdir):
+    sys.path.append(libdir)
+
+from waveshare_epd import epdbuffer
+
+# (driver, width, height) -- one panel per distinct size
+PANELS = [
+    ("epd1in02", 80, 128), ("epd1in54", 200, 200), ("epd1in54c", 152, 152),
+    ("epd2in13", 122, 250), ("epd2in13d", 104, 212), ("epd2in66", 152, 296),
+    ("epd2in7", 176, 264), ("epd2in9", 128, 296), ("epd3in52", 240, 360),
+    ("epd3in7", 280, 480), ("epd4in2", 400, 300), ("epd4in26", 800, 480),
+    ("epd5in79", 792, 272), ("epd5in83", 600, 448), ("epd5in83_V2", 648, 480),
+    ("epd7in5", 640, 384), ("epd7in5_V2", 800, 480), ("epd7in5_HD", 880, 528),
+    ("epd13in3k", 960, 680),
+]
+
+
+# ----- reference implementations (the old driver loops) -----
+def ref_std(image, width, height):
+    """epd2in9 and friends; epd2in13 with linewidth padding."""
+    linewidth = (width + 7) // 8
+    buf = [0xFF] * (linewidth * height)
+    image_monocolor = image.convert('1')
+    imwidth, imheight = image_monocolor.size
+    pixels = image_monocolor.load()
+    if imwidth == width and imheight == height:
+        for y in range(imheight):
+            for x in range(imwidth):
+                if pixels[x, y] == 0:
+                    buf[int(x / 8) + y * linewidth] &= ~(0x80 >> (x % 8))
+    elif imwidth == height and imheight == width:
+        for y in range(imheight):
+            for x in range(imwidth):
+                newx = y
+                newy = height - x - 1
+                if pixels[x, y] == 0:
+                    buf[int(newx / 8) + newy * linewidth] &= ~(0x80 >> (y % 8))
+    return buf
+
+
+def ref_mirrored(image, width, height):
+    """epd2in13_V2."""
+    linewidth = (width + 7) // 8
+    buf = [0xFF] * (linewidth * height)
+    image_monocolor = image.convert('1')
+    imwidth, imheight = image_monocolor.size
+    pixels = image_monocolor.load()
+    if imwidth == width and imheight == height:
+        for y in range(imheight):
+            for x in range(imwidth):
+                if pixels[x, y] == 0:
+                    x = imwidth - x
+                    buf[int(x / 8) + y * linewidth] &= ~(0x80 >> (x % 8))
+    elif imwidth == height and imheight == width:
+        for y in range(imheight):
+            for x in range(imwidth):
+                newx = y
+                newy = height - x - 1
+                if pixels[x, y] == 0:
+                    newy = imwidth - newy - 1
+                    buf[int(newx / 8) + newy * linewidth] &= ~(0x80 >> (y % 8))
+    return buf
+
+
+def ref_tobytes(image, width, height, invert=False):
+    """epd2in13_V4, epd7in5_HD; epd7in5_V2 with invert."""
+    img = image
+    imwidth, imheight = img.size
+    if imwidth == width and imheight == height:
+        img = img.convert('1')
+    else:
+        img = img.rotate(90, expand=True).convert('1')
+    buf = bytearray(img.tobytes('raw'))
+    if invert:
+        for i in range(len(buf)):
+            buf[i] ^= 0xFF
+    return buf
+
+
+def ref_4bpp(image, width, height):
+    """epd7in5."""
+    img = image
+    imwidth, imheight = img.size
+    halfwidth = int(width / 2)
+    buf = [0x33] * halfwidth * height
+    if imwidth == width and imheight == height:
+        img = img.convert('1')
+    else:
+        img = img.rotate(90, expand=True).convert('1')
+        imwidth, imheight = img.size
+    pixels = img.load()
+    for y in range(imheight):
+        offset = y * halfwidth
+        for x in range(1, imwidth, 2):
+            i = offset + x // 2
+            if pixels[x - 1, y] > 191:
+                buf[i] = 0x33 if pixels[x, y] > 191 else 0x30
+            else:
+                buf[i] = 0x03 if pixels[x, y] > 191 else 0x00
+    return buf
+
+
+def ref_2bpp(image, width, height):
+    """epd5in83."""
+    buf = [0x00] * int(width * height / 4)
+    image_monocolor = image.convert('1')
+    imwidth, imheight = image_monocolor.size
+    pixels = image_monocolor.load()
+    if imwidth == width and imheight == height:
+        for y in range(imheight):
+            for x in range(imwidth):
+                if pixels[x, y] < 64:
+                    buf[int((x + y * width) / 4)] &= ~(0xC0 >> (x % 4 * 2))
+                elif pixels[x, y] < 192:
+                    buf[int((x + y * width) / 4)] &= ~(0xC0 >> (x % 4 * 2))
+                    buf[int((x + y * width) / 4)] |= 0x40 >> (x % 4 * 2)
+                else:
+                    buf[int((x + y * width) / 4)] |= 0xC0 >> (x % 4 * 2)
+    elif imwidth == height and imheight == width:
+        for y in range(imheight):
+            for x in range(imwidth):
+                newx = y
+                newy = height - x - 1
+                if pixels[x, y] < 64:
+                    buf[int((newx + newy * width) / 4)] &= ~(0xC0 >> (y % 4 * 2))
+                elif pixels[x, y] < 192:
+                    buf[int((newx + newy * width) / 4)] &= ~(0xC0 >> (y % 4 * 2))
+                    buf[int((newx + newy * width) / 4)] |= 0x40 >> (y % 4 * 2)
+                else:
+                    buf[int((newx + newy * width) / 4)] |= 0xC0 >> (y % 4 * 2)
+    return buf
+
+
+# ----- the shared packer, called the way each driver calls it -----
+VARIANTS = {
+    "std": (ref_std,
+            lambda im, w, h: epdbuffer.pack_1bpp(im, w, h)),
+    "mirrored": (ref_mirrored,
+                 lambda im, w, h: epdbuffer.pack_1bpp_mirrored(im, w, h)),
+    "tobytes": (ref_tobytes,
+                lambda im, w, h: epdbuffer.pack_1bpp(im, w, h, blank=0x00, rotate_first=True)),
+    "inverted": (lambda im, w, h: ref_tobytes(im, w, h, invert=True),
+                 lambda im, w, h: epdbuffer.pack_1bpp(im, w, h, blank=0x00, invert=True, rotate_first=True)),
+    "4bpp": (ref_4bpp,
+             lambda im, w, h: epdbuffer.expand(epdbuffer.pack_1bpp(im, w, h, rotate_first=True), epdbuffer.EXPAND_4BPP)),
+    "2bpp": (ref_2bpp,
+             lambda im, w, h: epdbuffer.expand(epdbuffer.pack_1bpp(im, w, h, blank=0x00), epdbuffer.EXPAND_2BPP)),
+}
+# which variants apply to which panel (std runs everywhere)
+EXTRA = {"epd2in13": ["mirrored", "tobytes"], "epd7in5": ["4bpp"], "epd5in83": ["2bpp"],
+         "epd7in5_V2": ["inverted"], "epd7in5_HD": ["tobytes"]}
+
+
+def images(width, height):
+    """Gray noise (exercises dithering) and bilevel noise, both orientations."""
+    out = []
+    for w, h in ((width, height), (height, width)):
+        gray = Image.frombytes('L', (w, h), os.urandom(w * h))
+        out.append(gray)
+        out.append(gray.point(lambda v: 255 if v > 127 else 0).convert('1'))
+    return out
+
+
+def best_of(fn, repeats):
+    best = None
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return best * 1000
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    ok = True
+
+    print("golden output")
+    for name, width, height in PANELS:
+        for variant in ["std"] + EXTRA.get(name, []):
+            ref, new = VARIANTS[variant]
+            same = all(bytes(ref(im, width, height)) == bytes(new(im, width, height))
+                       for im in images(width, height))
+            ok &= same
+            print(f"  {name:12} {width:4}x{height:<4} {variant:9} {'ok' if same else 'MISMATCH'}")
+
+    print(f"\n{'panel':>12} {'size':>9} {'variant':9} {'old ms':>9} {'new ms':>8} {'speedup':>8}"
+          f"   (rotated image, best of {repeats})")
+    for name, width, height in PANELS:
+        im = Image.new('1', (height, width), 255)
+        im.paste(0, (0, 0, height // 2, width // 3))
+        for variant in ["std"] + EXTRA.get(name, []):
+            ref, new = VARIANTS[variant]
+            old_ms = best_of(lambda: ref(im, width, height), repeats)
+            new_ms = best_of(lambda: new(im, width, height), repeats)
+            print(f"{name:>12} {width:4}x{height:<4} {variant:9} {old_ms:9.2f} {new_ms:8.3f} {old_ms / new_ms:7.1f}x")
+
+    print("PASS" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
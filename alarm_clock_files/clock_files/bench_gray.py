@@ -0,0 +1,209 @@
+"""
+Golden-output check and timing for the 4Gray path in waveshare_epd.epdbuffer.
+
+The old getbuffer_4Gray() loop and the old display_4Gray() plane split
+are kept here as references. For every 4Gray driver the bytes that
+reach the wire (both RAM planes) are compared for a native and a rotated
+image made of the four gray levels plus noise, then the whole 4Gray path
+is timed on an 800x480 frame. epd2in7's display_4Gray() is also run on
+bench_spi's fake epdconfig and must put the same two planes on the bus.
+
+    python bench_gray.py [repeats]
+"""
+import os
+import sys
+import time
+
+from PIL import Image
+
+# the drivers below get bench_spi's fake epdconfig
+from bench_spi import run
+
+from waveshare_epd import epd2in7, epdbuffer, framediff
+
+# driver: (width, height, transpose, plane bits for the two RAM writes)
+DRIVERS = {
+    "epd13in3k": (960, 680, False, ((1, 0, 1, 0), (1, 1, 0, 0))),
+    "epd2in7": (176, 264, False, ((0, 0, 1, 1), (0, 1, 0, 1))),
+    "epd2in7_V2": (176, 264, False, ((1, 0, 1, 0), (1, 1, 0, 0))),
+    "epd2in9_V2": (128, 296, False, ((1, 0, 1, 0), (1, 1, 0, 0))),
+    "epd3in7": (280, 480, False, ((0, 1, 0, 1), (0, 0, 1, 1))),
+    "epd4in2": (400, 300, True, ((0, 0, 1, 1), (0, 1, 0, 1))),
+    "epd4in26": (800, 480, False, ((1, 0, 1, 0), (1, 1, 0, 0))),
+    "epd4in2_V2": (400, 300, True, ((0, 1, 0, 1), (0, 0, 1, 1))),
+    "epd5in79": (792, 272, False, ((0, 1, 0, 1), (0, 0, 1, 1))),
+    "epd7in5_V2": (800, 480, False, ((1, 0, 1, 0), (1, 1, 0, 0))),
+}
+
+
+# ----- reference implementations (the old driver loops) -----
+def ref_getbuffer_4gray(image, width, height, transpose):
+    buf = [0xFF] * (int(width / 4) * height)
+    image_monocolor = image.convert('L')
+    imwidth, imheight = image_monocolor.size
+    pixels = image_monocolor.load()
+    i = 0
+    if imwidth == width and imheight == height:
+        for y in range(imheight):
+            for x in range(imwidth):
+                if pixels[x, y] == 0xC0:
+                    pixels[x, y] = 0x80
+                elif pixels[x, y] == 0x80:
+                    pixels[x, y] = 0x40
+                i = i + 1
+                if i % 4 == 0:
+                    buf[int((x + (y * width)) / 4)] = ((pixels[x - 3, y] & 0xc0) | (pixels[x - 2, y] & 0xc0) >> 2 |
+                                                       (pixels[x - 1, y] & 0xc0) >> 4 | (pixels[x, y] & 0xc0) >> 6)
+    elif imwidth == height and imheight == width:
+        for x in range(imwidth):
+            for y in range(imheight):
+                newx = y
+                newy = x if transpose else height - x - 1
+                if pixels[x, y] == 0xC0:
+                    pixels[x, y] = 0x80
+                elif pixels[x, y] == 0x80:
+                    pixels[x, y] = 0x40
+                i = i + 1
+                if i % 4 == 0:
+                    buf[int((newx + (newy * width)) / 4)] = ((pixels[x, y - 3] & 0xc0) | (pixels[x, y - 2] & 0xc0) >> 2 |
+                                                             (pixels[x, y - 1] & 0xc0) >> 4 | (pixels[x, y] & 0xc0) >> 6)
+    return buf
+
+
+def ref_plane(image, bits, count):
+    """One display_4Gray() RAM write; bits is indexed by 2-bit level."""
+    out = []
+    for i in range(0, count):
+        temp3 = 0
+        for j in range(0, 2):
+            temp1 = image[i * 2 + j]
+            for k in range(0, 4):
+                temp3 |= bits[(temp1 & 0xC0) >> 6]
+                if j != 1 or k != 3:
+                    temp3 <<= 1
+                temp1 <<= 2
+        out.append(temp3)
+    return out
+
+
+def ref_wire(name, image):
+    width, height, transpose, planes = DRIVERS[name]
+    buf = ref_getbuffer_4gray(image, width, height, transpose)
+    if name != "epd5in79":
+        return [bytes(ref_plane(buf, bits, width * height // 8)) for bits in planes]
+    # two controllers, Width bytes of each row each
+    Width = int(width / 16) + 1
+    Width1 = int(width / 8)
+    wire = []
+    for start in (0, Width - 1):
+        for bits in planes:
+            out = []
+            for j in range(height):
+                for i in range(Width):
+                    out += ref_plane(buf[(j * Width1 + i + start) * 2:], bits, 1)
+            wire.append(bytes(out))
+    return wire
+
+
+def new_wire(name, image):
+    width, height, transpose, planes = DRIVERS[name]
+    buf = epdbuffer.pack_4gray(image, width, height, transpose=transpose)
+    if name != "epd5in79":
+        return [bytes(epdbuffer.gray_plane(buf, bits)) for bits in planes]
+    Width = int(width / 16) + 1
+    Width1 = int(width / 8)
+    wire = []
+    for start in (0, Width - 1):
+        for bits in planes:
+            plane = epdbuffer.gray_plane(buf, bits)
+            wire.append(framediff.window_bytes(plane, Width1, (start, start + Width - 1, 0, height - 1)))
+    return wire
+
+
+def command_data(stream, command):
+    """Data bytes sent after the first `command` on the bus."""
+    start = stream.index((0, command)) + 1
+    out = []
+    for dc, b in stream[start:]:
+        if not dc:
+            break
+        out.append(b)
+    return bytes(out)
+
+
+def driver_wire(image):
+    """RAM planes epd2in7.EPD.display_4Gray() sends."""
+    epd = epd2in7.EPD()
+    buf = epd.getbuffer_4Gray(image)
+    stream, _, _ = run(lambda: epd.display_4Gray(buf))
+    return [command_data(stream, 0x10), command_data(stream, 0x13)]
+
+
+def gray_image(w, h):
+    """Bands of 0x00/0x40/0x80/0xC0/0xFF with random noise in the middle."""
+    im = Image.frombytes('L', (w, h), os.urandom(w * h))
+    band = h // 8
+    for n, level in enumerate((0x00, 0x40, 0x80, 0xC0, 0xFF)):
+        im.paste(level, (0, n * band, w, (n + 1) * band))
+    return im
+
+
+def best_of(fn, repeats):
+    best = None
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return best * 1000
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    ok = True
+
+    print("bytes on the wire, old vs new")
+    for name, (width, height, _, _) in DRIVERS.items():
+        for w, h in ((width, height), (height, width)):
+            im = gray_image(w, h)
+            same = ref_wire(name, im) == new_wire(name, im)
+            ok &= same
+            print(f"  {name:11} {w:4}x{h:<4} {'ok' if same else 'MISMATCH'}")
+
+    print("\nepd2in7 display_4Gray() on the fake bus")
+    width, height, _, _ = DRIVERS["epd2in7"]
+    for w, h in ((width, height), (height, width)):
+        im = gray_image(w, h)
+        try:
+            same = driver_wire(im) == ref_wire("epd2in7", im)
+        except Exception as e:
+            print(f"  epd2in7     {w:4}x{h:<4} {type(e).__name__}: {e}")
+            same = False
+        else:
+            print(f"  epd2in7     {w:4}x{h:<4} {'ok' if same else 'MISMATCH'}")
+        ok &= same
+
+    print(f"\n800x480 frame (epd7in5_V2), best of {repeats}")
+    width, height, _, planes = DRIVERS["epd7in5_V2"]
+    im = gray_image(width, height)
+    buf = epdbuffer.pack_4gray(im, width, height)
+    rows = [
+        ("getbuffer_4Gray", lambda: ref_getbuffer_4gray(im, width, height, False),
+                            lambda: epdbuffer.pack_4gray(im, width, height)),
+        ("plane split x2", lambda: [ref_plane(buf, bits, width * height // 8) for bits in planes],
+                           lambda: [epdbuffer.gray_plane(buf, bits) for bits in planes]),
+        ("whole 4Gray path", lambda: ref_wire("epd7in5_V2", im),
+                             lambda: new_wire("epd7in5_V2", im)),
+    ]
+    print(f"{'stage':>18} {'old ms':>9} {'new ms':>8} {'speedup':>8}")
+    for label, old, new in rows:
+        old_ms = best_of(old, repeats)
+        new_ms = best_of(new, repeats)
+        print(f"{label:>18} {old_ms:9.1f} {new_ms:8.2f} {old_ms / new_ms:7.0f}x")
+
+    print("PASS" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
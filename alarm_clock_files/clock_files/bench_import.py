@@ -0,0 +1,81 @@
+"""
+Import cost of waveshare_epd at process startup: panel metadata only,
+the one driver f_update uses (get_driver), and every driver module.
+
+Each case runs in a fresh interpreter, best of `repeats`. On a Pi the
+real epdconfig is used; elsewhere bench_spi's fake epdconfig stands in
+(its setup is not timed), so the driver rows only measure the driver
+modules. Checks that metadata lookups import no driver module and that
+get_driver() imports exactly one.
+
+    python bench_import.py [repeats]
+"""
+import os
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.realpath(__file__))
+
+SETUP = """
+import os, sys, time
+sys.path.insert(0, {here!r})
+libdir = os.path.join(os.path.dirname({here!r}), 'lib')
+sys.path.append(libdir)
+try:
+    from waveshare_epd import epdconfig
+    backend = "epdconfig"
+except Exception:
+    sys.modules.pop("waveshare_epd.epdconfig", None)
+    import bench_spi
+    backend = "fake epdconfig"
+for m in [m for m in sys.modules if m.startswith("waveshare_epd")]:
+    if m != "waveshare_epd.epdconfig":
+        del sys.modules[m]
+t0 = time.perf_counter()
+"""
+
+REPORT = """
+dt = time.perf_counter() - t0
+drivers = [m for m in sys.modules if m.startswith("waveshare_epd.epd") and m[14:] in waveshare_epd.PANELS]
+print(dt * 1000, len(drivers), backend)
+"""
+
+CASES = [
+    ("metadata only", "import waveshare_epd\nwaveshare_epd.panel_info('epd2in13_V4')\n"
+                      "waveshare_epd.find(partial=True)"),
+    ("get_driver(epd2in13_V4)", "import waveshare_epd\nwaveshare_epd.get_driver('epd2in13_V4').EPD()"),
+    ("every driver", "import waveshare_epd\nfor name in waveshare_epd.PANELS:\n"
+                     "    waveshare_epd.get_driver(name)"),
+]
+
+
+def run(body, repeats):
+    code = SETUP.format(here=HERE) + body + REPORT
+    best = None
+    for _ in range(repeats):
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        ms, drivers, backend = out.stdout.split(None, 2)
+        best = float(ms) if best is None else min(best, float(ms))
+    return best, int(drivers), backend.strip()
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    ok = True
+    print(f"{'import':>26} {'ms':>8} {'drivers loaded':>15}")
+    rows = {}
+    for label, body in CASES:
+        ms, drivers, backend = run(body, repeats)
+        rows[label] = (ms, drivers)
+        print(f"{label:>26} {ms:8.2f} {drivers:15}")
+    print(f"(drivers on {backend})")
+    ok &= rows["metadata only"][1] == 0 and rows["get_driver(epd2in13_V4)"][1] == 1
+    ok &= rows["every driver"][1] > 60
+    ok &= rows["get_driver(epd2in13_V4)"][0] < rows["every driver"][0]
+
+    print("PASS" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
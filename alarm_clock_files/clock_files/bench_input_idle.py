@@ -0,0 +1,126 @@
+"""
+Idle CPU check for the input subsystem, runnable on any Linux box.
+
+Measures process CPU time while nothing is pressed for the old 2 ms
+busy-poll loop and for the edge-driven InputDispatcher (FakeBackend),
+then fires a few presses/detents to make sure events still arrive, and
+that debouncing holds: a press that bounces on the way down and up is
+one short press, and a 5 ms glitch is nothing.
+Exits non-zero if the dispatcher uses more than MAX_IDLE_CPU percent.
+
+    python bench_input_idle.py [seconds]
+"""
+import sys
+import threading
+import time
+
+import gpio_setup
+from input_events import FakeBackend, InputDispatcher
+
+MAX_IDLE_CPU = 1.0  # percent of one core
+
+PINS = [gpio_setup.sw, gpio_setup.snz, gpio_setup.RGButton, gpio_setup.clk, gpio_setup.dt]
+
+
+def cpu_percent(run, seconds):
+    stop = threading.Event()
+    t = threading.Thread(target=run, args=(stop,), daemon=True)
+    c0 = time.process_time()
+    t.start()
+    time.sleep(seconds)
+    c1 = time.process_time()
+    stop.set()
+    t.join(timeout=1)
+    return 100.0 * (c1 - c0) / seconds
+
+
+def legacy_poll(backend):
+    def run(stop):
+        while not stop.is_set():
+            for pin in PINS:
+                backend.read(pin)
+            time.sleep(0.002)
+    return run
+
+
+def dispatcher_idle(dispatcher, events):
+    def run(stop):
+        threading.Thread(target=lambda: (stop.wait(), dispatcher.stop()), daemon=True).start()
+        dispatcher.run(lambda ev, name, *steps: events.append((ev, name)))
+    return run
+
+
+def bounce(backend, pin, level, toggles=4):
+    """Settle pin at level after a few contact bounces 1 ms apart."""
+    for _ in range(toggles):
+        backend.set_level(pin, level)
+        time.sleep(0.001)
+        backend.set_level(pin, 1 - level)
+        time.sleep(0.001)
+    backend.set_level(pin, level)
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 3.0
+
+    poll_cpu = cpu_percent(legacy_poll(FakeBackend()), seconds)
+
+    backend = FakeBackend()
+    events = []
+    dispatcher = InputDispatcher(
+        backend,
+        buttons={"re": gpio_setup.sw, "snooze": gpio_setup.snz, "rg": gpio_setup.RGButton},
+        encoder=(gpio_setup.clk, gpio_setup.dt),
+        long_press=0.3,
+    )
+    idle_cpu = cpu_percent(dispatcher_idle(dispatcher, events), seconds)
+
+    # Functional smoke check on a fresh dispatcher
+    backend = FakeBackend()
+    events = []
+    dispatcher = InputDispatcher(
+        backend,
+        buttons={"re": gpio_setup.sw, "snooze": gpio_setup.snz, "rg": gpio_setup.RGButton},
+        encoder=(gpio_setup.clk, gpio_setup.dt),
+        long_press=0.3,
+    )
+    dispatcher.start(lambda ev, name, *steps: events.append((ev, name)))
+    time.sleep(0.05)
+    backend.press(gpio_setup.sw, 0.05)
+    backend.press(gpio_setup.snz, 0.4)
+    backend.turn(gpio_setup.clk, gpio_setup.dt, 1, detents=10)
+    backend.turn(gpio_setup.clk, gpio_setup.dt, -1, detents=4)
+    time.sleep(0.1)
+    before_bounce = len(events)
+    bounce(backend, gpio_setup.snz, 0)
+    time.sleep(0.1)
+    bounce(backend, gpio_setup.snz, 1)
+    time.sleep(0.1)
+    bounced = events[before_bounce:]
+    backend.set_level(gpio_setup.sw, 0)
+    time.sleep(0.005)
+    backend.set_level(gpio_setup.sw, 1)
+    time.sleep(0.1)
+    glitch = events[before_bounce + len(bounced):]
+    dispatcher.stop()
+
+    print(f"idle CPU, 2 ms poll loop : {poll_cpu:6.2f} %")
+    print(f"idle CPU, edge dispatcher: {idle_cpu:6.2f} %")
+    print(f"events: RE short={events.count(('short', 're'))} "
+          f"snooze long={events.count(('long', 'snooze'))} "
+          f"cw={events.count(('cw', 'encoder'))} ccw={events.count(('ccw', 'encoder'))}")
+    print(f"bouncy snooze press: {bounced}, 5 ms glitch on RE: {glitch}")
+
+    ok = (idle_cpu <= MAX_IDLE_CPU
+          and ("short", "re") in events
+          and ("long", "snooze") in events
+          and events.count(("cw", "encoder")) == 10
+          and events.count(("ccw", "encoder")) == 4
+          and bounced == [("down", "snooze"), ("up", "snooze"), ("short", "snooze")]
+          and glitch == [])
+    print("PASS" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+Windowed partial refresh on the 13.3" (epd13in3k) and 7.5" (epd7in5_V2)
+panels: the old display_Partial() vs the one that sends only the window's
+bytes in a single send_data2().
+
+Runs on bench_spi's fake epdconfig. For a clock-digit sized window and the
+whole panel it prints the Python time per call, the SPI bytes, the spidev
+calls and GPIO writes, and the bus latency those imply at epdconfig's 4 MHz.
+The old epd13in3k code is kept here and must put the same (DC, byte) stream
+on the bus for every window; the old epd7in5_V2 code only agrees for the
+whole panel (it read Image as the window and padded to a full frame), so
+there the window bytes are checked against the inverted crop instead. Also
+runs epd4in2's partial refresh, which used to fail on a float index, and
+checks that one straight after display() or Clear() sends that frame as
+its old data.
+
+    python bench_partial.py [repeats]
+"""
+import sys
+
+import bench_spi
+from bench_spi import spi, best_of, run
+
+from waveshare_epd import epd13in3k, epd7in5_V2, epd4in2, epdbuffer, framediff
+
+SPI_HZ = 4000000        # epdconfig's max_speed_hz
+SPIDEV_US = 15          # one writebytes2()/xfer ioctl, Pi Zero 2 W
+GPIO_US = 2             # one RPi.GPIO output()
+CHUNK = 4096            # spidev's default bufsiz, one ioctl each
+
+
+# ----- reference implementations (the old display_Partial()) -----
+def ref_13in3k_partial(epd, Image, Xstart, Ystart, Xend, Yend):
+    if((Xstart % 8 + Xend % 8 == 8 & Xstart % 8 > Xend % 8) | Xstart % 8 + Xend % 8 == 0 | (Xend - Xstart)%8 == 0):
+        Xstart = Xstart // 8
+        Xend = Xend // 8
+    else:
+        Xstart = Xstart // 8
+        if Xend % 8 == 0:
+            Xend = Xend // 8
+        else:
+            Xend = Xend // 8 + 1
+
+    if(epd.width % 8 == 0):
+        Width = epd.width // 8
+    else:
+        Width = epd.width // 8 +1
+    Height = epd.height
+
+    Xend -= 1
+    Yend -= 1
+
+    epd.send_command(0x44)
+    epd.send_data((Xstart*8) & 0xff)
+    epd.send_data((Xstart>>5) & 0x01)
+    epd.send_data((Xend*8) & 0xff)
+    epd.send_data((Xend>>5) & 0x01)
+    epd.send_command(0x45)
+    epd.send_data(Ystart & 0xff)
+    epd.send_data((Ystart>>8) & 0x01)
+    epd.send_data(Yend & 0xff)
+    epd.send_data((Yend>>8) & 0x01)
+
+    epd.send_command(0x4E)
+    epd.send_data((Xstart*8) & 0xff)
+    epd.send_data((Xstart>>5) & 0x01)
+    epd.send_command(0x4F)
+    epd.send_data(Ystart & 0xff)
+    epd.send_data((Ystart>>8) & 0x01)
+
+    epd.send_command(0x24)
+    for j in range(Height):
+        for i in range(Width):
+            if((j > Ystart-1) & (j < (Yend + 1)) & (i > Xstart-1) & (i < (Xend + 1))):
+                epd.send_data(Image[i + j * Width])
+    epd.TurnOnDisplay_Part()
+
+
+def ref_7in5_partial(epd, Image, Xstart, Ystart, Xend, Yend):
+    if((Xstart % 8 + Xend % 8 == 8 & Xstart % 8 > Xend % 8) | Xstart % 8 + Xend % 8 == 0 | (Xend - Xstart)%8 == 0):
+        Xstart = Xstart // 8 * 8
+        Xend = Xend // 8 * 8
+    else:
+        Xstart = Xstart // 8 * 8
+        if Xend % 8 == 0:
+            Xend = Xend // 8 * 8
+        else:
+            Xend = Xend // 8 * 8 + 1
+
+    Width = (Xend - Xstart) // 8
+    Height = Yend - Ystart
+
+    epd.send_command(0x50)
+    epd.send_data(0xA9)
+    epd.send_data(0x07)
+
+    epd.send_command(0x91)
+    epd.send_command(0x90)
+    epd.send_data (Xstart//256)
+    epd.send_data (Xstart%256)
+    epd.send_data ((Xend-1)//256)
+    epd.send_data ((Xend-1)%256)
+    epd.send_data (Ystart//256)
+    epd.send_data (Ystart%256)
+    epd.send_data ((Yend-1)//256)
+    epd.send_data ((Yend-1)%256)
+    epd.send_data (0x01)
+
+    image1 = epd.frame.invert(Image, Width * Height, int(epd.width * epd.height / 8))
+
+    epd.send_command(0x13)
+    epd.send_data2(image1)
+
+    epd.send_command(0x12)
+    bench_spi.fake.delay_ms(100)
+    epd.ReadBusy()
+
+
+def frame(epd, seed):
+    """A full packed frame with every byte different from its neighbours."""
+    n = framediff.line_bytes(epd.width) * epd.height
+    return bytearray((i * 7 + seed) & 0xFF for i in range(n))
+
+
+def command_data(stream, command):
+    """Data bytes sent after the first `command` on the bus."""
+    start = stream.index((0, command)) + 1
+    out = []
+    for dc, b in stream[start:]:
+        if not dc:
+            break
+        out.append(b)
+    return bytes(out)
+
+
+def bus_ms(nbytes, spi_calls, gpio_writes):
+    """Latency of one refresh's transfers on the Pi, from the recorded counts."""
+    return (nbytes * 8 / SPI_HZ + spi_calls * SPIDEV_US * 1e-6 + gpio_writes * GPIO_US * 1e-6) * 1000
+
+
+def counts(fn):
+    stream, gpio, calls = run(fn)
+    # a big send_data2() is one ioctl per spidev buffer
+    ioctls = calls + sum(max(0, -(-len(chunk) // CHUNK) - 1) for chunk in data_runs(stream))
+    return stream, gpio, ioctls
+
+
+def data_runs(stream):
+    runs, cur = [], []
+    for dc, b in stream:
+        if dc:
+            cur.append(b)
+        elif cur:
+            runs.append(cur)
+            cur = []
+    if cur:
+        runs.append(cur)
+    return runs
+
+
+def timed(fn, repeats):
+    spi.record = False
+    try:
+        return best_of(fn, repeats) / 1000
+    finally:
+        spi.record = True
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    ok = True
+    big = epd13in3k.EPD()
+    mid = epd7in5_V2.EPD()
+    image13 = frame(big, 1)
+    image75 = frame(mid, 2)
+
+    # a clock's digits, a window off byte boundaries, and the whole panel
+    windows13 = [("digits", (320, 240, 640, 400)), ("odd", (3, 5, 77, 66)),
+                 ("full", (0, 0, big.width, big.height))]
+    windows75 = [("digits", (240, 160, 560, 320)), ("full", (0, 0, mid.width, mid.height))]
+
+    print(f"{'panel window':>22} {'bytes old':>10} {'bytes new':>10} {'spi old':>8} {'spi new':>8}"
+          f" {'py ms old':>10} {'py ms new':>10} {'bus ms old':>11} {'bus ms new':>11}")
+
+    def row(label, old, new, check):
+        nonlocal ok
+        old_stream, old_gpio, old_spi = counts(old)
+        new_stream, new_gpio, new_spi = counts(new)
+        good = check(old_stream, new_stream)
+        ok &= good and new_spi <= old_spi
+        old_ms, new_ms = timed(old, repeats), timed(new, repeats)
+        old_bus = bus_ms(len(old_stream), old_spi, old_gpio)
+        new_bus = bus_ms(len(new_stream), new_spi, new_gpio)
+        ok &= new_bus <= old_bus
+        print(f"{label:>22} {len(old_stream):10} {len(new_stream):10} {old_spi:8} {new_spi:8}"
+              f" {old_ms:10.2f} {new_ms:10.2f} {old_bus:11.2f} {new_bus:11.2f}"
+              f"  {'ok' if good else 'MISMATCH'}")
+        return old_bus, new_bus
+
+    for name, (xs, ys, xe, ye) in windows13:
+        row(f"13in3k {name} {xe - xs}x{ye - ys}",
+            lambda: ref_13in3k_partial(big, image13, xs, ys, xe, ye),
+            lambda: big.display_Partial(image13, xs, ys, xe, ye),
+            lambda a, b: a == b)
+
+    linewidth = framediff.line_bytes(mid.width)
+    for name, (xs, ys, xe, ye) in windows75:
+        window = framediff.pixel_window(xs, ys, xe, ye)
+        crop = epdbuffer.invert(framediff.window_bytes(image75, linewidth, window))
+
+        def check(a, b, crop=crop, full=name == "full"):
+            data = bytes(v for dc, v in b if dc)
+            return (a == b) if full else data.endswith(crop) and len(data) == len(crop) + 11
+        old_bus, new_bus = row(f"7in5_V2 {name} {xe - xs}x{ye - ys}",
+                               lambda: ref_7in5_partial(mid, image75, xs, ys, xe, ye),
+                               lambda: mid.display_Partial(image75, xs, ys, xe, ye), check)
+        if name != "full":
+            ok &= new_bus * 4 < old_bus
+
+    small = epd4in2.EPD()
+    image42 = frame(small, 3)
+    try:
+        stream, _, _ = counts(lambda: small.EPD_4IN2_PartialDisplay(13, 20, 117, 60, image42))
+        window = framediff.pixel_window(13, 20, 117, 60)
+        crop = epdbuffer.invert(framediff.window_bytes(image42, framediff.line_bytes(small.width), window))
+        good = bytes(v for dc, v in stream if dc).endswith(crop)
+        good &= framediff.window_bytes(small.DATA, framediff.line_bytes(small.width), window) == crop
+        print(f"\nepd4in2 EPD_4IN2_PartialDisplay 104x40: {len(stream)} bytes, "
+              f"{'ok' if good else 'MISMATCH'}")
+        ok &= good
+    except Exception as e:
+        print(f"\nepd4in2 EPD_4IN2_PartialDisplay: {type(e).__name__}: {e}")
+        ok = False
+
+    # straight after a full display() or Clear(), the partial's old data is that frame
+    window = framediff.pixel_window(13, 20, 117, 60)
+    linewidth = framediff.line_bytes(small.width)
+    blank = epdbuffer.fill(0xFF, len(image42))
+    for label, full, shown in (("display()", lambda epd: epd.display(image42), image42),
+                               ("a partial, Clear()", lambda epd: (
+                                   epd.EPD_4IN2_PartialDisplay(13, 20, 117, 60, image42), epd.Clear()), blank)):
+        epd = epd4in2.EPD()
+        run(lambda: full(epd))
+        stream, _, _ = run(lambda: epd.EPD_4IN2_PartialDisplay(13, 20, 117, 60, frame(epd, 4)))
+        old = epdbuffer.invert(framediff.window_bytes(shown, linewidth, window))
+        good = command_data(stream, 0x10) == old
+        print(f"epd4in2 partial after {label}: old data {'matches' if good else 'does not match'} "
+              f"the full frame  {'ok' if good else 'MISMATCH'}")
+        ok &= good
+
+    print("PASS" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
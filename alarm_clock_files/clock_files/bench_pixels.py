@@ -0,0 +1,117 @@
+"""
+Chromatek NeoPixel pushes: set_chromatek_color() on an auto_write strip
+vs leds.PixelOutput.
+
+Replays a minute of the old 2 ms button_polling() loop. Every pass called
+update_chromatek(), with the arm switch flipped and the brightness turned a
+few times along the way. Then the same changes are replayed as the input
+events main now dispatches. Strips are hal.SimPixels, which count show()
+calls. Prints the show() calls per replay, the data-pin time they take
+(24 bits per pixel at 800 kHz plus the latch), and the time per call.
+
+Checks that both strips end up showing the same light and that
+PixelOutput showed once per visible change: never for a repeat, never for
+a recolor at brightness 0.
+
+    python bench_pixels.py [seconds]
+"""
+import sys
+import time
+
+import hal
+import leds
+
+WS2812_HZ = 800000
+LATCH_US = 80           # WS2812B reset time after each frame
+PIXELS = 1
+
+
+# ----- reference implementation (the old main.set_chromatek_color) -----
+def old_set(strip, r, g, b, brightness=None):
+    if brightness is not None:
+        strip.brightness = max(0.0, min(1.0, brightness))
+    strip[0] = (int(r), int(g), int(b))
+
+
+def chromatek_args(armed, level):
+    """What main.update_chromatek() asks for."""
+    if armed:
+        return (255, 255, 0), max(0.02, level / 100.0)
+    return (0, 0, 0), 0.0
+
+
+def expected_light(call):
+    color, brightness = chromatek_args(*call)
+    return tuple(int(c * brightness) for c in color)
+
+
+def script(seconds, poll):
+    """(armed, brightness) per call: every 2 ms if poll, else once per change."""
+    changes = {0: (False, 50), 10: (True, 50), 20: (True, 55), 21: (True, 60),
+               35: (False, 60), 36: (False, 65), 45: (True, 65), 50: (True, 65)}
+    state, calls = None, []
+    for tick in range(int(seconds * 500)):
+        t = tick * 60 / (seconds * 500)
+        new = changes.get(int(t), state)
+        if poll or new != state:
+            calls.append(new)
+        state = new
+    return calls
+
+
+def bus_ms(shows):
+    return shows * (24 * PIXELS / WS2812_HZ * 1e6 + LATCH_US) / 1000
+
+
+def replay(calls, use_cache):
+    clock = hal.VirtualClock()
+    strip = hal.SimPixels(clock, PIXELS, auto_write=not use_cache)
+    out = leds.PixelOutput(strip) if use_cache else None
+    t0 = time.perf_counter()
+    for armed, level in calls:
+        color, brightness = chromatek_args(armed, level)
+        if use_cache:
+            out.set(0, color, brightness)
+        else:
+            old_set(strip, *color, brightness=brightness)
+    dt = time.perf_counter() - t0
+    return strip, out, dt
+
+
+def light(strip):
+    return [tuple(int(c * strip.brightness) for c in strip[i]) for i in range(len(strip))]
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 60
+    ok = True
+
+    print(f"{'replay':>20} {'calls':>7} {'shows old':>10} {'shows new':>10} {'pin ms old':>11} "
+          f"{'pin ms new':>11} {'us/call old':>12} {'us/call new':>12}")
+    for label, poll in (("2 ms poll loop", True), ("input events", False)):
+        calls = script(seconds, poll)
+        old, _, old_dt = replay(calls, False)
+        new, out, new_dt = replay(calls, True)
+        distinct = 1 + sum(1 for a, b in zip(calls, calls[1:]) if expected_light(a) != expected_light(b))
+        same = light(old) == light(new) and new.auto_write is False
+        ok &= same and out.stats["shows"] == distinct and out.stats["requests"] == len(calls)
+        ok &= out.stats["shows"] < old.shows
+        print(f"{label:>20} {len(calls):7} {old.shows:10} {out.stats['shows']:10} {bus_ms(old.shows):11.1f} "
+              f"{bus_ms(out.stats['shows']):11.1f} {old_dt / len(calls) * 1e6:12.2f} "
+              f"{new_dt / len(calls) * 1e6:12.2f}  {'ok' if same else 'MISMATCH'}")
+
+    # a recolor while dark and a repeat are free; the change shows once brightness is back
+    strip = hal.SimPixels(hal.VirtualClock(), PIXELS, auto_write=False)
+    out = leds.PixelOutput(strip)
+    shown = [out.set(0, (0, 0, 0), 0.0), out.set(0, (255, 0, 0)), out.set(0, (255, 0, 0), 0.0),
+             out.set(0, (255, 0, 0), 0.5), out.set(0, (255, 0, 0), 0.5)]
+    dark_ok = shown == [True, False, False, True, False] and strip.shows == 2 and light(strip) == [(127, 0, 0)]
+    print(f"\ndark recolor / repeat: shown {shown}, {strip.shows} shows  {'ok' if dark_ok else 'BAD'}")
+    ok &= dark_ok
+
+    print("PASS" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Board detection cost in epdconfig: the old subprocess probes vs
+waveshare_epd.epdplatform reading /proc directly.
+
+Old: `cat /proc/cpuinfo | grep Raspberry` through a shell at import, and
+`getconf LONG_BIT` once per library search directory in
+module_init(cleanup=True). New: detect() (uncached and cached) and
+long_bit(). Then checks detection against fake /proc trees, the
+EPD_PLATFORM override, and that importing epdconfig with
+EPD_PLATFORM=mock in a fresh interpreter forks nothing.
+
+    python bench_platform.py [repeats]
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+libdir = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'lib')
+if os.path.exists(libdir):
+    sys.path.append(libdir)
+
+from waveshare_epd import epdplatform
+
+
+# ----- reference implementation (the old epdconfig probes) -----
+def old_detect():
+    process = subprocess.Popen("cat /proc/cpuinfo | grep Raspberry", shell=True, stdout=subprocess.PIPE, text=True)
+    output, _ = process.communicate()
+    return "Raspberry" in output
+
+
+def old_long_bit(dirs=3):
+    for _ in range(dirs):
+        val = int(os.popen('getconf LONG_BIT').read())
+    return val
+
+
+def best_of(fn, repeats):
+    best = None
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return best * 1e6
+
+
+def fake_root(files):
+    root = tempfile.mkdtemp()
+    for path, text in files.items():
+        full = os.path.join(root, path)
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        if text is not None:
+            with open(full, "w") as f:
+                f.write(text)
+    return root
+
+
+IMPORT_MOCK = """
+import os, subprocess, sys, time
+def forbidden(*args, **kwargs):
+    raise AssertionError("forked during import")
+subprocess.Popen = os.popen = forbidden
+sys.path.append({libdir!r})
+t0 = time.perf_counter()
+from waveshare_epd import epdconfig
+print((time.perf_counter() - t0) * 1000, epdconfig.PLATFORM, type(epdconfig.implementation).__name__)
+"""
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    ok = True
+
+    print(f"{'probe':>34} {'us':>10}")
+    rows = [
+        ("old: cat | grep (import)", old_detect),
+        ("old: getconf x3 (module_init)", old_long_bit),
+        ("new: detect(), uncached", lambda: epdplatform.detect(environ={})),
+        ("new: platform(), cached", epdplatform.platform),
+        ("new: long_bit()", epdplatform.long_bit),
+    ]
+    times = {}
+    for label, fn in rows:
+        times[label] = best_of(fn, repeats)
+        print(f"{label:>34} {times[label]:10.1f}")
+    ok &= times["new: detect(), uncached"] < times["old: cat | grep (import)"]
+    ok &= epdplatform.long_bit() == old_long_bit(1)
+
+    cases = [
+        ("Pi device-tree", {"proc/device-tree/model": "Raspberry Pi 4 Model B Rev 1.4\0"}, {}, "raspberrypi"),
+        ("Pi cpuinfo only", {"proc/cpuinfo": "Hardware\t: BCM2835\nModel\t\t: Raspberry Pi Zero 2 W\n"}, {},
+         "raspberrypi"),
+        ("Sunrise X3", {"sys/bus/platform/drivers/gpio-x3/bind": ""}, {}, "sunrisex3"),
+        ("nothing found", {"proc/cpuinfo": "model name\t: Intel\n"}, {}, "jetson"),
+        ("EPD_PLATFORM=mock", {"proc/device-tree/model": "Raspberry Pi 4\0"}, {"EPD_PLATFORM": "mock"}, "mock"),
+        ("EPD_PLATFORM=Jetson", {}, {"EPD_PLATFORM": " Jetson "}, "jetson"),
+    ]
+    print()
+    for label, files, env, expect in cases:
+        root = fake_root(files)
+        got = epdplatform.detect(environ=env, root=root)
+        shutil.rmtree(root)
+        ok &= got == expect
+        print(f"{label:>22}: {got:12} {'ok' if got == expect else 'expected ' + expect}")
+    try:
+        epdplatform.detect(environ={"EPD_PLATFORM": "arduino"})
+        ok = False
+    except ValueError as e:
+        print(f"{'bad override':>22}: ValueError ({e})")
+
+    env = dict(os.environ, EPD_PLATFORM="mock")
+    best = None
+    for _ in range(5):
+        out = subprocess.run([sys.executable, "-c", IMPORT_MOCK.format(libdir=libdir)], env=env,
+                             capture_output=True, text=True)
+        if out.returncode != 0:
+            print(out.stderr)
+            ok = False
+            break
+        ms, platform, backend = out.stdout.split()
+        best = float(ms) if best is None else min(best, float(ms))
+    else:
+        print(f"\nimport epdconfig, EPD_PLATFORM=mock: {best:.1f} ms, {platform} -> {backend}, no fork")
+        ok &= platform == "mock" and backend == "MockBackend"
+
+    print("PASS" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
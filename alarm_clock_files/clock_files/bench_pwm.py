@@ -0,0 +1,248 @@
+"""
+CPU cost of the led_nood backlight per PWM backend (pwm.py), with the
+fade thread's load: a new duty cycle every 30 ms, through the gamma table.
+
+Each backend runs for a few seconds and the process CPU time over that
+wall time is printed. On the Pi, RPi.GPIO's own software PWM is measured at
+the old 15 kHz and at the SOFTWARE_MAX_HZ cap, plus the sysfs and pigpio
+backends if they open. Off the Pi the RPi.GPIO thread is emulated (its
+sleep/toggle loop in Python). sysfs also runs against a fake
+/sys/class/pwm, which costs what the writes cost without the driver.
+
+Also checks the gamma table, the sysfs writes (period, duty_cycle,
+enable; nothing for an unchanged duty cycle), that SoftwarePWM stops its
+thread at 0 and 100 %, that open_pwm() falls back to software and
+defaults to it while a NeoPixel is on BCM 18 (rpi_ws281x drives the same
+PWM block), and that setup_pins(backlight=False) leaves led_nood to the
+backend (an output there would take BCM 19 off hardware PWM).
+
+    python bench_pwm.py [seconds]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import gpio_setup
+import hal
+import pwm
+
+OLD_HZ = 15000
+FADE_PERIOD = 0.03
+
+
+class CountingGPIO:
+    """Enough of RPi.GPIO for SoftwarePWM; PWM() is the emulated thread."""
+
+    HIGH = 1
+    LOW = 0
+    OUT = 0
+
+    def __init__(self):
+        self.outputs = 0
+        self.threads = 0
+        self.setups = []
+
+    def setup(self, pin, direction, initial=None):
+        self.setups.append(pin)
+
+    def output(self, pin, level):
+        self.outputs += 1
+
+    def PWM(self, pin, frequency):
+        self.threads += 1
+        return EmulatedSoftPWM(self, pin, frequency)
+
+
+class EmulatedSoftPWM:
+    """RPi.GPIO's software PWM thread: output, sleep the on time, output, sleep the rest."""
+
+    def __init__(self, gpio, pin, frequency):
+        self.gpio = gpio
+        self.pin = pin
+        self.period = 1.0 / frequency
+        self.duty = 0.0
+        self.running = False
+
+    def _loop(self):
+        while self.running:
+            on = self.period * self.duty / 100
+            if on > 0:
+                self.gpio.output(self.pin, 1)
+                time.sleep(on)
+            if on < self.period:
+                self.gpio.output(self.pin, 0)
+                time.sleep(self.period - on)
+
+    def start(self, duty):
+        self.duty = duty
+        self.running = True
+        threading.Thread(target=self._loop, daemon=True).start()
+
+    def ChangeDutyCycle(self, duty):
+        self.duty = duty
+
+    def ChangeFrequency(self, frequency):
+        self.period = 1.0 / frequency
+
+    def stop(self):
+        self.running = False
+
+
+def fake_sysfs(channels=(1,)):
+    root = tempfile.mkdtemp()
+    chip = os.path.join(root, "pwmchip0")
+    os.makedirs(chip)
+    open(os.path.join(chip, "export"), "w").close()
+    for ch in channels:
+        os.makedirs(os.path.join(chip, f"pwm{ch}"))
+        for name in ("period", "duty_cycle", "enable"):
+            open(os.path.join(chip, f"pwm{ch}", name), "w").close()
+    return root
+
+
+def read(root, name):
+    with open(os.path.join(root, "pwmchip0", "pwm1", name)) as f:
+        return f.read()
+
+
+def fade_load(out, seconds):
+    """The fade thread's pattern for `seconds`; returns CPU seconds used per wall second."""
+    v, direction = 0.1, 1
+    out.start(0)
+    cpu0, t0 = time.process_time(), time.perf_counter()
+    while time.perf_counter() - t0 < seconds:
+        out.ChangeDutyCycle(pwm.duty(v * 100))
+        v += direction * 0.04
+        if v >= 1.0:
+            v, direction = 1.0, -1
+        if v <= 0.05:
+            v, direction = 0.05, 1
+        time.sleep(FADE_PERIOD)
+    cpu = (time.process_time() - cpu0) / (time.perf_counter() - t0)
+    out.stop()
+    time.sleep(0.05)            # let a PWM thread notice
+    return cpu
+
+
+def backends(root):
+    """(label, factory) for every backend this machine can run."""
+    try:
+        import RPi.GPIO as GPIO
+        GPIO.setwarnings(False)
+        GPIO.setmode(GPIO.BCM)
+        GPIO.setup(gpio_setup.led_nood, GPIO.OUT, initial=GPIO.LOW)
+        gpio, where = GPIO, "RPi.GPIO"
+    except ImportError:
+        gpio, where = CountingGPIO(), "emulated"
+
+    rows = [(f"GPIO.PWM {OLD_HZ} Hz ({where})", lambda: gpio.PWM(gpio_setup.led_nood, OLD_HZ)),
+            (f"software {pwm.SOFTWARE_MAX_HZ} Hz ({where})",
+             lambda: pwm.SoftwarePWM(gpio, gpio_setup.led_nood, OLD_HZ))]
+    if os.path.isdir(os.path.join(pwm.SYSFS_ROOT, "pwmchip0")):
+        rows.append(("sysfs (/sys/class/pwm)", lambda: pwm.SysfsPWM(gpio_setup.led_nood, OLD_HZ)))
+    rows.append(("sysfs (fake tree)", lambda: pwm.SysfsPWM(gpio_setup.led_nood, OLD_HZ, root=root)))
+    rows.append(("pigpio", lambda: pwm.PigpioPWM(gpio_setup.led_nood, OLD_HZ)))
+    return rows
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    ok = True
+
+    # gamma table
+    table_ok = (pwm.DUTY[0] == 0 and pwm.DUTY[100] == 100 and len(pwm.DUTY) == 101
+                and all(a < b for a, b in zip(pwm.DUTY[1:], pwm.DUTY[2:]))
+                and pwm.duty(-5) == 0 and pwm.duty(250) == 100)
+    print(f"gamma {pwm.GAMMA}: level 10 -> {pwm.duty(10)} %, 50 -> {pwm.duty(50)} %, "
+          f"90 -> {pwm.duty(90)} %  {'ok' if table_ok else 'BAD'}")
+    ok &= table_ok
+
+    # sysfs writes
+    root = fake_sysfs()
+    writes = []
+    real_write = pwm.SysfsPWM._write
+    pwm.SysfsPWM._write = staticmethod(lambda path, value: (writes.append(os.path.basename(path)),
+                                                            real_write(path, value)))
+    try:
+        out = pwm.SysfsPWM(gpio_setup.led_nood, OLD_HZ, root=root)
+        out.start(50)
+        start = (read(root, "period"), read(root, "duty_cycle"), read(root, "enable"))
+        n = len(writes)
+        out.ChangeDutyCycle(50)
+        same = len(writes) == n
+        out.ChangeFrequency(1000)
+        retimed = (read(root, "period"), read(root, "duty_cycle"))
+        out.stop()
+    finally:
+        pwm.SysfsPWM._write = staticmethod(real_write)
+    sysfs_ok = start == ("66666", "33333", "1") and same and retimed == ("1000000", "500000")
+    sysfs_ok &= read(root, "enable") == "0"
+    print(f"sysfs: period/duty/enable {'/'.join(start)}, unchanged duty {'skipped' if same else 'WRITTEN'}, "
+          f"1 kHz -> {'/'.join(retimed)}, {len(writes)} writes  {'ok' if sysfs_ok else 'BAD'}")
+    ok &= sysfs_ok
+
+    # software fallback
+    gpio = CountingGPIO()
+    out = pwm.SoftwarePWM(gpio, gpio_setup.led_nood, OLD_HZ)
+    out.start(0)
+    out.ChangeDutyCycle(40)
+    thread = out.pwm
+    out.ChangeDutyCycle(100)
+    soft_ok = out.frequency == pwm.SOFTWARE_MAX_HZ and thread is not None and out.pwm is None
+    soft_ok &= not thread.running and gpio.threads == 1
+    out.stop()
+    missing = tempfile.mkdtemp()
+    fallback = pwm.open_pwm(gpio_setup.led_nood, OLD_HZ, gpio, root=missing)
+    soft_ok &= fallback.name == "software"
+    try:
+        pwm.open_pwm(gpio_setup.led_nood, OLD_HZ, gpio, backend="sysfs", root=missing)
+        soft_ok = False
+    except OSError:
+        pass
+    # a NeoPixel on BCM 18 owns the PWM block: software even where sysfs would open
+    shared = pwm.open_pwm(gpio_setup.led_nood, OLD_HZ, gpio, root=root, pixel_pins=(gpio_setup.neopixel,))
+    alone = pwm.open_pwm(gpio_setup.led_nood, OLD_HZ, gpio, root=root, pixel_pins=(10,))
+    soft_ok &= shared.name == "software" and alone.name == "sysfs"
+    print(f"open_pwm() with a pixel on BCM {gpio_setup.neopixel} -> {shared.name}, "
+          f"on SPI BCM 10 -> {alone.name}")
+    print(f"software: capped at {out.frequency} Hz, thread stopped at 100 %, "
+          f"open_pwm() without sysfs/pigpio -> {fallback.name}  {'ok' if soft_ok else 'BAD'}")
+    ok &= soft_ok
+    shutil.rmtree(missing)
+
+    # pin setup: led_nood is set up by SoftwarePWM only, never by setup_pins
+    sim = hal.SimHardware().gpio
+    gpio_setup.setup_pins(sim, backlight=False)
+    untouched = gpio_setup.led_nood not in sim.directions
+    pwm.SoftwarePWM(sim, gpio_setup.led_nood, OLD_HZ)
+    pins_ok = untouched and sim.directions.get(gpio_setup.led_nood) == sim.OUT
+    print(f"setup_pins(backlight=False): led_nood {'untouched' if untouched else 'set up'}, "
+          f"output once SoftwarePWM opens it  {'ok' if pins_ok else 'BAD'}")
+    ok &= pins_ok
+
+    # CPU
+    print(f"\n{'backend':>38} {'CPU %':>7}")
+    cpu = {}
+    for label, make in backends(root):
+        try:
+            out = make()
+        except OSError as e:
+            print(f"{label:>38} {'-':>7}  ({e})")
+            continue
+        cpu[label] = fade_load(out, seconds) * 100
+        print(f"{label:>38} {cpu[label]:7.2f}")
+    shutil.rmtree(root)
+
+    old = next(v for k, v in cpu.items() if k.startswith("GPIO.PWM"))
+    hardware = [v for k, v in cpu.items() if k.startswith(("sysfs", "pigpio"))]
+    ok &= bool(hardware) and max(hardware) < old
+
+    print("PASS" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Headless render benchmark: builds each e-paper screen N times to a PIL
+image, with warm caches and with every cache cleared before each render
+(what f_update used to do), and prints the per-stage timing breakdown.
+
+Checks pixel for pixel that each screen is the same rendered warm, cold
+and by the old f_update drawing code (kept here), and that a warm render
+after one with other data is unchanged, so nothing leaks into the cached
+static layers.
+
+    python bench_render.py [N] [path/to/font.ttf]
+"""
+import os
+import sys
+import time
+
+from PIL import Image, ImageChops, ImageDraw, ImageFont
+
+import render
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+FALLBACK_FONTS = [
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/TTF/DejaVuSans.ttf",
+]
+
+FORECAST = [
+    {'min_date': d, 'id': wid, 'description': desc, 'avg_temp': t,
+     'max_temp': t + 6, 'min_temp': t - 6, 'precipitation': p}
+    for d, wid, desc, t, p in (
+        ('Mon', 800, 'clear sky', 61, 0),
+        ('Tue', 501, 'moderate rain', 55, 80),
+        ('Wed', 803, 'broken clouds', 58, 20),
+        ('Thu', 601, 'snow', 31, 60),
+    )
+]
+
+SCREENS = {
+    "calibrate": lambda: render.render_calibrate_screen(),
+    "set_alarm": lambda: render.render_set_alarm_screen("07:05"),
+    "main": lambda: render.render_main_screen(FORECAST, "Monday, Mar 02", "07:00", "07:05", "Home"),
+}
+
+
+# ----- reference implementations (the old f_update drawing code) -----
+def ref_calibrate():
+    w, h = render.SCREEN_W, render.SCREEN_H
+    font24 = ImageFont.truetype(render.FONT_FILE, 24)
+    font14 = ImageFont.truetype(render.FONT_FILE, 14)
+    base_image = Image.new('1', (w, h), 255)
+    draw = ImageDraw.Draw(base_image)
+    draw.text((10, 5), "CALIBRATE MODE", font=font24, fill=0)
+    draw.line([(0, 35), (w, 35)], fill=0, width=1)
+    draw.text((10, 45), "- Turn encoder to move hands", font=font14, fill=0)
+    draw.text((10, 65), "- Hold RE button to exit", font=font14, fill=0)
+    return base_image
+
+
+def ref_set_alarm(time_str):
+    w, h = render.SCREEN_W, render.SCREEN_H
+    font24 = ImageFont.truetype(render.FONT_FILE, 24)
+    font14 = ImageFont.truetype(render.FONT_FILE, 14)
+    base_image = Image.new('1', (w, h), 255)
+    draw = ImageDraw.Draw(base_image)
+    draw.text((10, 5), "SET ALARM MODE", font=font24, fill=0)
+    draw.line([(0, 35), (w, 35)], fill=0, width=1)
+    draw.text((10, 40), "- Turn encoder to set time", font=font14, fill=0)
+    draw.text((10, 80), "- Hold RE to save & exit", font=font14, fill=0)
+    draw.text((10, 60), "- Press RE to see exact time", font=font14, fill=0)
+    draw.text((10, 100), f"Alarm Time: {time_str}", font=font14, fill=0)
+    return base_image
+
+
+def ref_main(forecast, current_date, current_time, alarm_str, city):
+    w, h = render.SCREEN_W, render.SCREEN_H
+    font20 = ImageFont.truetype(render.FONT_FILE, 20)
+    font12 = ImageFont.truetype(render.FONT_FILE, 12)
+    font15 = ImageFont.truetype(render.FONT_FILE, 14)
+    font10 = ImageFont.truetype(render.FONT_FILE, 10)
+
+    base_image = Image.new('1', (w, h), 255)
+    basedraw = ImageDraw.Draw(base_image)
+
+    basedraw.line([(0, 25), (250, 25)], fill=0, width=1)
+    basedraw.text((2, 0), current_date, font=font20, fill=0)
+    basedraw.rectangle([(0, 28), (39, 42)], fill=0, outline=0, width=1)
+    basedraw.text((2, 27), city, font=font12, fill=255)
+    basedraw.text((43, 27), str(forecast[0]['description']), font=font12, fill=0)
+    basedraw.rectangle([(52, 45), (81, 58)], fill=0, outline=0, width=1)
+    basedraw.text((53, 43), f"{forecast[0]['max_temp']} F", font=font15, fill=255)
+    basedraw.text((52, 59), f"{forecast[0]['min_temp']} F", font=font15, fill=0)
+    basedraw.text((64, 76), f"{forecast[0]['precipitation']}%", font=font15, fill=0)
+    basedraw.rectangle([(190, 0), (250, 25)], fill=0, outline=0, width=1)
+    basedraw.text((192, 24), 'last updated', font=font10, fill=0)
+    basedraw.text((195, 2), current_time, font=font20, fill=255)
+
+    icons = []
+    icons_small = []
+    for day in forecast[:4]:
+        icon_image = Image.open(render.get_icon_path(day['id'])).convert('1')
+        icons.append(icon_image)
+        icons_small.append(icon_image.resize((23, 23)))
+
+    base_image.paste(icons[0], (0, 45))
+    droplet = Image.open(render.DROPLET_ICON).convert('1')
+    base_image.paste(droplet.resize((13, 13)), (50, 78))
+    basedraw.rectangle([(0, 45), (50, 95)], fill=None, outline=0, width=1)
+
+    for day, x, icon_x in ((1, 0, 58), (2, 85, 143), (3, 168, 230)):
+        basedraw.text((x, 103), f"{forecast[day]['min_date']}|{forecast[day]['avg_temp']} F",
+                      font=font15, fill=0)
+        base_image.paste(icons_small[day], (icon_x, 99))
+
+    basedraw.line([(0, 98), (250, 98)], fill=0, width=1)
+    basedraw.line([(83, 98), (83, 122)], fill=0, width=1)
+    basedraw.line([(166, 98), (166, 122)], fill=0, width=1)
+    basedraw.text((120, 55), f"Alarm Time: {alarm_str}", font=font15, fill=0)
+    return base_image
+
+
+REFERENCES = {
+    "calibrate": ref_calibrate,
+    "set_alarm": lambda: ref_set_alarm("07:05"),
+    "main": lambda: ref_main(FORECAST, "Monday, Mar 02", "07:00", "07:05", "Home"),
+}
+
+# the same screens with other data, rendered in between to dirty any shared state
+OTHERS = {
+    "calibrate": lambda: render.render_calibrate_screen(),
+    "set_alarm": lambda: render.render_set_alarm_screen("23:59"),
+    "main": lambda: render.render_main_screen(FORECAST[::-1], "Sunday, Dec 31", "23:59", "12:00", "Away"),
+}
+
+
+def differing(a, b):
+    """Pixels that differ between two images of the same size."""
+    return sum(ImageChops.difference(a.convert('L'), b.convert('L')).histogram()[1:])
+
+
+def check_pixels(name):
+    reference = REFERENCES[name]()
+    render.clear_caches()
+    cold = SCREENS[name]()
+    warm = SCREENS[name]()
+    OTHERS[name]()
+    again = SCREENS[name]()
+    counts = {label: differing(reference, image)
+              for label, image in (("cold", cold), ("warm", warm), ("warm again", again))}
+    good = not any(counts.values()) and cold.size == reference.size
+    print(f"{name:>10} pixels differing from the old code: "
+          + ", ".join(f"{k} {v}" for k, v in counts.items()) + f"  {'ok' if good else 'MISMATCH'}")
+    return good
+
+
+def bench(fn, n, cold):
+    t0 = time.perf_counter()
+    for _ in range(n):
+        if cold:
+            render.clear_caches()
+        fn()
+    return (time.perf_counter() - t0) / n
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    render.ICON_DIR = os.path.join(REPO_DIR, "weather_icons")
+    render.DROPLET_ICON = os.path.join(REPO_DIR, "droplet.bmp")
+    if len(sys.argv) > 2:
+        render.FONT_FILE = sys.argv[2]
+    elif not os.path.exists(render.FONT_FILE):
+        render.FONT_FILE = next(f for f in FALLBACK_FONTS if os.path.exists(f))
+
+    print(f"{n} renders per screen, font {render.FONT_FILE}")
+    print(f"{'screen':>10} {'uncached ms':>12} {'cached ms':>10} {'speedup':>8}")
+    for name, fn in SCREENS.items():
+        cold = bench(fn, max(1, n // 10), cold=True)
+        render.clear_caches()
+        warm = bench(fn, n, cold=False)
+        print(f"{name:>10} {cold * 1e3:>12.3f} {warm * 1e3:>10.3f} {cold / warm:>7.1f}x")
+        stages = render.last_timings[name]
+        print(" " * 11 + ", ".join(f"{k} {v * 1e3:.3f}" for k, v in stages.items()))
+
+    print()
+    ok = True
+    for name in SCREENS:
+        ok &= check_pixels(name)
+    print("PASS" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Refreshes caused by a burst of e-paper requests: the RenderScheduler's
+latest-wins slot vs one thread per request (what main.py did, where every
+thread queued on f_update.lock and refreshed in turn; that row is
+computed, not run, as it takes BURST x REFRESH_S).
+
+20 requests are fired over one second at screens that take REFRESH_S to
+"refresh" (a sleep standing in for the panel). The scheduler must do at
+most two refreshes and end on the last screen asked for; then the
+priority rules are checked with a render that is held until released.
+
+This is the scheduler's test. The repository has no test runner, so like
+the other bench_*.py scripts it prints PASS or FAIL and exits non-zero
+on a failure.
+
+    python bench_scheduler.py
+"""
+import sys
+import threading
+import time
+
+from scheduler import RenderScheduler, PRIORITY_BACKGROUND
+
+REFRESH_S = 1.2
+BURST = 20
+
+
+class Screens:
+    """Screen functions that record what was shown and take REFRESH_S each."""
+
+    def __init__(self, seconds=REFRESH_S, gate=None):
+        self.seconds = seconds
+        self.gate = gate
+        self.shown = []
+
+    def make(self, name):
+        def show():
+            if self.gate is not None:
+                self.gate.wait()
+            time.sleep(self.seconds)
+            self.shown.append(name)
+        return show
+
+    def table(self):
+        return {name: self.make(name) for name in ("main", "calibrate", "set_alarm")}
+
+
+def burst(request):
+    names = ["main", "set_alarm"]
+    for i in range(BURST):
+        request(names[i % 2])
+        time.sleep(1.0 / BURST)
+    return names[(BURST - 1) % 2]
+
+
+def main():
+    ok = True
+
+    # ----- 20 requests in one second -----
+    new = Screens()
+    scheduler = RenderScheduler(new.table()).start()
+    t0 = time.perf_counter()
+    last = burst(scheduler.request)
+    scheduler.wait_idle()
+    new_s = time.perf_counter() - t0
+
+    print(f"{BURST} requests in 1 s, {REFRESH_S} s per refresh")
+    print(f"{'':>18} {'refreshes':>10} {'settled s':>10} {'last shown':>11}")
+    print(f"{'thread/request':>18} {BURST:10} {BURST * REFRESH_S:10.1f} {last:>11}")
+    print(f"{'RenderScheduler':>18} {len(new.shown):10} {new_s:10.1f} {new.shown[-1]:>11}")
+    print(f"stats {scheduler.stats}")
+    ok &= len(new.shown) <= 2 and new.shown[-1] == last
+    ok &= scheduler.stats["requested"] == BURST and scheduler.stats["rendered"] == len(new.shown)
+
+    # ----- priorities, with the worker held busy on a first screen -----
+    gate = threading.Event()
+    held = Screens(seconds=0, gate=gate)
+    scheduler = RenderScheduler(held.table()).start()
+    scheduler.request("main")
+    while scheduler.pending is not None:
+        time.sleep(0.001)
+    scheduler.request("main", PRIORITY_BACKGROUND)
+    fut = scheduler.request("calibrate")                   # preempts the weather refresh
+    ok &= scheduler.pending == "calibrate"
+    scheduler.request("main", PRIORITY_BACKGROUND)         # may not replace a mode change
+    ok &= scheduler.pending == "calibrate"
+    scheduler.request("set_alarm")                         # a newer mode change wins
+    ok &= scheduler.pending == "set_alarm"
+    gate.set()
+    ok &= fut.result(timeout=5) == "set_alarm"
+    scheduler.wait_idle()
+    print(f"priorities: shown {held.shown}")
+    ok &= held.shown == ["main", "set_alarm"]
+
+    print("PASS" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
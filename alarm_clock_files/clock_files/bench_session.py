@@ -0,0 +1,155 @@
+"""
+Wake->displayed latency of a mode-change screen: display session vs a
+fresh EPD() + init() per screen (what f_update did before DisplayManager).
+
+Runs epd2in13_V4 on bench_spi's fake epdconfig. delay_ms() is counted
+instead of slept, so the latency printed is the driver's fixed delays
+plus the host time spent building and sending the frame; BUSY waits are
+panel time and are counted, not timed. Then checks the session on the
+bus: SWRESET only on the first show(), a deep sleep after every update,
+a re-init after an error, and no interleaving between threads.
+
+    python bench_session.py [repeats]
+"""
+import sys
+import threading
+import time
+
+from bench_spi import spi, fake, best_of
+from waveshare_epd import epd2in13_V4
+from PIL import Image, ImageDraw
+
+from display import DisplayManager
+
+SWRESET = 0x12
+DEEP_SLEEP = 0x10
+
+
+class Panel:
+    """Counts what the fake bus does not: delay_ms() time and BUSY waits."""
+
+    def __init__(self):
+        self.delay = 0.0
+        self.busy = 0
+        fake.delay_ms = self.delay_ms
+        fake.wait_busy = self.wait_busy
+
+    def reset(self):
+        self.delay = 0.0
+        self.busy = 0
+        spi.reset()
+
+    def delay_ms(self, delaytime):
+        self.delay += delaytime
+
+    def wait_busy(self, pin, busy_level, name="epd", timeout=None, poll_ms=10, poll=None):
+        self.busy += 1
+        return 0.0
+
+
+def screen(text):
+    image = Image.new('1', (250, 122), 255)
+    ImageDraw.Draw(image).text((10, 40), text, fill=0)
+    return image
+
+
+def commands():
+    return [b for dc, b in spi.stream if dc == 0]
+
+
+def old_mode_change(image):
+    """A new panel per screen: module_init, reset, SWRESET, full refresh."""
+    epd = epd2in13_V4.EPD()
+    epd.init()
+    epd.displayPartBaseImage(epd.getbuffer(image))
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    ok = True
+    panel = Panel()
+    calibrate, set_alarm = screen("CALIBRATE"), screen("SET ALARM 07:10")
+
+    # ----- first show() initialises, later ones wake from deep sleep -----
+    spi.record = True
+    session = DisplayManager(epd2in13_V4.EPD())
+    panel.reset()
+    session.show(calibrate)
+    first = commands()
+    panel.reset()
+    kind = session.show(set_alarm)
+    wake = commands()
+    ok &= first.count(SWRESET) == 1 and first[-1] == DEEP_SLEEP
+    ok &= kind == "partial" and SWRESET not in wake and wake[-1] == DEEP_SLEEP
+    ok &= session.state == DisplayManager.ASLEEP and session.stats["wakes"] == 1
+    print(f"first show: {len(first)} commands, SWRESET {first.count(SWRESET)}x, ends in deep sleep")
+    print(f"next show : {len(wake)} commands, SWRESET {wake.count(SWRESET)}x, {kind}, ends in deep sleep")
+
+    # ----- wake->displayed latency of one mode change -----
+    spi.record = False
+    screens = [calibrate, set_alarm]
+    flip = [1]     # set_alarm is on the panel
+
+    def session_mode_change():
+        flip[0] ^= 1
+        session.show(screens[flip[0]])
+
+    print(f"\n{'mode change':>22} {'delays ms':>10} {'busy waits':>11} {'spi calls':>10} {'host ms':>8} {'latency ms':>11}")
+    rows = {}
+    for label, fn in (("new EPD + init()", lambda: old_mode_change(screens[flip[0]])),
+                      ("session wake", session_mode_change)):
+        panel.reset()
+        fn()
+        delay, busy, calls = panel.delay, panel.busy, spi.spi_calls
+        host = best_of(fn, repeats) / 1000
+        rows[label] = (delay + host, busy)
+        print(f"{label:>22} {delay:10.0f} {busy:11} {calls:10} {host:8.2f} {delay + host:11.1f}")
+    # a wake skips module_init, the 40 ms reset wait, SWRESET and its BUSY waits
+    ok &= rows["session wake"][0] < rows["new EPD + init()"][0]
+    ok &= rows["session wake"][1] < rows["new EPD + init()"][1]
+
+    # ----- an error leaves the panel unknown: next show() re-inits -----
+    def hung(buf, windows):
+        raise RuntimeError("BUSY timeout")
+
+    session.epd.displayPartialWindows = hung
+    try:
+        session.show(screen("HUNG"))
+        ok = False
+    except RuntimeError:
+        pass
+    del session.epd.displayPartialWindows
+    spi.record = True
+    panel.reset()
+    kind = session.show(calibrate)
+    print(f"\nafter an error: {kind} refresh, SWRESET {commands().count(SWRESET)}x")
+    ok &= kind == "full" and commands().count(SWRESET) == 1
+
+    # ----- two threads: updates never interleave on the bus -----
+    active, overlap = [0], [0]
+    send_seq = session.epd.send_seq
+
+    def guarded(seq):
+        active[0] += 1
+        overlap[0] = max(overlap[0], active[0])
+        time.sleep(0.001)
+        send_seq(seq)
+        active[0] -= 1
+
+    session.epd.send_seq = guarded
+    spi.record = False
+    threads = [threading.Thread(target=lambda i=i: [session.show(screen("T%d %d" % (i, n))) for n in range(20)])
+               for i in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    print(f"two threads, 40 updates: max {overlap[0]} in flight, state {session.state}")
+    ok &= overlap[0] == 1 and session.state == DisplayManager.ASLEEP
+
+    print("PASS" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
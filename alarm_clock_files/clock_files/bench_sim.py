@@ -0,0 +1,184 @@
+"""
+The whole clock, headless, on hal.SimHardware at accelerated time.
+
+main.start() brings up every thread against SimGPIO, SimPixels and the
+SSD1680 model behind epdconfig, on a VirtualClock starting 06:00. The
+script then drives a morning: calibrate, set the alarm ten minutes ahead, arm it,
+let it ring, stop it. Buttons and the encoder are edges on the
+FakeBackend, decoded by main's InputDispatcher on the same clock.
+
+Checks that every e-paper refresh was rendered to PNG, that the calibrate
+frame is the rendered screen pixel for pixel, that nothing was sent to the
+panel while it slept, that the hands and the buzzer did what the morning
+asked, and that two runs in fresh interpreters give the same frames,
+stepper steps and config. Prints the speedup of virtual over real time.
+
+    python bench_sim.py
+"""
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+libdir = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'lib')
+if os.path.exists(libdir):
+    sys.path.append(libdir)
+
+import hal
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+FALLBACK_FONTS = [
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/TTF/DejaVuSans.ttf",
+]
+
+DAILY = [
+    {'dt': 1736121600 + i * 86400, 'weather': [{'main': main, 'id': wid, 'description': desc}],
+     'temp': {'min': t - 6, 'max': t + 6}, 'pop': pop}
+    for i, (main, wid, desc, t, pop) in enumerate((
+        ('Clear', 800, 'clear sky', 61, 0.0),
+        ('Rain', 501, 'moderate rain', 55, 0.8),
+        ('Clouds', 803, 'broken clouds', 58, 0.2),
+        ('Snow', 601, 'snow', 31, 0.6),
+    ))
+]
+
+
+def digest(data):
+    return hashlib.sha1(data).hexdigest()[:12]
+
+
+def morning(workdir):
+    """One simulated morning in this process; returns its summary."""
+    hw = hal.use(hal.SimHardware(frames_dir=workdir))
+    clock = hw.clock
+
+    import config_manager
+    import render
+    import weather
+    config_manager.store.path = os.path.join(workdir, "config.json")
+    weather.service.cache_file = None
+    weather.service._entries = {weather.service.key: {"fetched_at": time.time(), "data": {"daily": DAILY}}}
+    render.ICON_DIR = os.path.join(REPO_DIR, "weather_icons")
+    render.DROPLET_ICON = os.path.join(REPO_DIR, "droplet.bmp")
+    if not os.path.exists(render.FONT_FILE):
+        render.FONT_FILE = next(f for f in FALLBACK_FONTS if os.path.exists(f))
+
+    import gpio_setup
+    import main
+
+    def press(pin, held, then=5):
+        hw.inputs.press(pin, held)
+        clock.run_for(then)
+
+    def turn(direction, then=5):
+        hw.inputs.turn(gpio_setup.clk, gpio_setup.dt, direction)
+        clock.run_for(then)
+
+    t0 = time.perf_counter()
+    main.start()
+    clock.run_for(60)                           # hands 00:00 -> 06:00, first main screen
+    press(gpio_setup.sw, 2.5)                   # calibrate
+    calibrate_frame = len(hw.epd_bus.frames)
+    turn(1)
+    press(gpio_setup.sw, 2.5)                   # zero here, back to idle
+    press(gpio_setup.snz, 2.5)                  # set alarm
+    turn(1, then=1)
+    turn(1)
+    press(gpio_setup.sw, 2.5, then=30)          # save now + 10 min
+    hw.inputs.set_level(gpio_setup.RGButton, 0)  # arm switch
+    clock.run_for(9 * 60)
+    rang_at = next((t for t, pin, level in hw.gpio.transitions
+                    if pin == gpio_setup.piezo and level == 1), None)
+    press(gpio_setup.sw, 0.2)                   # stop the alarm
+    clock.run_for(60)
+    real_s = time.perf_counter() - t0
+
+    config_manager.store.flush()
+    cfg = config_manager.read_config()
+    frames = hw.epd_bus.frames
+    stepper_steps = sum(1 for _, pin, _ in hw.gpio.transitions if pin in gpio_setup.stepper_pins)
+
+    from PIL import Image, ImageChops
+    calibrate_ok = False
+    if calibrate_frame > 0:
+        expected = render.render_calibrate_screen().convert('1')
+        calibrate_ok = ImageChops.difference(frames[calibrate_frame - 1][2], expected).getbbox() is None
+    pngs = sorted(f for f in os.listdir(workdir) if f.endswith(".png"))
+    png_ok = len(pngs) == len(frames) and all(
+        Image.open(os.path.join(workdir, name)).convert('1').tobytes() == image.tobytes()
+        for name, (_, _, image) in zip(pngs, frames))
+
+    return {
+        "real_s": real_s,
+        "virtual_s": clock.monotonic(),
+        "events": clock.events,
+        "stalls": clock.stalls,
+        "frames": [(kind, digest(image.tobytes())) for _, kind, image in frames],
+        "pngs": len(pngs),
+        "png_ok": png_ok,
+        "calibrate_ok": calibrate_ok,
+        "spi_bytes": hw.epd_bus.spi_bytes,
+        "lost_bytes": hw.epd_bus.lost_bytes,
+        "stepper_steps": stepper_steps,
+        "transitions": len(hw.gpio.transitions),
+        "rang_at": None if rang_at is None else clock.start.timestamp() + rang_at,
+        "rang_min": None if rang_at is None else (clock.start.hour * 60 + clock.start.minute + int(rang_at // 60)),
+        "alarm_time": cfg.get("alarm_time"),
+        "alarm_active": cfg.get("alarm_active"),
+        "hand_position": cfg.get("hand_position"),
+        "now_min": clock.now().hour * 60 + clock.now().minute,
+    }
+
+
+def run_child():
+    with tempfile.TemporaryDirectory() as workdir:
+        out = subprocess.run([sys.executable, os.path.realpath(__file__), "--child", workdir],
+                             capture_output=True, text=True)
+        if out.returncode != 0:
+            print(out.stderr)
+            return None
+        with open(os.path.join(workdir, "summary.json")) as f:
+            return json.load(f)
+
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == "--child":
+        summary = morning(sys.argv[2])
+        with open(os.path.join(sys.argv[2], "summary.json"), "w") as f:
+            json.dump(summary, f)
+        return
+
+    ok = True
+    runs = [run_child(), run_child()]
+    if None in runs:
+        print("FAIL")
+        sys.exit(1)
+    a, b = runs
+
+    ring = time.strftime("%H:%M:%S", time.localtime(a["rang_at"])) if a["rang_at"] else "never"
+    print(f"{'virtual s':>10} {'real s':>7} {'speedup':>8} {'events':>7} {'frames':>7} "
+          f"{'SPI bytes':>10} {'steps':>6} {'rang at':>9}")
+    for r in runs:
+        print(f"{r['virtual_s']:10.0f} {r['real_s']:7.2f} {r['virtual_s'] / r['real_s']:7.0f}x "
+              f"{r['events']:7} {len(r['frames']):7} {r['spi_bytes']:10} {r['stepper_steps']:6} {ring:>9}")
+    print("frames " + " ".join(f"{kind:#04x}:{h}" for kind, h in a["frames"]))
+
+    ok &= len(a["frames"]) >= 3 and a["png_ok"] and a["calibrate_ok"]
+    ok &= a["lost_bytes"] == 0 and a["stalls"] == 0
+    ok &= a["rang_min"] is not None and a["alarm_time"] == a["rang_min"] and not a["alarm_active"]
+    ok &= a["hand_position"] == a["now_min"]
+    ok &= a["virtual_s"] / a["real_s"] > 10
+    same = ("frames", "stepper_steps", "alarm_time", "hand_position", "spi_bytes")
+    ok &= all(a[k] == b[k] for k in same)
+    print("deterministic: " + ", ".join(f"{k} {'same' if a[k] == b[k] else 'DIFFERENT'}" for k in same))
+
+    print("PASS" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+30 simulated days of the alarm state machine (simulate.py's weekly
+script), twice, each in a fresh interpreter.
+
+Checks that no alarm was missed or rang unexpectedly, that both runs
+agree on every count (rings, snoozes, auto-cancels, steps, config writes,
+NeoPixel pushes, clock events), that run_for() never had to give up on a thread, and that
+a month takes well under a minute.
+
+    python bench_simulate.py [days]
+"""
+import json
+import os
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.realpath(__file__))
+
+CHILD = """
+import contextlib, json, os, sys
+sys.path.insert(0, {here!r})
+import simulate
+with open(os.devnull, "w") as quiet, contextlib.redirect_stdout(quiet):
+    r = simulate.simulate({days}, log=lambda line: None)
+print(json.dumps(r))
+"""
+
+SAME = ("expected", "rang", "missed", "unexpected", "snoozes", "auto_cancels",
+        "steps", "config_writes", "screen_requests", "pixel_shows", "events")
+
+
+def run(days):
+    out = subprocess.run([sys.executable, "-c", CHILD.format(here=HERE, days=days)],
+                         capture_output=True, text=True)
+    if out.returncode != 0:
+        print(out.stderr)
+        return None
+    return json.loads(out.stdout.splitlines()[-1])
+
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    runs = [run(days), run(days)]
+    if None in runs:
+        print("FAIL")
+        sys.exit(1)
+    a, b = runs
+    ok = True
+
+    print(f"{days} days: {'real s':>7} {'speedup':>8} {'events':>8} {'alarms':>7} {'missed':>7} "
+          f"{'steps':>8} {'cfg writes':>11}")
+    for r in runs:
+        print(f"{'':9} {r['real_s']:7.1f} {r['virtual_s'] / r['real_s']:7.0f}x {r['events']:8} "
+              f"{r['rang']:7} {r['missed']:7} {r['steps']:8} {r['config_writes']:11}")
+    print(f"snoozes {a['snoozes']}, auto-cancels {a['auto_cancels']}, stalls {a['stalls']}")
+
+    ok &= a["expected"] > 0 and a["missed"] == 0 and a["unexpected"] == 0
+    ok &= a["stalls"] == 0 and b["stalls"] == 0
+    ok &= a["real_s"] < days * 2
+    differ = [k for k in SAME if a[k] != b[k]]
+    print("deterministic" if not differ else "runs differ in " + ", ".join(differ))
+    ok &= not differ
+
+    print("PASS" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+SPI traffic per init() and partial refresh, batched (epdseq) vs byte by byte.
+
+The drivers run against a fake epdconfig that records every DC level and
+SPI byte and counts the calls that would be GPIO writes and spidev
+syscalls on the Pi. The old send_command()/send_data() register code is
+kept here as a reference and must put the same (DC, byte) stream on the
+bus as the batched sequences.
+
+    python bench_spi.py [repeats]
+"""
+import os
+import sys
+import time
+import types
+
+libdir = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'lib')
+if os.path.exists(libdir):
+    sys.path.append(libdir)
+
+import waveshare_epd
+
+
+class FakeSPI:
+    """The parts of epdconfig the drivers call, recording the bus."""
+
+    RST_PIN = 17
+    DC_PIN = 25
+    CS_PIN = 8
+    BUSY_PIN = 24
+    PWR_PIN = 18
+
+    def __init__(self):
+        self.record = True
+        self.reset()
+
+    def reset(self):
+        self.dc = 0
+        self.stream = []
+        self.gpio_writes = 0
+        self.spi_calls = 0
+
+    def digital_write(self, pin, value):
+        self.gpio_writes += 1
+        if pin == self.DC_PIN:
+            self.dc = value
+
+    def digital_read(self, pin):
+        return 0
+
+    def spi_writebyte(self, data):
+        self.spi_calls += 1
+        if self.record:
+            self.stream += [(self.dc, b) for b in data]
+
+    spi_writebyte2 = spi_writebyte
+    writebytes2 = spi_writebyte     # drivers that call epdconfig.SPI.writebytes2()
+
+    def delay_ms(self, delaytime):
+        pass
+
+    def wait_busy(self, pin, busy_level, name="epd", timeout=None, poll_ms=10, poll=None):
+        return 0.0
+
+    def module_init(self, cleanup=False):
+        return 0
+
+    def module_exit(self, cleanup=False):
+        pass
+
+
+spi = FakeSPI()
+fake = types.ModuleType("waveshare_epd.epdconfig")
+for attr in [x for x in dir(spi) if not x.startswith('_')]:
+    setattr(fake, attr, getattr(spi, attr))
+fake.SPI = spi
+sys.modules["waveshare_epd.epdconfig"] = fake
+waveshare_epd.epdconfig = fake
+
+from waveshare_epd import epd2in13_V4, epd4in2, framediff
+
+
+# ----- reference implementations (the old register code) -----
+def ref_2in13_window(epd, x_start, y_start, x_end, y_end):
+    epd.send_command(0x44)
+    epd.send_data((x_start >> 3) & 0xFF)
+    epd.send_data((x_end >> 3) & 0xFF)
+    epd.send_command(0x45)
+    epd.send_data(y_start & 0xFF)
+    epd.send_data((y_start >> 8) & 0xFF)
+    epd.send_data(y_end & 0xFF)
+    epd.send_data((y_end >> 8) & 0xFF)
+
+
+def ref_2in13_cursor(epd, x, y):
+    epd.send_command(0x4E)
+    epd.send_data(x & 0xFF)
+    epd.send_command(0x4F)
+    epd.send_data(y & 0xFF)
+    epd.send_data((y >> 8) & 0xFF)
+
+
+def ref_2in13_init(epd):
+    epd.reset()
+    epd.ReadBusy()
+    epd.send_command(0x12)
+    epd.ReadBusy()
+    epd.send_command(0x01)
+    epd.send_data(0xf9)
+    epd.send_data(0x00)
+    epd.send_data(0x00)
+    epd.send_command(0x11)
+    epd.send_data(0x03)
+    ref_2in13_window(epd, 0, 0, epd.width - 1, epd.height - 1)
+    ref_2in13_cursor(epd, 0, 0)
+    epd.send_command(0x3c)
+    epd.send_data(0x05)
+    epd.send_command(0x21)
+    epd.send_data(0x00)
+    epd.send_data(0x80)
+    epd.send_command(0x18)
+    epd.send_data(0x80)
+    epd.ReadBusy()
+
+
+def ref_2in13_windows(epd, image, windows):
+    epd.send_command(0x3C)
+    epd.send_data(0x80)
+    epd.send_command(0x01)
+    epd.send_data(0xF9)
+    epd.send_data(0x00)
+    epd.send_data(0x00)
+    epd.send_command(0x11)
+    epd.send_data(0x03)
+    linewidth = framediff.line_bytes(epd.width)
+    for window in windows:
+        x0, x1, y0, y1 = window
+        ref_2in13_window(epd, x0 * 8, y0, x1 * 8 + 7, y1)
+        ref_2in13_cursor(epd, x0, y0)
+        epd.send_command(0x24)
+        epd.send_data2(framediff.window_bytes(image, linewidth, window))
+    epd.send_command(0x22)
+    epd.send_data(0xff)
+    epd.send_command(0x20)
+
+
+def ref_4in2_init(epd):
+    epd.reset()
+    for cmd, data in ((0x01, (0x03, 0x00, 0x2b, 0x2b)), (0x06, (0x17, 0x17, 0x17)), (0x04, ())):
+        epd.send_command(cmd)
+        for d in data:
+            epd.send_data(d)
+    epd.ReadBusy()
+    for cmd, data in ((0x00, (0xbf,)), (0x30, (0x3c,)), (0x61, (0x01, 0x90, 0x01, 0x2c)),
+                      (0x82, (0x12,)), (0X50, (0x97,))):
+        epd.send_command(cmd)
+        for d in data:
+            epd.send_data(d)
+    for cmd, lut in ((0x20, epd.lut_vcom0), (0x21, epd.lut_ww), (0x22, epd.lut_bw),
+                     (0x23, epd.lut_bb), (0x24, epd.lut_wb)):
+        epd.send_command(cmd)
+        epd.send_data2(lut)
+
+
+def partial_frames(epd):
+    """Two frames differing in two bands, as a clock minute change does."""
+    linewidth = framediff.line_bytes(epd.width)
+    old = bytearray([0xFF]) * (linewidth * epd.height)
+    new = bytearray(old)
+    for y in list(range(40, 80)) + list(range(200, 210)):
+        new[y * linewidth + 2:y * linewidth + 10] = b'\x00' * 8
+    return new, framediff.dirty_windows(old, new, linewidth)
+
+
+def run(fn):
+    spi.reset()
+    fn()
+    return list(spi.stream), spi.gpio_writes, spi.spi_calls
+
+
+def best_of(fn, repeats):
+    best = None
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return best * 1e6
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    ok = True
+    small = epd2in13_V4.EPD()
+    big = epd4in2.EPD()
+    image, windows = partial_frames(small)
+    cases = [
+        ("epd2in13_V4 init", lambda: ref_2in13_init(small), small.init),
+        ("epd2in13_V4 partial", lambda: ref_2in13_windows(small, image, windows),
+                                lambda: small.displayPartialWindows(image, windows)),
+        ("epd4in2 init", lambda: ref_4in2_init(big), big.init),
+    ]
+
+    print(f"{'sequence':>20} {'bytes':>6} {'spi old':>8} {'spi new':>8} {'gpio old':>9} {'gpio new':>9}"
+          f" {'old us':>8} {'new us':>8}")
+    for label, old, new in cases:
+        old_stream, old_gpio, old_spi = run(old)
+        new_stream, new_gpio, new_spi = run(new)
+        same = old_stream == new_stream
+        ok &= same and new_spi < old_spi
+        old_us = best_of(old, repeats)
+        new_us = best_of(new, repeats)
+        print(f"{label:>20} {len(new_stream):6} {old_spi:8} {new_spi:8} {old_gpio:9} {new_gpio:9}"
+              f" {old_us:8.1f} {new_us:8.1f}  {'ok' if same else 'MISMATCH'}")
+
+    print("PASS" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Stepper benchmark on simulated GPIO with a virtual clock.
+
+Compares the legacy wave-drive forward() (4 GPIO.output calls per phase,
+fixed 3 ms) with StepperEngine in full-step and half-step mode for 1, 60
+and 720 minute moves. Checks that every driver issues one phase per
+table row per step, that no engine phase is shorter than its cruise
+delay, that a move takes no longer than cruising all the way plus both
+ramps, and that the cruise speed stays under stepper.PULL_OUT_PPS.
+
+    python bench_stepper.py
+"""
+import sys
+
+import stepper
+from stepper import StepperEngine
+
+STEPS_PER_MINUTE = 512 / 60
+LEGACY_DELAY = 0.003
+
+
+class VirtualClock:
+    def __init__(self):
+        self.t = 0.0
+
+    def now(self):
+        return self.t
+
+    def sleep(self, s):
+        self.t += max(0.0, s)
+
+
+class FakeGPIO:
+    def __init__(self, clock):
+        self.clock = clock
+        self.calls = 0
+        self.phase_times = []
+
+    def output(self, pins, values):
+        self.calls += 1
+        if isinstance(pins, (list, tuple)) or pins == stepper.IN1:
+            self.phase_times.append(self.clock.t)
+
+
+class _LegacyTime:
+    """Stand-in for the time module inside stepper.forward()."""
+    def __init__(self, clock):
+        self.sleep = clock.sleep
+
+
+def run_legacy(steps):
+    clock = VirtualClock()
+    gpio = FakeGPIO(clock)
+    saved = stepper.GPIO, stepper.time
+    stepper.GPIO, stepper.time = gpio, _LegacyTime(clock)
+    try:
+        stepper.forward(LEGACY_DELAY, steps)
+    finally:
+        stepper.GPIO, stepper.time = saved
+    return clock.t, gpio.calls, gpio.phase_times
+
+
+def run_engine(mode, steps):
+    clock = VirtualClock()
+    gpio = FakeGPIO(clock)
+    engine = StepperEngine(mode=mode, gpio=gpio, sleep=clock.sleep, clock=clock.now)
+    engine.move(steps)
+    return clock.t, gpio.calls, gpio.phase_times, engine
+
+
+def min_gap(times):
+    return min((b - a for a, b in zip(times, times[1:])), default=0.0)
+
+
+def half_step_pps(engine):
+    """Cruise speed in the datasheet's half-steps a second."""
+    return 8 / len(engine.phases) / engine.ramp[-1]
+
+
+def main():
+    ok = True
+    print(f"{'move':>8} {'driver':>12} {'wall s':>9} {'phases':>7} {'GPIO calls':>11} "
+          f"{'min phase ms':>13} {'pps':>5}")
+    for minutes in (1, 60, 720):
+        steps = round(STEPS_PER_MINUTE * minutes)
+        t, calls, times = run_legacy(steps)
+        good = len(times) == steps * 4 and calls == steps * 16
+        ok &= good
+        print(f"{minutes:>6}m {'legacy wave':>12} {t:>9.2f} {len(times):>7} {calls:>11} "
+              f"{min_gap(times) * 1e3:>13.2f} {'':>5}{'' if good else '  BAD'}")
+        for mode in ("full", "half"):
+            t, calls, times, engine = run_engine(mode, steps)
+            n = steps * len(engine.phases)
+            cruise = engine.ramp[-1]
+            pps = half_step_pps(engine)
+            good = len(times) == calls == engine.phases_issued == n
+            good &= min_gap(times) >= cruise - 1e-9
+            good &= n * cruise - 1e-9 <= t <= n * cruise + 2 * sum(engine.ramp) + 1e-9
+            good &= pps < stepper.PULL_OUT_PPS
+            ok &= good
+            print(f"{minutes:>6}m {mode + ' ramp':>12} {t:>9.2f} {len(times):>7} {calls:>11} "
+                  f"{min_gap(times) * 1e3:>13.2f} {pps:>5.0f}{'' if good else '  BAD'}")
+
+    print("PASS" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
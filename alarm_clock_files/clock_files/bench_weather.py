@@ -0,0 +1,108 @@
+"""
+WeatherService check against a local stub HTTP server (no API key needed).
+
+Walks through a cold get (None at once, then on_ready from the background
+fetch), cache hits, an ETag revalidation (304), a server outage with
+stale fallback, and a restart that reads the disk cache, printing get()
+latency and server hit counts at each step.
+
+    python bench_weather.py
+"""
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from weather import WeatherService
+
+PAYLOAD = {"daily": [
+    {"dt": 1700000000 + 86400 * i, "pop": 0.1 * i,
+     "temp": {"min": 40 + i, "max": 55 + i},
+     "weather": [{"id": 800, "main": "Clear", "description": "clear sky"}]}
+    for i in range(8)
+]}
+ETAG = '"v1"'
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    hits = 0
+    delay = 0.2
+
+    def do_GET(self):
+        StubHandler.hits += 1
+        time.sleep(self.delay)
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = json.dumps(PAYLOAD).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def timed_get(service):
+    t0 = time.perf_counter()
+    data = service.get()
+    return data, (time.perf_counter() - t0) * 1000
+
+
+def main():
+    server = HTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/data/3.0/onecall"
+    cache_file = os.path.join(tempfile.mkdtemp(), "weather_cache.json")
+
+    svc = WeatherService(base_url=url, ttl=2, refresh_ahead=0.5, cache_file=cache_file, timeout=1)
+    ok = True
+
+    ready = threading.Event()
+    svc.on_ready = ready.set
+    data, ms = timed_get(svc)
+    print(f"cold get           {ms:8.1f} ms  data={data} server hits={StubHandler.hits}")
+    ok &= data is None and ms < 50 and StubHandler.hits == 0
+
+    t0 = time.perf_counter()
+    svc.start()
+    ok &= ready.wait(5)
+    data, ms = timed_get(svc)
+    print(f"on_ready after     {(time.perf_counter() - t0) * 1000:8.1f} ms  "
+          f"data={data == PAYLOAD} server hits={StubHandler.hits}")
+    ok &= data == PAYLOAD
+
+    lat = [timed_get(svc)[1] for _ in range(1000)]
+    print(f"1000 cached gets   {sum(lat) / len(lat):8.4f} ms avg  server hits={StubHandler.hits}")
+    ok &= StubHandler.hits == 1
+
+    time.sleep(2.0)
+    print(f"background refresh              server hits={StubHandler.hits} "
+          f"not_modified={svc.stats['not_modified']} age={svc.age():.2f}s")
+    ok &= svc.stats["not_modified"] >= 1 and svc.age() < svc.ttl
+
+    server.shutdown()
+    server.server_close()
+    time.sleep(2.5)
+    data, ms = timed_get(svc)
+    print(f"server down, get   {ms:8.1f} ms  stale data served={data == PAYLOAD} errors={svc.stats['errors']}")
+    ok &= data == PAYLOAD and ms < 50
+
+    fresh = WeatherService(base_url=url, cache_file=cache_file, timeout=1)
+    data, ms = timed_get(fresh)
+    print(f"restart, disk hit  {ms:8.1f} ms  data={data == PAYLOAD}")
+    ok &= data == PAYLOAD
+
+    print("PASS" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,15 @@
 import json
 import threading
 import os
+import atexit
+import time
 
 CONFIG_FILE = "/home/edison/alarm_clock_files/clock_files/config.json"
 
+# Seconds a dirty config may sit in memory before it is flushed to disk.
+# Every write inside this window is coalesced into a single file replace.
+FLUSH_DELAY = 1.0
+
 _config_lock = threading.RLock()
 
 DEFAULT_CONFIG = {
@@ -15,35 +21,169 @@ DEFAULT_CONFIG = {
     "alarm_active": False,
     "alarm_start_min": None,
     "last_ring_min": None,
+    "last_ring_date": None,
     "snooze_until": None,
     "alarm_disabled_date": None
 }
 
-def read_config():
+def load_config_file(path=None):
+    """Read config straight from disk, healing a missing/broken file."""
+    path = path or CONFIG_FILE
     with _config_lock:
         # If file missing → create default
-        if not os.path.exists(CONFIG_FILE):
-            write_config(DEFAULT_CONFIG)
+        if not os.path.exists(path):
+            save_config_file(DEFAULT_CONFIG, path)
             return DEFAULT_CONFIG.copy()
 
         # Read file safely
         try:
-            with open(CONFIG_FILE, "r") as f:
+            with open(path, "r") as f:
                 raw = f.read().strip()
                 if raw == "" or raw is None:
                     # Empty file → heal it
-                    write_config(DEFAULT_CONFIG)
+                    save_config_file(DEFAULT_CONFIG, path)
                     return DEFAULT_CONFIG.copy()
                 return json.loads(raw)
         except:
             # JSON error → reset to defaults
-            write_config(DEFAULT_CONFIG)
+            save_config_file(DEFAULT_CONFIG, path)
             return DEFAULT_CONFIG.copy()
 
-def write_config(cfg):
+def save_config_file(cfg, path=None):
+    """Write config straight to disk."""
+    path = path or CONFIG_FILE
     with _config_lock:
         # Atomic write: write temp file then replace
-        tmp_file = CONFIG_FILE + ".tmp"
+        tmp_file = path + ".tmp"
         with open(tmp_file, "w") as f:
             json.dump(cfg, f, indent=4)
-        os.replace(tmp_file, CONFIG_FILE)
+        os.replace(tmp_file, path)
+
+
+class ConfigStore:
+    """
+    In-memory copy of config.json shared by every thread in the process.
+
+    Reads never touch the SD card. Writes replace the in-memory copy at once
+    and wake a background flusher, which waits FLUSH_DELAY seconds so bursts
+    of writes land on disk as one atomic replace. Writes that leave the
+    config unchanged are not persisted at all.
+    """
+
+    def __init__(self, path=None, flush_delay=None):
+        self.path = path
+        self.flush_delay = FLUSH_DELAY if flush_delay is None else flush_delay
+        self._cfg = None
+        self._persisted = None
+        self._dirty = False
+        self._generation = 0
+        self._saved_generation = 0
+        self._closed = False
+        self._cond = threading.Condition(threading.RLock())
+        self._flusher = None
+        self.stats = {"reads": 0, "writes": 0, "disk_reads": 0, "disk_writes": 0}
+
+    def _ensure_loaded(self):
+        if self._cfg is None:
+            self._cfg = load_config_file(self.path)
+            self._persisted = dict(self._cfg)
+            self.stats["disk_reads"] += 1
+
+    def read(self):
+        """Return a private copy of the current config."""
+        with self._cond:
+            self._ensure_loaded()
+            self.stats["reads"] += 1
+            return dict(self._cfg)
+
+    def get(self, key, default=None):
+        with self._cond:
+            self._ensure_loaded()
+            self.stats["reads"] += 1
+            return self._cfg.get(key, default)
+
+    def write(self, cfg):
+        """Make cfg the current config and schedule it for persistence."""
+        with self._cond:
+            self._ensure_loaded()
+            self._cfg = dict(cfg)
+            self.stats["writes"] += 1
+            self._generation += 1
+            self._dirty = self._cfg != self._persisted
+            if not self._dirty:
+                return
+            if self._flusher is None and not self._closed:
+                self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+                self._flusher.start()
+            self._cond.notify_all()
+        if self._closed:
+            self.flush()
+
+    def flush(self):
+        """Persist any pending write now."""
+        with self._cond:
+            if not self._dirty:
+                return
+            snapshot = dict(self._cfg)
+            generation = self._generation
+            self._dirty = False
+        # Disk I/O happens outside self._cond so readers never wait on the SD card.
+        with _config_lock:
+            if generation <= self._saved_generation:
+                return
+            try:
+                save_config_file(snapshot, self.path)
+            except OSError:
+                with self._cond:
+                    self._dirty = True
+                raise
+            self._saved_generation = generation
+            with self._cond:
+                self._persisted = snapshot
+                self.stats["disk_writes"] += 1
+                # A write during the save may have been checked against the
+                # old file; whatever differs from what just landed is pending.
+                self._dirty = self._cfg != snapshot
+                if self._dirty:
+                    self._cond.notify_all()
+
+    def close(self):
+        """Flush and stop the background flusher."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._flusher is not None and self._flusher is not threading.current_thread():
+            self._flusher.join(timeout=self.flush_delay + 1)
+        self.flush()
+
+    def _flush_loop(self):
+        while True:
+            with self._cond:
+                while not self._dirty and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                # Coalescing window: later writes just update self._cfg.
+                deadline = time.monotonic() + self.flush_delay
+                remaining = self.flush_delay
+                while remaining > 0 and not self._closed:
+                    self._cond.wait(remaining)
+                    remaining = deadline - time.monotonic()
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"[CONFIG] flush failed: {e}")
+                time.sleep(self.flush_delay)
+
+
+store = ConfigStore()
+atexit.register(store.close)
+
+def read_config():
+    return store.read()
+
+def write_config(cfg):
+    store.write(cfg)
+
+def flush_config():
+    store.flush()
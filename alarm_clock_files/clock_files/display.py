@@ -0,0 +1,153 @@
+import sys
+import os
+import time
+import logging
+import threading
+libdir = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'lib')
+if os.path.exists(libdir):
+    sys.path.append(libdir)
+
+from waveshare_epd import framediff
+
+logger = logging.getLogger(__name__)
+
+# Ghosting budget: a full refresh is forced after this many partial
+# refreshes, or when the last full refresh is older than this many seconds.
+FULL_REFRESH_EVERY = 10
+FULL_REFRESH_INTERVAL = 3600
+
+
+class DisplayManager:
+    """
+    The display session: owns one epd2in13_V4 panel for the life of the
+    process and decides per frame between a full and a partial refresh.
+
+    The panel is initialised (module_init, reset, SWRESET) once, on the
+    first show(). After every update it goes into deep sleep, which keeps
+    both RAM banks, and the next show() wakes it with epd.wake(): a reset
+    and the register setup only. A driver without wake()/deep_sleep() stays
+    awake and is re-initialised ahead of each full refresh. After an error the
+    panel state is unknown, so the next show() starts over with init().
+
+    The last frame buffer sent is remembered: identical frames are skipped
+    without waking the panel, everything else goes out as displayPartial()
+    until the ghosting budget (FULL_REFRESH_EVERY partials or
+    FULL_REFRESH_INTERVAL seconds) runs out. A full refresh writes the frame
+    into both RAM banks with displayPartBaseImage(), which is the base the
+    following partials diff against.
+
+    Partials only send the dirty windows (framediff) when the driver has
+    displayPartialWindows(); the controller RAM still holds last_frame, so
+    bytes outside the windows need not cross the bus.
+
+    lock serialises everything that touches the panel; callers that render
+    and show as one step hold it around both (it is re-entrant).
+    last_latency is the wake->displayed time of the last update, seconds.
+    """
+
+    OFF = "off"
+    AWAKE = "awake"
+    ASLEEP = "asleep"
+
+    def __init__(self, epd, full_every=FULL_REFRESH_EVERY, full_interval=FULL_REFRESH_INTERVAL,
+                 clock=time.monotonic, sleep_between=True):
+        self.epd = epd
+        self.full_every = full_every
+        self.full_interval = full_interval
+        self.clock = clock
+        self.sleep_between = sleep_between and hasattr(epd, "deep_sleep") and hasattr(epd, "wake")
+        self.lock = threading.RLock()
+        self.state = self.OFF
+        self.last_frame = None
+        self.partials_since_full = 0
+        self.last_full = None
+        self.last_latency = None
+        self.stats = {"full": 0, "partial": 0, "skipped": 0, "bytes_sent": 0,
+                      "inits": 0, "wakes": 0, "sleeps": 0}
+
+    def needs_full(self):
+        if self.last_frame is None or self.last_full is None:
+            return True
+        if self.partials_since_full >= self.full_every:
+            return True
+        return self.clock() - self.last_full >= self.full_interval
+
+    def wake(self):
+        """Bring the panel to AWAKE: init() the first time, wake() after deep sleep."""
+        if self.state == self.AWAKE:
+            return
+        if self.state == self.ASLEEP:
+            self.epd.wake()
+            self.stats["wakes"] += 1
+        else:
+            if self.epd.init() != 0:
+                raise IOError("e-Paper init failed")
+            self.stats["inits"] += 1
+        self.state = self.AWAKE
+
+    def sleep(self):
+        """Deep sleep until the next show(); RAM and the SPI bus are kept."""
+        if self.state == self.AWAKE and self.sleep_between:
+            self.epd.deep_sleep()
+            self.stats["sleeps"] += 1
+            self.state = self.ASLEEP
+
+    def show(self, image, force_full=False):
+        """Put a PIL image on the panel. Returns "full", "partial" or "skipped"."""
+        buf = bytes(self.epd.getbuffer(image))
+        with self.lock:
+            if not force_full and buf == self.last_frame:
+                self.stats["skipped"] += 1
+                return "skipped"
+
+            try:
+                start = self.clock()
+                full = force_full or self.needs_full()
+                if full and not self.sleep_between:
+                    # no deep sleep: re-init ahead of each full refresh, as before
+                    self.state = self.OFF
+                self.wake()
+                kind = self._refresh(buf, full)
+                self.last_latency = self.clock() - start
+                self.sleep()
+            except Exception:
+                # e.g. a BUSY timeout: the panel RAM is unknown, so start over
+                self.invalidate()
+                raise
+
+            self.last_frame = buf
+            self.stats[kind] += 1
+            logger.debug("display: %s refresh in %.0f ms (%d partials since full)",
+                         kind, self.last_latency * 1000, self.partials_since_full)
+            return kind
+
+    def _refresh(self, buf, full):
+        if full:
+            self.epd.displayPartBaseImage(buf)
+            self.stats["bytes_sent"] += 2 * len(buf)
+            self.partials_since_full = 0
+            self.last_full = self.clock()
+            return "full"
+        if hasattr(self.epd, "displayPartialWindows"):
+            linewidth = framediff.line_bytes(self.epd.width)
+            windows = framediff.dirty_windows(self.last_frame, buf, linewidth)
+            self.epd.displayPartialWindows(buf, windows)
+            self.stats["bytes_sent"] += framediff.transfer_size(windows)
+        else:
+            self.epd.displayPartial(buf)
+            self.stats["bytes_sent"] += len(buf)
+        self.partials_since_full += 1
+        return "partial"
+
+    def invalidate(self):
+        """Forget the panel state; the next show() does init() and a full refresh."""
+        self.last_frame = None
+        self.last_full = None
+        self.state = self.OFF
+
+    def close(self):
+        """Put the panel to sleep and release the bus (epd.sleep() does module_exit)."""
+        with self.lock:
+            if self.stats["inits"]:
+                self.epd.sleep()
+            self.invalidate()
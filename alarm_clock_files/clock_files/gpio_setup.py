@@ -1,5 +1,3 @@
-import RPi.GPIO as GPIO
-
 # ULN2003AN stepper driver (BCM pins)
 IN1 = 5
 IN2 = 6
@@ -22,10 +20,20 @@ led_PM = 2     # Board 3
 # Piezo (active buzzer)
 piezo = 3      # Board 5
 
+# Chromatek NeoPixel data, driven by rpi_ws281x rather than RPi.GPIO
+neopixel = 18  # Board 12
+
 # Chromatek RGB button (mechanical switch input)
 RGButton = 26  # Board 37
 
-def setup_pins():
+def setup_pins(GPIO=None, backlight=True):
+    # Resolved here so the pin map can be used off-device. backlight=False
+    # leaves led_nood to its PWM backend: an output here would take BCM 19
+    # off the hardware PWM function the overlay routed it to.
+    if GPIO is None:
+        import hal
+        GPIO = hal.hardware().gpio
+
     GPIO.setwarnings(False)
     GPIO.setmode(GPIO.BCM)
 
@@ -43,6 +51,7 @@ def setup_pins():
     GPIO.setup(IN4, GPIO.OUT, initial=GPIO.LOW)
 
     # LEDs and piezo
-    GPIO.setup(led_nood, GPIO.OUT, initial=GPIO.LOW)
+    if backlight:
+        GPIO.setup(led_nood, GPIO.OUT, initial=GPIO.LOW)
     GPIO.setup(led_PM, GPIO.OUT, initial=GPIO.LOW)
     GPIO.setup(piezo, GPIO.OUT, initial=GPIO.LOW)
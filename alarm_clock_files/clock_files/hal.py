@@ -0,0 +1,615 @@
+import sys
+import os
+import time
+import datetime
+import threading
+libdir = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'lib')
+if os.path.exists(libdir):
+    sys.path.append(libdir)
+
+import input_events
+import pwm
+
+# CLOCK_HAL=sim runs the clock on SimHardware; anything else (or unset) is
+# the real board.
+ENV_VAR = "CLOCK_HAL"
+
+
+# ========================= CLOCKS ============================
+class RealClock:
+    """time/datetime behind the interface VirtualClock implements."""
+
+    def monotonic(self):
+        return time.monotonic()
+
+    def time(self):
+        return time.time()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+    def now(self):
+        return datetime.datetime.now()
+
+    def Event(self):
+        return threading.Event()
+
+    def Condition(self, lock=None):
+        return threading.Condition(lock)
+
+
+class VirtualClock:
+    """
+    Simulated time, starting at `start` (a naive datetime).
+
+    The thread that creates the clock owns it. sleep() in the owner just
+    adds to the time, so single-threaded code (a StepperEngine move, an
+    e-paper refresh) runs as fast as the CPU allows.
+
+    Any other thread's sleep() is a timed event that waits for the owner
+    to call run_for(seconds): time then jumps from one event to the next.
+    After waking a thread, run_for() waits until it sleeps again before
+    advancing; a thread that blocks on anything else instead is given
+    `settle` real seconds (counted in stalls). Event() and Condition()
+    make the matching primitives for threads that hand work to each other:
+    a thread blocked on one counts as parked, and set()/notify() wakes it
+    the way run_for() does. Threads that only ever wait on these and on
+    sleep() therefore run in the same order every time.
+
+    A background sleep() or timed Event wait that ends before every other
+    thread's, while nothing else is awake, is taken on the spot, without the
+    round trip through run_for().
+    """
+
+    def __init__(self, start=None, settle=0.5):
+        self.start = start or datetime.datetime(2025, 1, 6, 6, 0)
+        self.settle = settle
+        self._t = 0.0
+        self._cond = threading.Condition()
+        self._owner = threading.get_ident()
+        self._sleeping = {}         # thread ident -> deadline
+        self._awake = set()         # woken, not yet back in sleep()
+        self._end = None            # end of the running run_for()
+        self.events = 0
+        self.stalls = 0             # times run_for() gave up waiting on a woken thread
+
+    def monotonic(self):
+        return self._t
+
+    def time(self):
+        return self.start.timestamp() + self._t
+
+    def now(self):
+        return self.start + datetime.timedelta(seconds=self._t)
+
+    def sleep(self, seconds):
+        seconds = max(0.0, seconds)
+        me = threading.get_ident()
+        with self._cond:
+            if me == self._owner:
+                self._t += seconds
+                return
+            deadline = self._t + seconds
+            if not self._skip_to(me, deadline):
+                self._park(me, deadline)
+
+    def _skip_to(self, me, deadline):
+        # caller holds self._cond; takes a background wait that ends before
+        # anything else can happen on the spot
+        if (self._end is not None and deadline <= self._end and self._awake <= {me}
+                and all(deadline < t for t in self._sleeping.values())):
+            self._t = deadline
+            self.events += 1
+            return True
+        return False
+
+    def _park(self, me, deadline):
+        # caller holds self._cond; returns once woken by run_for() or _wake()
+        self._awake.discard(me)
+        self._sleeping[me] = deadline
+        self._cond.notify_all()
+        self._cond.wait_for(lambda: me not in self._sleeping)
+
+    def _wake(self, idents):
+        # caller holds self._cond
+        for ident in idents:
+            if self._sleeping.pop(ident, None) is not None:
+                self._awake.add(ident)
+        self._cond.notify_all()
+
+    def Event(self):
+        return VirtualEvent(self)
+
+    def Condition(self, lock=None):
+        return VirtualCondition(self, lock)
+
+    def run_for(self, seconds):
+        """Advance `seconds` from the owner, running every background sleep() due on the way."""
+        if threading.get_ident() != self._owner:
+            raise RuntimeError("VirtualClock.run_for() called from a thread that does not own the clock")
+        with self._cond:
+            end = self._end = self._t + seconds
+            while True:
+                if not self._cond.wait_for(lambda: not self._awake, self.settle):
+                    self.stalls += 1
+                    self._awake.clear()
+                due = min(self._sleeping.values(), default=end)
+                if due > end:
+                    self._t = end
+                    self._end = None
+                    return
+                self._t = max(self._t, due)
+                for ident, deadline in list(self._sleeping.items()):
+                    if deadline <= self._t:
+                        del self._sleeping[ident]
+                        self._awake.add(ident)
+                        self.events += 1
+                self._cond.notify_all()
+
+    def advance(self, seconds):
+        """Add to the time without running background threads."""
+        with self._cond:
+            self._t += max(0.0, seconds)
+
+
+class VirtualEvent:
+    """threading.Event whose wait() and timeout run on a VirtualClock."""
+
+    def __init__(self, clock):
+        self._clock = clock
+        self._flag = False
+        self._waiters = set()
+
+    def is_set(self):
+        return self._flag
+
+    def set(self):
+        with self._clock._cond:
+            self._flag = True
+            self._clock._wake(self._waiters)
+            self._waiters.clear()
+
+    def clear(self):
+        with self._clock._cond:
+            self._flag = False
+
+    def wait(self, timeout=None):
+        clock = self._clock
+        me = threading.get_ident()
+        with clock._cond:
+            if self._flag:
+                return True
+            if me == clock._owner:
+                if timeout is None:
+                    raise RuntimeError("VirtualEvent.wait() without a timeout from the clock's owner")
+                clock._t += max(0.0, timeout)
+                return self._flag
+            if timeout is not None and clock._skip_to(me, clock._t + max(0.0, timeout)):
+                return self._flag
+            self._waiters.add(me)
+            clock._park(me, float("inf") if timeout is None else clock._t + max(0.0, timeout))
+            self._waiters.discard(me)
+            return self._flag
+
+
+class VirtualCondition:
+    """
+    threading.Condition that a VirtualClock can follow: a waiter is parked
+    until notified, and a notified waiter counts as awake until it sleeps or
+    waits again. notify() wakes every waiter (callers re-check their
+    predicate anyway); wait() timeouts are not supported.
+    """
+
+    def __init__(self, clock, lock=None):
+        self._clock = clock
+        self._inner = threading.Condition(lock)
+        self._waiters = set()
+
+    def __enter__(self):
+        return self._inner.__enter__()
+
+    def __exit__(self, *exc):
+        return self._inner.__exit__(*exc)
+
+    def acquire(self, *args):
+        return self._inner.acquire(*args)
+
+    def release(self):
+        self._inner.release()
+
+    def wait(self, timeout=None):
+        if timeout is not None:
+            raise ValueError("VirtualCondition.wait() takes no timeout")
+        clock = self._clock
+        me = threading.get_ident()
+        with clock._cond:
+            clock._awake.discard(me)
+            self._waiters.add(me)
+            clock._cond.notify_all()
+        self._inner.wait()
+        return True
+
+    def wait_for(self, predicate, timeout=None):
+        result = predicate()
+        while not result:
+            self.wait(timeout)
+            result = predicate()
+        return result
+
+    def notify(self, n=1):
+        self.notify_all()
+
+    def notify_all(self):
+        with self._clock._cond:
+            self._clock._awake.update(self._waiters)
+            self._waiters.clear()
+            self._clock._cond.notify_all()
+        self._inner.notify_all()
+
+
+# ========================= REAL HARDWARE ============================
+class RealHardware:
+    """
+    RPi.GPIO, adafruit NeoPixel and the Waveshare epdconfig as they are;
+    PWM outputs use the SoC's PWM block when pwm.open_pwm() can get it.
+    """
+
+    name = "real"
+
+    def __init__(self):
+        self.clock = RealClock()
+        self._gpio = None
+
+    @property
+    def gpio(self):
+        # Imported on first use so the pin map and helpers load off-device
+        if self._gpio is None:
+            import RPi.GPIO
+            self._gpio = RPi.GPIO
+        return self._gpio
+
+    def pwm(self, pin, frequency, pixel_pins=()):
+        return pwm.open_pwm(pin, frequency, self.gpio, pixel_pins=pixel_pins)
+
+    def pixels(self, pin, count, pixel_order="GRB", auto_write=True):
+        import board
+        import neopixel
+        return neopixel.NeoPixel(getattr(board, pin), count, auto_write=auto_write,
+                                 pixel_order=getattr(neopixel, pixel_order))
+
+    def input_backend(self):
+        return input_events.RPiGPIOBackend()
+
+
+# ========================= SIMULATED HARDWARE ============================
+class SimPWM:
+    """RPi.GPIO.PWM stand-in; duty changes go to SimGPIO.pwm_log."""
+
+    def __init__(self, gpio, pin, frequency):
+        self.gpio = gpio
+        self.pin = pin
+        self.frequency = frequency
+        self.duty = None
+
+    def start(self, duty):
+        self.ChangeDutyCycle(duty)
+
+    def ChangeDutyCycle(self, duty):
+        if duty != self.duty:
+            self.duty = duty
+            self.gpio.pwm_log.append((self.gpio.clock.monotonic(), self.pin, duty))
+
+    def ChangeFrequency(self, frequency):
+        self.frequency = frequency
+
+    def stop(self):
+        self.ChangeDutyCycle(0)
+
+
+class SimGPIO:
+    """
+    The part of RPi.GPIO the clock uses. Output changes are recorded as
+    (t, pin, level) in transitions; inputs read the shared FakeBackend, so
+    a press on the backend is seen by GPIO.input() as well.
+    """
+
+    BCM = 11
+    BOARD = 10
+    OUT = 0
+    IN = 1
+    LOW = 0
+    HIGH = 1
+    PUD_OFF = 20
+    PUD_DOWN = 21
+    PUD_UP = 22
+    RISING = 31
+    FALLING = 32
+    BOTH = 33
+
+    def __init__(self, clock, inputs):
+        self.clock = clock
+        self.inputs = inputs
+        self.mode = None
+        self.directions = {}
+        self.levels = {}
+        self.transitions = []
+        self.pwm_log = []
+        self.calls = 0
+
+    def setwarnings(self, flag):
+        pass
+
+    def setmode(self, mode):
+        self.mode = mode
+
+    def setup(self, pins, direction, pull_up_down=None, initial=None):
+        for pin in pins if isinstance(pins, (list, tuple)) else (pins,):
+            self.directions[pin] = direction
+            if direction == self.OUT:
+                self._set(pin, self.LOW if initial is None else initial)
+
+    def _set(self, pin, level):
+        level = int(bool(level))
+        if self.levels.get(pin) != level:
+            self.levels[pin] = level
+            self.transitions.append((self.clock.monotonic(), pin, level))
+
+    def output(self, pins, values):
+        self.calls += 1
+        if isinstance(pins, (list, tuple)):
+            if not isinstance(values, (list, tuple)):
+                values = [values] * len(pins)
+            for pin, value in zip(pins, values):
+                self._set(pin, value)
+        else:
+            self._set(pins, values)
+
+    def input(self, pin):
+        if self.directions.get(pin) == self.OUT:
+            return self.levels.get(pin, self.LOW)
+        return self.inputs.read(pin)
+
+    def PWM(self, pin, frequency):
+        return SimPWM(self, pin, frequency)
+
+    def cleanup(self, *pins):
+        pass
+
+
+class SimPixels:
+    """NeoPixel stand-in; every changed pixel is logged as (t, index, color, brightness)."""
+
+    def __init__(self, clock, count, auto_write=True):
+        self.clock = clock
+        self._pixels = [(0, 0, 0)] * count
+        self._brightness = 1.0
+        self.auto_write = auto_write
+        self.log = []
+        self.shows = 0
+
+    def __len__(self):
+        return len(self._pixels)
+
+    def __getitem__(self, index):
+        return self._pixels[index]
+
+    def __setitem__(self, index, color):
+        color = tuple(int(c) for c in color)
+        if self._pixels[index] != color:
+            self._pixels[index] = color
+            self.log.append((self.clock.monotonic(), index, color, self._brightness))
+        if self.auto_write:
+            self.show()
+
+    @property
+    def brightness(self):
+        return self._brightness
+
+    @brightness.setter
+    def brightness(self, value):
+        self._brightness = value
+        if self.auto_write:
+            self.show()
+
+    def fill(self, color):
+        for i in range(len(self._pixels)):
+            self[i] = color
+
+    def show(self):
+        self.shows += 1
+
+
+# Seconds the panel holds BUSY per Display Update Control (0x22) value,
+# roughly what an SSD1680 2.13" panel takes at room temperature
+SSD1680_REFRESH = {0xF7: 2.0, 0xC7: 1.5, 0xFF: 0.3, 0xB1: 0.01, 0x91: 0.01}
+SSD1680_SWRESET = 0.002
+
+
+class SimEPDBus:
+    """
+    epdconfig backend for an SSD1680 panel (epd2in13_V4) on a VirtualClock.
+
+    Decodes the command stream into the two RAM banks (window 0x44/0x45,
+    cursor 0x4E/0x4F, data entry mode 0x03), holds BUSY for the modelled
+    refresh time after Master Activation (0x20), and renders the black/white
+    RAM to a PIL image per refresh, saved as PNG when frames_dir is set.
+    Bytes sent while the controller is in deep sleep are counted in
+    lost_bytes, the way a real panel ignores them.
+    """
+
+    RST_PIN = 17
+    DC_PIN = 25
+    CS_PIN = 8
+    BUSY_PIN = 24
+    PWR_PIN = 18
+
+    def __init__(self, clock, width=122, height=250, frames_dir=None):
+        self.clock = clock
+        self.width = width
+        self.height = height
+        self.line = (width + 7) // 8
+        self.ram = {0x24: bytearray(self.line * height), 0x26: bytearray(self.line * height)}
+        self.frames_dir = frames_dir
+        self.frames = []            # (t, update control value, PIL image)
+        self.commands = []          # (t, command)
+        self.spi_bytes = 0
+        self.lost_bytes = 0
+        self.SPI = self
+        self._dc = 0
+        self._rst = 1
+        self._asleep = False
+        self._busy_until = 0.0
+        self._command = None
+        self._args = []
+        self._update = 0xF7
+        self._window = (0, self.line - 1, 0, height - 1)
+        self._x = 0
+        self._y = 0
+
+    # ----- pins -----
+    def digital_write(self, pin, value):
+        if pin == self.DC_PIN:
+            self._dc = value
+        elif pin == self.RST_PIN:
+            if self._rst and not value:
+                # hardware reset: out of deep sleep, registers to default, RAM kept
+                self._asleep = False
+                self._window = (0, self.line - 1, 0, self.height - 1)
+                self._x = self._y = 0
+            self._rst = value
+
+    def digital_read(self, pin):
+        if pin == self.BUSY_PIN:
+            return 1 if self._asleep or self.clock.monotonic() < self._busy_until else 0
+        return 0
+
+    def wait_for_level(self, pin, level, timeout):
+        if level == 0 and not self._asleep:
+            self.clock.sleep(min(timeout, max(0.0, self._busy_until - self.clock.monotonic())))
+        return self.digital_read(pin) == level
+
+    def delay_ms(self, delaytime):
+        self.clock.sleep(delaytime / 1000.0)
+
+    def module_init(self, cleanup=False):
+        return 0
+
+    def module_exit(self, cleanup=False):
+        pass
+
+    # ----- SPI -----
+    def spi_writebyte(self, data):
+        for b in data:
+            self._byte(b & 0xFF)
+
+    spi_writebyte2 = spi_writebyte
+    writebytes2 = spi_writebyte
+
+    def _byte(self, b):
+        self.spi_bytes += 1
+        if self._asleep:
+            self.lost_bytes += 1
+            return
+        if self._dc == 0:
+            self._command = b
+            self._args = []
+            self.commands.append((self.clock.monotonic(), b))
+            if b == 0x12:
+                self._busy_until = self.clock.monotonic() + SSD1680_SWRESET
+            elif b == 0x20:
+                self._activate()
+            return
+        if self._command in self.ram:
+            self._write_ram(self.ram[self._command], b)
+            return
+        self._args.append(b)
+        a = self._args
+        if self._command == 0x44 and len(a) == 2:
+            self._window = (a[0], a[1]) + self._window[2:]
+        elif self._command == 0x45 and len(a) == 4:
+            self._window = self._window[:2] + (a[0] | a[1] << 8, a[2] | a[3] << 8)
+        elif self._command == 0x4E:
+            self._x = a[0]
+        elif self._command == 0x4F and len(a) == 2:
+            self._y = a[0] | a[1] << 8
+        elif self._command == 0x22:
+            self._update = a[0]
+        elif self._command == 0x10 and a[0] & 0x03:
+            self._asleep = True
+
+    def _write_ram(self, ram, b):
+        x0, x1, y0, y1 = self._window
+        if 0 <= self._x < self.line and 0 <= self._y < self.height:
+            ram[self._y * self.line + self._x] = b
+        self._x += 1
+        if self._x > x1:
+            self._x = x0
+            self._y += 1
+            if self._y > y1:
+                self._y = y0
+
+    def _activate(self):
+        self._busy_until = self.clock.monotonic() + SSD1680_REFRESH.get(self._update, 0.01)
+        if self._update not in (0xF7, 0xC7, 0xFF):
+            return                  # temperature/LUT loads, nothing shown
+        from PIL import Image
+        portrait = Image.frombytes('1', (self.line * 8, self.height), bytes(self.ram[0x24]))
+        image = portrait.crop((0, 0, self.width, self.height)).rotate(-90, expand=True)
+        self.frames.append((self.clock.monotonic(), self._update, image))
+        if self.frames_dir:
+            kind = "partial" if self._update == 0xFF else "full"
+            image.save(os.path.join(self.frames_dir, "frame_%04d_%s.png" % (len(self.frames), kind)))
+
+
+class SimHardware:
+    """
+    Everything the clock touches, simulated on one VirtualClock: SimGPIO
+    (with SimPWM, behind pwm.SoftwarePWM), SimPixels, a FakeBackend for the
+    buttons and encoder (whose press() and turn() run the clock), and
+    SimEPDBus installed as the epdconfig backend.
+    """
+
+    name = "sim"
+
+    def __init__(self, start=None, frames_dir=None, settle=0.5):
+        self.clock = VirtualClock(start, settle)
+        self.inputs = input_events.FakeBackend(sleep=self.clock.run_for)
+        self.gpio = SimGPIO(self.clock, self.inputs)
+        self.epd_bus = SimEPDBus(self.clock, frames_dir=frames_dir)
+        self.strips = []
+        # off the board epdconfig must not probe for one
+        os.environ.setdefault("EPD_PLATFORM", "mock")
+        from waveshare_epd import epdconfig
+        epdconfig.set_implementation(self.epd_bus)
+
+    def pwm(self, pin, frequency, pixel_pins=()):
+        return pwm.SoftwarePWM(self.gpio, pin, frequency)
+
+    def pixels(self, pin, count, pixel_order="GRB", auto_write=True):
+        strip = SimPixels(self.clock, count, auto_write)
+        self.strips.append(strip)
+        return strip
+
+    def input_backend(self):
+        return self.inputs
+
+
+_hardware = None
+_hardware_lock = threading.Lock()
+
+
+def hardware():
+    """The process-wide hardware, chosen by CLOCK_HAL on first use."""
+    global _hardware
+    with _hardware_lock:
+        if _hardware is None:
+            _hardware = SimHardware() if os.environ.get(ENV_VAR) == "sim" else RealHardware()
+        return _hardware
+
+
+def use(hw):
+    """Make hw the process-wide hardware; call before importing main/f_update."""
+    global _hardware
+    with _hardware_lock:
+        _hardware = hw
+    return hw
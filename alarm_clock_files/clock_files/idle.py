@@ -1,8 +1,11 @@
-import RPi.GPIO as GPIO
-import time
 from threading import Thread
+import hal
 import gpio_setup
 import config_manager
+import input_events
+
+GPIO = hal.hardware().gpio
+clock = hal.hardware().clock
 
 long_press_time = 2
 
@@ -22,10 +25,10 @@ def monitor_buttons(button_pins, callback):
 				if val == GPIO.LOW:
 					if not info["pressed"]:
 						info["pressed"] = True
-						info["start_time"] = time.time()
+						info["start_time"] = clock.time()
 						info["long_trigger"] = False
 					else:
-						if (not info ["long_trigger"]) and (time.time() - info["start_time"] >= long_press_time):
+						if (not info ["long_trigger"]) and (clock.time() - info["start_time"] >= long_press_time):
 							callback("long",name)
 							info["long_trigger"]=True
 				else:
@@ -34,27 +37,21 @@ def monitor_buttons(button_pins, callback):
 							callback("short", name)
 						info["pressed"] = False
 						info["long_trigger"] = False
-			time.sleep(0.01)
+			clock.sleep(0.01)
 	t = Thread(target=_monitor,daemon=True)
 	t.start()
 	return t
 
 def monitor_rotary_encoder(clk,dt,callback):
-	"""calls callback(direction) when rotated"""
-	last_clk = GPIO.input(clk)
+	"""calls callback(direction, steps) per detent; see input_events.QuadratureDecoder"""
+	decoder = input_events.QuadratureDecoder(GPIO.input(clk) << 1 | GPIO.input(dt))
 	
 	def _monitor():
-		nonlocal last_clk
 		while True:
-			clk_state = GPIO.input(clk)
-			dt_state = GPIO.input(dt)
-			if clk_state != last_clk and clk_state==0:
-				if dt_state != clk_state:
-					callback(1)
-				else:
-					callback(-1)
-			last_clk = clk_state
-			time.sleep(0.005)
+			detent = decoder.update(GPIO.input(clk), GPIO.input(dt), clock.monotonic())
+			if detent is not None:
+				callback(*detent)
+			clock.sleep(0.005)
 			
 	t = Thread(target= _monitor, daemon= True)
 	t.start()
@@ -0,0 +1,267 @@
+import collections
+import threading
+import time
+
+# Seconds a button level must stay put before it counts as a transition.
+DEBOUNCE = 0.02
+LONG_PRESS = 2
+
+# Encoder state = CLK << 1 | DT; both pulled up, so a detent rests at 11.
+# CW runs 11 -> 01 -> 00 -> 10 -> 11, CCW the other way round.
+REST = 0b11
+# TRANSITIONS[previous << 2 | new]: +1 a quarter cycle CW, -1 CCW, 0 no
+# change, None both lines changed (an edge was lost in between)
+TRANSITIONS = (
+    0, -1, +1, None,
+    +1, 0, None, -1,
+    -1, None, 0, +1,
+    None, +1, -1, 0,
+)
+# (seconds since the previous detent the same way, steps per detent):
+# the first row whose limit the gap is under wins, anything slower is 1
+ACCELERATION = ((0.03, 12), (0.06, 6), (0.1, 2))
+
+
+class RPiGPIOBackend:
+    """Edge source backed by RPi.GPIO's interrupt thread (add_event_detect)."""
+
+    def __init__(self):
+        import RPi.GPIO as GPIO
+        self.GPIO = GPIO
+
+    def read(self, pin):
+        return self.GPIO.input(pin)
+
+    def watch(self, pin, callback):
+        """Call callback(pin, level) from the GPIO thread on every edge."""
+        def _edge(channel):
+            callback(channel, self.GPIO.input(channel))
+        self.GPIO.remove_event_detect(pin)
+        self.GPIO.add_event_detect(pin, self.GPIO.BOTH, callback=_edge)
+
+    def unwatch(self, pin):
+        self.GPIO.remove_event_detect(pin)
+
+
+class FakeBackend:
+    """
+    In-memory edge source for running the input stack without a Pi.
+    Inputs idle HIGH (pulled up); set_level() fires the edge callback
+    synchronously, the same way the GPIO thread would. press() and turn()
+    wait with `sleep` (VirtualClock.run_for to replay them in simulated time).
+    """
+
+    def __init__(self, levels=None, sleep=time.sleep):
+        self.levels = dict(levels or {})
+        self.sleep = sleep
+        self.callbacks = {}
+        self._lock = threading.Lock()
+
+    def read(self, pin):
+        return self.levels.get(pin, 1)
+
+    def watch(self, pin, callback):
+        self.callbacks[pin] = callback
+
+    def unwatch(self, pin):
+        self.callbacks.pop(pin, None)
+
+    def set_level(self, pin, level):
+        with self._lock:
+            if self.levels.get(pin, 1) == level:
+                return
+            self.levels[pin] = level
+            cb = self.callbacks.get(pin)
+        if cb is not None:
+            cb(pin, level)
+
+    def press(self, pin, duration=0.05):
+        self.set_level(pin, 0)
+        self.sleep(duration)
+        self.set_level(pin, 1)
+
+    def turn(self, clk, dt, direction, detents=1, delay=0.002):
+        """Emit full quadrature cycles; direction 1 = CW, -1 = CCW."""
+        for _ in range(detents):
+            if direction > 0:
+                seq = [(dt, 1), (clk, 0), (dt, 0), (clk, 1), (dt, 1)]
+            else:
+                seq = [(dt, 0), (clk, 0), (dt, 1), (clk, 1)]
+            for pin, level in seq:
+                self.set_level(pin, level)
+                self.sleep(delay)
+
+
+class QuadratureDecoder:
+    """
+    Rotary encoder decoding from the CLK/DT levels after each edge.
+
+    update() looks the move up in TRANSITIONS and keeps a count of quarter
+    cycles; a detent is reported when the knob is back at REST at least
+    half a cycle from where it left it. Contact bounce goes back and forth
+    and cancels out. A jump over a state (both lines changed: an edge
+    came and went before it was read) is taken as two quarters the way
+    the knob was already going, and counted in stats["invalid"].
+
+    Each detent's step count comes from ACCELERATION and the time since
+    the previous detent in the same direction, so a fast spin covers more
+    ground per detent.
+    """
+
+    def __init__(self, state=REST, acceleration=ACCELERATION):
+        self.state = state
+        self.acceleration = acceleration
+        self._count = 0
+        self._last = None           # (direction, time) of the previous detent
+        self.stats = {"edges": 0, "invalid": 0, "detents": 0}
+
+    def update(self, clk, dt, t):
+        """Levels after an edge at time t; (direction 1/-1, steps) at a detent, else None."""
+        new = (1 if clk else 0) << 1 | (1 if dt else 0)
+        if new == self.state:
+            return None
+        self.stats["edges"] += 1
+        move = TRANSITIONS[self.state << 2 | new]
+        self.state = new
+        if move is None:
+            self.stats["invalid"] += 1
+            move = 2 if self._count > 0 else -2 if self._count < 0 else 0
+        self._count += move
+        if new != REST:
+            return None
+        count, self._count = self._count, 0
+        if -2 < count < 2:
+            return None
+        direction = 1 if count > 0 else -1
+        steps = 1
+        if self._last is not None and self._last[0] == direction:
+            gap = t - self._last[1]
+            steps = next((n for limit, n in self.acceleration if gap < limit), 1)
+        self._last = (direction, t)
+        self.stats["detents"] += 1
+        return direction, steps
+
+
+class InputDispatcher:
+    """
+    Single consumer for every input edge.
+
+    Edge callbacks only timestamp the edge and put it on a queue; one
+    dispatcher thread debounces buttons, decodes the encoder and invokes
+    callback(event_type, name), where event_type is one of
+    "down", "up", "short", "long" for buttons. The encoder's detents are
+    callback("cw" or "ccw", "encoder", steps), steps from its
+    QuadratureDecoder (1 unless the knob is spun fast). Nothing polls:
+    the thread sleeps on the queue until an edge arrives or a debounce
+    timer expires.
+
+    clock is a hal clock (RealClock or VirtualClock); edges are timed and
+    debounced on it. None means time.monotonic.
+    """
+
+    def __init__(self, backend, buttons, encoder=None,
+                 long_press=LONG_PRESS, debounce=DEBOUNCE, clock=None):
+        self.backend = backend
+        self.buttons = dict(buttons)
+        self.encoder = encoder
+        self.long_press = long_press
+        self.debounce = debounce
+        self.events = collections.deque()
+        self._now = time.monotonic if clock is None else clock.monotonic
+        self._wake = threading.Event() if clock is None else clock.Event()
+        self.callback = None
+        self._pin_to_button = {pin: name for name, pin in self.buttons.items()}
+        self._state = {}
+        self._settle = {}
+        self._levels = {}
+        self.decoder = QuadratureDecoder()
+        self._running = False
+        self._thread = None
+
+    # ----- edge intake (GPIO thread) -----
+    def _on_edge(self, pin, level):
+        self.events.append((pin, level, self._now()))
+        self._wake.set()
+
+    # ----- lifecycle -----
+    def start(self, callback):
+        """Run the dispatcher in a daemon thread."""
+        self._thread = threading.Thread(target=self.run, args=(callback,), daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def run(self, callback):
+        """Register edge sources and dispatch events in the calling thread."""
+        self.callback = callback
+        self._running = True
+        now = self._now()
+        for name, pin in self.buttons.items():
+            level = self.backend.read(pin)
+            self._state[name] = {"level": level, "since": now}
+            self.backend.watch(pin, self._on_edge)
+        if self.encoder is not None:
+            for pin in self.encoder:
+                self._levels[pin] = self.backend.read(pin)
+                self.backend.watch(pin, self._on_edge)
+            self.decoder.state = self._levels[self.encoder[0]] << 1 | self._levels[self.encoder[1]]
+
+        while self._running:
+            timeout = None
+            if self._settle:
+                timeout = max(0.0, min(self._settle.values()) - self._now())
+            if not self.events:
+                self._wake.wait(timeout)
+            self._wake.clear()
+            item = self.events.popleft() if self.events else None
+            if item is None:
+                self._settle_buttons(self._now())
+                continue
+            pin, level, t = item
+            if pin in self._pin_to_button:
+                self._settle[self._pin_to_button[pin]] = t + self.debounce
+            elif self.encoder is not None and pin in self.encoder:
+                self._encoder_edge(pin, level, t)
+            self._settle_buttons(self._now())
+
+    def stop(self):
+        self._running = False
+        self.events.append(None)
+        self._wake.set()
+        for pin in list(self.buttons.values()) + list(self.encoder or ()):
+            self.backend.unwatch(pin)
+
+    # ----- buttons -----
+    def _settle_buttons(self, now):
+        for name, deadline in list(self._settle.items()):
+            if deadline > now:
+                continue
+            del self._settle[name]
+            level = self.backend.read(self.buttons[name])
+            st = self._state[name]
+            if level == st["level"]:
+                continue
+            held = now - st["since"]
+            st["level"] = level
+            st["since"] = now
+            if level == 0:
+                self._emit("down", name)
+            else:
+                self._emit("up", name)
+                self._emit("long" if held >= self.long_press else "short", name)
+
+    # ----- encoder -----
+    def _encoder_edge(self, pin, level, t):
+        clk, dt = self.encoder
+        if self._levels.get(pin) == level:
+            return
+        self._levels[pin] = level
+        detent = self.decoder.update(self._levels[clk], self._levels[dt], t)
+        if detent is not None:
+            direction, steps = detent
+            self._emit("cw" if direction > 0 else "ccw", "encoder", steps)
+
+    def _emit(self, event_type, name, *args):
+        try:
+            self.callback(event_type, name, *args)
+        except Exception as e:
+            print(f"[INPUT] handler error for {event_type}/{name}: {e}")
@@ -0,0 +1,52 @@
+import threading
+
+
+class PixelOutput:
+    """
+    Last-committed state of a NeoPixel strip made with auto_write=False.
+
+    set() writes a pixel's color and the strip brightness into the strip
+    and calls show() once, and only when the light that comes out changes
+    (colors scaled by brightness, as the strip sends them). Repeating the
+    current state, or recoloring a pixel while brightness is 0, costs no
+    transfer on the data pin.
+
+    stats counts set() calls ("requests"), strip.show() calls ("shows") and
+    the requests that needed none ("skipped").
+    """
+
+    def __init__(self, strip):
+        self.strip = strip
+        self._lock = threading.Lock()
+        self._colors = [None] * len(strip)      # what set() last asked for
+        self._brightness = None
+        self._shown = [None] * len(strip)       # scaled colors at the last show()
+        self.stats = {"requests": 0, "shows": 0, "skipped": 0}
+
+    @staticmethod
+    def _scaled(color, brightness):
+        return tuple(int(c * brightness) for c in color)
+
+    def set(self, index, color, brightness=None):
+        """Color of pixel index and, if given, the strip brightness; True if shown."""
+        color = tuple(int(c) for c in color)
+        with self._lock:
+            self.stats["requests"] += 1
+            if color == self._colors[index] and brightness in (None, self._brightness):
+                self.stats["skipped"] += 1
+                return False
+            if brightness is not None and brightness != self._brightness:
+                self._brightness = brightness
+                self.strip.brightness = brightness
+            if color != self._colors[index]:
+                self._colors[index] = color
+                self.strip[index] = color
+            b = 1.0 if self._brightness is None else self._brightness
+            shown = [None if c is None else self._scaled(c, b) for c in self._colors]
+            if shown == self._shown:
+                self.stats["skipped"] += 1
+                return False
+            self.strip.show()
+            self._shown = shown
+            self.stats["shows"] += 1
+            return True
@@ -30,8 +30,8 @@
 
 import logging
 from . import epdconfig
+from . import epdbuffer
 from PIL import Image
-import RPi.GPIO as GPIO
 
 # Display resolution
 EPD_WIDTH       = 104
@@ -47,6 +47,7 @@ class EPD:
         self.cs_pin = epdconfig.CS_PIN
         self.width = EPD_WIDTH
         self.height = EPD_HEIGHT
+        self.frame = epdbuffer.FrameBuffer((self.width + 7) // 8 * self.height)
 
     lut_vcomDC = [  
         0x00, 0x08, 0x00, 0x00, 0x00, 0x02,
@@ -180,9 +181,7 @@ class EPD:
     
     def ReadBusy(self):
         logger.debug("e-Paper busy")
-        while(epdconfig.digital_read(self.busy_pin) == 0):      # 0: idle, 1: busy
-            self.send_command(0x71)
-            epdconfig.delay_ms(100)  
+        epdconfig.wait_busy(self.busy_pin, 0, __name__, poll_ms=100, poll=lambda: self.send_command(0x71))      # 0: idle, 1: busy
         logger.debug("e-Paper busy release")
         
     def TurnOnDisplay(self):
@@ -262,28 +261,7 @@ class EPD:
         self.send_data2(self.lut_bb1)
 
     def getbuffer(self, image):
-        # logger.debug("bufsiz = ",int(self.width/8) * self.height)
-        buf = [0xFF] * (int(self.width/8) * self.height)
-        image_monocolor = image.convert('1')
-        imwidth, imheight = image_monocolor.size
-        pixels = image_monocolor.load()
-        # logger.debug("imwidth = %d, imheight = %d",imwidth,imheight)
-        if(imwidth == self.width and imheight == self.height):
-            logger.debug("Vertical")
-            for y in range(imheight):
-                for x in range(imwidth):
-                    # Set the bits for the column of pixels at the current position.
-                    if pixels[x, y] == 0:
-                        buf[int((x + y * self.width) / 8)] &= ~(0x80 >> (x % 8))
-        elif(imwidth == self.height and imheight == self.width):
-            logger.debug("Horizontal")
-            for y in range(imheight):
-                for x in range(imwidth):
-                    newx = y
-                    newy = self.height - x - 1
-                    if pixels[x, y] == 0:
-                        buf[int((newx + newy*self.width) / 8)] &= ~(0x80 >> (y % 8))
-        return buf
+        return epdbuffer.pack_1bpp(image, self.width, self.height)
 
     def display(self, image):
         if (Image == None):
@@ -295,7 +273,7 @@ class EPD:
             linewidth = int(self.width/8) + 1
 
         self.send_command(0x10)
-        self.send_data2([0x00] * self.height * linewidth)
+        self.send_data2(epdbuffer.fill(0x00, self.height * linewidth))
         epdconfig.delay_ms(10)
         
         self.send_command(0x13)
@@ -320,15 +298,7 @@ class EPD:
         self.send_data(self.height % 256 - 1)
         self.send_data(0x28)
         
-        if self.width%8 == 0:
-            linewidth = int(self.width/8)
-        else:
-            linewidth = int(self.width/8) + 1
-
-        buf = [0x00] * self.height * linewidth
-
-        for i in range(self.height * linewidth):
-            buf[i] = ~image[i]
+        buf = self.frame.invert(image)
         
         self.send_command(0x10)
         self.send_data2(image)
@@ -348,11 +318,11 @@ class EPD:
             linewidth = int(self.width/8) + 1
 
         self.send_command(0x10)
-        self.send_data2([0x00] * self.height * linewidth)
+        self.send_data2(epdbuffer.fill(0x00, self.height * linewidth))
         epdconfig.delay_ms(10)
         
         self.send_command(0x13)
-        self.send_data2([0xFF] * self.height * linewidth)
+        self.send_data2(epdbuffer.fill(0xFF, self.height * linewidth))
         epdconfig.delay_ms(10)
         
         self.SetFullReg()
@@ -29,6 +29,7 @@
 
 import logging
 from . import epdconfig
+from . import epdbuffer
 
 # Display resolution
 EPD_WIDTH       = 152
@@ -44,6 +45,7 @@ class EPD:
         self.cs_pin = epdconfig.CS_PIN
         self.width = EPD_WIDTH
         self.height = EPD_HEIGHT
+        self.frame = epdbuffer.FrameBuffer((self.width + 7) // 8 * self.height)
         
     # Hardware reset
     def reset(self):
@@ -78,8 +80,7 @@ class EPD:
 
     def ReadBusy(self):
         logger.debug("e-Paper busy")
-        while(epdconfig.digital_read(self.busy_pin) == 1):      #  0: idle, 1: busy
-            epdconfig.delay_ms(20) 
+        epdconfig.wait_busy(self.busy_pin, 1, __name__, poll_ms=20)      #  0: idle, 1: busy
         logger.debug("e-Paper busy release") 
 
 
@@ -131,35 +132,12 @@ class EPD:
         self.ReadBusy()
 
     def getbuffer(self, image):
-        # logger.debug("bufsiz = ",int(self.width/8) * self.height)
-        buf = [0xFF] * (int(self.width/8) * self.height)
-        image_monocolor = image.convert('1')
-        imwidth, imheight = image_monocolor.size
-        pixels = image_monocolor.load()
-        # logger.debug("imwidth = %d, imheight = %d",imwidth,imheight)
-        if(imwidth == self.width and imheight == self.height):
-            logger.debug("Vertical")
-            for y in range(imheight):
-                for x in range(imwidth):
-                    # Set the bits for the column of pixels at the current position.
-                    if pixels[x, y] == 0:
-                        buf[int((x + y * self.width) / 8)] &= ~(0x80 >> (x % 8))
-        elif(imwidth == self.height and imheight == self.width):
-            logger.debug("Horizontal")
-            for y in range(imheight):
-                for x in range(imwidth):
-                    newx = y
-                    newy = self.height - x - 1
-                    if pixels[x, y] == 0:
-                        buf[int((newx + newy*self.width) / 8)] &= ~(0x80 >> (y % 8))
-        return buf
+        return epdbuffer.pack_1bpp(image, self.width, self.height)
 
     def display(self, Blackimage, Redimage):
         if (Blackimage == None or Redimage == None):
             return   
-        Redimage_1 = [0x00] * len(Redimage)
-        for i in range(len(Redimage)) :
-            Redimage_1[i] = ~Redimage[i]    
+        Redimage_1 = self.frame.invert(Redimage)
         self.send_command(0x24)
         self.send_data2(Blackimage) 
 
@@ -176,10 +154,10 @@ class EPD:
             linewidth = int(self.width/8) + 1
 
         self.send_command(0x24)
-        self.send_data2([0xff] * int(self.height * linewidth)) 
+        self.send_data2(epdbuffer.fill(0xff, int(self.height * linewidth))) 
 
         self.send_command(0x26)
-        self.send_data2([0x00] * int(self.height * linewidth))
+        self.send_data2(epdbuffer.fill(0x00, int(self.height * linewidth)))
 
         self.turnon_display()
 
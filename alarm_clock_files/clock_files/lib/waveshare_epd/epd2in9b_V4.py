@@ -30,6 +30,8 @@
 
 import logging
 from . import epdconfig
+from . import epdbuffer
+from . import framediff
 
 # Display resolution
 EPD_WIDTH       = 128
@@ -45,6 +47,7 @@ class EPD:
         self.cs_pin = epdconfig.CS_PIN
         self.width = EPD_WIDTH
         self.height = EPD_HEIGHT
+        self.frame = epdbuffer.FrameBuffer()
         
     # Hardware reset
     def reset(self):
@@ -77,8 +80,7 @@ class EPD:
     def ReadBusy(self):
         logger.debug("e-Paper busy")
         self.send_command(0X71)
-        while(epdconfig.digital_read(self.busy_pin) == 1):      #  0: idle, 1: busy
-            epdconfig.delay_ms(200)                
+        epdconfig.wait_busy(self.busy_pin, 1, __name__, poll_ms=200)      #  0: idle, 1: busy
         logger.debug("e-Paper busy release")
         
 
@@ -211,60 +213,25 @@ class EPD:
         return 0
 
     def getbuffer(self, image):
-        # logger.debug("bufsiz = ",int(self.width/8) * self.height)
-        buf = [0xFF] * (int(self.width/8) * self.height)
-        image_monocolor = image.convert('1')
-        imwidth, imheight = image_monocolor.size
-        pixels = image_monocolor.load()
-        # logger.debug("imwidth = %d, imheight = %d",imwidth,imheight)
-        if(imwidth == self.width and imheight == self.height):
-            logger.debug("Vertical")
-            for y in range(imheight):
-                for x in range(imwidth):
-                    # Set the bits for the column of pixels at the current position.
-                    if pixels[x, y] == 0:
-                        buf[int((x + y * self.width) / 8)] &= ~(0x80 >> (x % 8))
-        elif(imwidth == self.height and imheight == self.width):
-            logger.debug("Horizontal")
-            for y in range(imheight):
-                for x in range(imwidth):
-                    newx = y
-                    newy = self.height - x - 1
-                    if pixels[x, y] == 0:
-                        buf[int((newx + newy*self.width) / 8)] &= ~(0x80 >> (y % 8))
-        return buf
+        return epdbuffer.pack_1bpp(image, self.width, self.height)
 
     def display(self, blackimage, ryimage): # ryimage: red or yellow image
-        if(self.width % 8 == 0):
-            Width = self.width // 8
-        else:
-            Width = self.width // 8 +1
-        Height = self.height
         if (blackimage != None):
             self.send_command(0x24)
             self.send_data2(blackimage)        
         if (ryimage != None):
-            for j in range(Height):
-                for i in range(Width):
-                    ryimage[i + j * Width] = ~ryimage[i + j * Width]
+            ryimage = epdbuffer.invert(ryimage)
             self.send_command(0x26)
             self.send_data2(ryimage)
 
         self.TurnOnDisplay()
 
     def display_Fast(self, blackimage, ryimage): # ryimage: red or yellow image
-        if(self.width % 8 == 0):
-            Width = self.width // 8
-        else:
-            Width = self.width // 8 +1
-        Height = self.height
         if (blackimage != None):
             self.send_command(0x24)
             self.send_data2(blackimage)        
         if (ryimage != None):
-            for j in range(Height):
-                for i in range(Width):
-                    ryimage[i + j * Width] = ~ryimage[i + j * Width]
+            ryimage = epdbuffer.invert(ryimage)
             self.send_command(0x26)
             self.send_data2(ryimage)
 
@@ -272,42 +239,33 @@ class EPD:
         
     def Clear(self):
         self.send_command(0x24)
-        self.send_data2([0xff] * int(self.width * self.height // 8))
+        self.send_data2(epdbuffer.fill(0xff, int(self.width * self.height // 8)))
         self.send_command(0x26)
-        self.send_data2([0x00] * int(self.width * self.height // 8))
+        self.send_data2(epdbuffer.fill(0x00, int(self.width * self.height // 8)))
 
         self.TurnOnDisplay()
 
     def Clear_Fast(self):
         self.send_command(0x24)
-        self.send_data2([0xff] * int(self.width * self.height // 8))
+        self.send_data2(epdbuffer.fill(0xff, int(self.width * self.height // 8)))
         self.send_command(0x26)
-        self.send_data2([0x00] * int(self.width * self.height // 8))
+        self.send_data2(epdbuffer.fill(0x00, int(self.width * self.height // 8)))
 
         self.TurnOnDisplay_Fast()
 
     def display_Base(self, blackimage, ryimage):
-        if(self.width % 8 == 0):
-            Width = self.width // 8
-        else:
-            Width = self.width // 8 +1
-        Height = self.height
         if (blackimage != None):
             self.send_command(0x24)
             self.send_data2(blackimage)        
         if (ryimage != None):
-            for j in range(Height):
-                for i in range(Width):
-                    ryimage[i + j * Width] = ~ryimage[i + j * Width]
+            ryimage = epdbuffer.invert(ryimage)
             self.send_command(0x26)
             self.send_data2(ryimage)
 
         self.TurnOnDisplay_Base()
 
         if (blackimage != None):
-            for j in range(Height):
-                for i in range(Width):
-                    blackimage[i + j * Width] = ~blackimage[i + j * Width]
+            blackimage = epdbuffer.invert(blackimage)
             self.send_command(0x26)
             self.send_data2(blackimage)
         else:
@@ -326,9 +284,7 @@ class EPD:
                 self.send_data(color)
                 
         self.send_command(0x26)  #Write Black and White image to RAM
-        for j in range(Height):
-            for i in range(Width):
-                self.send_data(~color)
+        self.send_data2(epdbuffer.fill(~color, Width * Height))
         
         self.TurnOnDisplay_Base()
         self.send_command(0x26)   #Write Black and White image to RAM
@@ -337,24 +293,9 @@ class EPD:
                 self.send_data(color) 
 
     def display_Partial(self, Image, Xstart, Ystart, Xend, Yend):
-        if((Xstart % 8 + Xend % 8 == 8 & Xstart % 8 > Xend % 8) | Xstart % 8 + Xend % 8 == 0 | (Xend - Xstart)%8 == 0):
-            Xstart = Xstart // 8
-            Xend = Xend // 8
-        else:
-            Xstart = Xstart // 8 
-            if Xend % 8 == 0:
-                Xend = Xend // 8
-            else:
-                Xend = Xend // 8 + 1
-                
-        if(self.width % 8 == 0):
-            Width = self.width // 8
-        else:
-            Width = self.width // 8 +1
-        Height = self.height
-
-        Xend -= 1
-        Yend -= 1
+        linewidth = framediff.line_bytes(self.width)
+        window = framediff.pixel_window(Xstart, Ystart, Xend, Yend)
+        Xstart, Xend, Ystart, Yend = window
 	
         self.send_command(0x44)       # set RAM x address start/end, in page 35
         self.send_data(Xstart & 0xff)    # RAM x address start at 00h
@@ -372,10 +313,7 @@ class EPD:
         self.send_data((Ystart>>8) & 0x01)
 
         self.send_command(0x24)   #Write Black and White image to RAM
-        for j in range(Height):
-            for i in range(Width):
-                if((j > Ystart-1) & (j < (Yend + 1)) & (i > Xstart-1) & (i < (Xend + 1))):
-                    self.send_data(Image[i + j * Width])
+        self.send_data2(self.frame.window(Image, linewidth, window))
         self.TurnOnDisplay_Partial()
         
     def sleep(self):
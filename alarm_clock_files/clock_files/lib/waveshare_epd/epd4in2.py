@@ -30,8 +30,9 @@
 
 import logging
 from . import epdconfig
-from PIL import Image
-import RPi.GPIO as GPIO
+from . import epdbuffer
+from . import framediff
+from . import epdseq
 
 # Display resolution
 EPD_WIDTH  = 400
@@ -53,11 +54,12 @@ class EPD:
         self.cs_pin = epdconfig.CS_PIN
         self.width = EPD_WIDTH
         self.height = EPD_HEIGHT
+        self.frame = epdbuffer.FrameBuffer((self.width + 7) // 8 * self.height)
         self.GRAY1 = GRAY1  # white
         self.GRAY2 = GRAY2
         self.GRAY3 = GRAY3  # gray
         self.GRAY4 = GRAY4  # Blackest
-        self.DATA = [0x00] * 15000
+        self.DATA = bytearray((self.width + 7) // 8 * self.height)
 
     lut_vcom0 = [
         0x00, 0x08, 0x08, 0x00, 0x00, 0x02,
@@ -250,62 +252,47 @@ class EPD:
         epdconfig.spi_writebyte2(data)
         epdconfig.digital_write(self.cs_pin, 1)
 
-    def ReadBusy(self):
-        self.send_command(0x71)
-        while epdconfig.digital_read(self.busy_pin) == 0:  # 0: idle, 1: busy
-            self.send_command(0x71)
-            epdconfig.delay_ms(100)
-
-    def set_lut(self):
-        self.send_command(0x20)  # vcom
-        self.send_data2(self.lut_vcom0)
-
-        self.send_command(0x21)  # ww --
-        self.send_data2(self.lut_ww)
-
-        self.send_command(0x22)  # bw r
-        self.send_data2(self.lut_bw)
-
-        self.send_command(0x23)  # wb w
-        self.send_data2(self.lut_bb)
-
-        self.send_command(0x24)  # bb b
-        self.send_data2(self.lut_wb)
-
-    def Partial_SetLut(self):
-        self.send_command(0x20)
-        self.send_data2(self.EPD_4IN2_Partial_lut_vcom1)
-
-        self.send_command(0x21)
-        self.send_data2(self.EPD_4IN2_Partial_lut_ww1)
-
-        self.send_command(0x22)
-        self.send_data2(self.EPD_4IN2_Partial_lut_bw1)
-
-        self.send_command(0x23)
-        self.send_data2(self.EPD_4IN2_Partial_lut_wb1)
-
-        self.send_command(0x24)
-        self.send_data2(self.EPD_4IN2_Partial_lut_bb1)
-
-    def Gray_SetLut(self):
-        self.send_command(0x20)  # vcom
-        self.send_data2(self.EPD_4IN2_4Gray_lut_vcom)
-
-        self.send_command(0x21)  # red not use
-        self.send_data2(self.EPD_4IN2_4Gray_lut_ww)
-
-        self.send_command(0x22)  # bw r
-        self.send_data2(self.EPD_4IN2_4Gray_lut_bw)
-
-        self.send_command(0x23)  # wb w
-        self.send_data2(self.EPD_4IN2_4Gray_lut_wb)
-
-        self.send_command(0x24)  # bb b
-        self.send_data2(self.EPD_4IN2_4Gray_lut_bb)
+    # send a batched sequence (epdseq), one DC write and SPI write per run
+    def send_seq(self, seq):
+        epdconfig.digital_write(self.cs_pin, 0)
+        for dc, data in seq.runs:
+            epdconfig.digital_write(self.dc_pin, dc)
+            epdconfig.spi_writebyte2(data)
+        epdconfig.digital_write(self.cs_pin, 1)
 
-        self.send_command(0x25)  # vcom
-        self.send_data2(self.EPD_4IN2_4Gray_lut_ww)
+    def ReadBusy(self):
+        epdconfig.wait_busy(self.busy_pin, 0, __name__, poll_ms=100, poll=lambda: self.send_command(0x71))  # 0: idle, 1: busy
+
+    def set_lut(self, seq=None):
+        out = epdseq.Sequence() if seq is None else seq
+        out.command(0x20).data_bytes(self.lut_vcom0)  # vcom
+        out.command(0x21).data_bytes(self.lut_ww)  # ww --
+        out.command(0x22).data_bytes(self.lut_bw)  # bw r
+        out.command(0x23).data_bytes(self.lut_bb)  # wb w
+        out.command(0x24).data_bytes(self.lut_wb)  # bb b
+        if seq is None:
+            self.send_seq(out)
+
+    def Partial_SetLut(self, seq=None):
+        out = epdseq.Sequence() if seq is None else seq
+        out.command(0x20).data_bytes(self.EPD_4IN2_Partial_lut_vcom1)
+        out.command(0x21).data_bytes(self.EPD_4IN2_Partial_lut_ww1)
+        out.command(0x22).data_bytes(self.EPD_4IN2_Partial_lut_bw1)
+        out.command(0x23).data_bytes(self.EPD_4IN2_Partial_lut_wb1)
+        out.command(0x24).data_bytes(self.EPD_4IN2_Partial_lut_bb1)
+        if seq is None:
+            self.send_seq(out)
+
+    def Gray_SetLut(self, seq=None):
+        out = epdseq.Sequence() if seq is None else seq
+        out.command(0x20).data_bytes(self.EPD_4IN2_4Gray_lut_vcom)  # vcom
+        out.command(0x21).data_bytes(self.EPD_4IN2_4Gray_lut_ww)  # red not use
+        out.command(0x22).data_bytes(self.EPD_4IN2_4Gray_lut_bw)  # bw r
+        out.command(0x23).data_bytes(self.EPD_4IN2_4Gray_lut_wb)  # wb w
+        out.command(0x24).data_bytes(self.EPD_4IN2_4Gray_lut_bb)  # bb b
+        out.command(0x25).data_bytes(self.EPD_4IN2_4Gray_lut_ww)  # vcom
+        if seq is None:
+            self.send_seq(out)
 
     def init(self):
         if epdconfig.module_init() != 0:
@@ -313,40 +300,22 @@ class EPD:
         # EPD hardware init start
         self.reset()
 
-        self.send_command(0x01)  # POWER SETTING
-        self.send_data(0x03)  # VDS_EN, VDG_EN
-        self.send_data(0x00)  # VCOM_HV, VGHL_LV[1], VGHL_LV[0]
-        self.send_data(0x2b)  # VDH
-        self.send_data(0x2b)  # VDL
-
-        self.send_command(0x06)  # boost soft start
-        self.send_data(0x17)
-        self.send_data(0x17)
-        self.send_data(0x17)
-
-        self.send_command(0x04)  # POWER_ON
+        self.send_seq(epdseq.Sequence()
+                      .command(0x01, 0x03, 0x00, 0x2b, 0x2b)  # POWER SETTING: VDS_EN VDG_EN, VCOM_HV VGHL_LV, VDH, VDL
+                      .command(0x06, 0x17, 0x17, 0x17)  # boost soft start
+                      .command(0x04))  # POWER_ON
         self.ReadBusy()
 
-        self.send_command(0x00)  # panel setting
-        self.send_data(0xbf)  # KW-BF   KWR-AF  BWROTP 0f
-
-        self.send_command(0x30)  # PLL setting
-        self.send_data(0x3c)  # 3A 100HZ   29 150Hz 39 200HZ  31 171HZ
-
-        self.send_command(0x61)  # resolution setting
-        self.send_data(0x01)
-        self.send_data(0x90)  # 128
-        self.send_data(0x01)
-        self.send_data(0x2c)
-
-        self.send_command(0x82)  # vcom_DC setting
-        self.send_data(0x12)
-
-        self.send_command(0X50)  # VCOM AND DATA INTERVAL SETTING
-        self.send_data(
-            0x97)  # 97white border 77black border  VBDF 17|D7 VBDW 97 VBDB 57  VBDF F7 VBDW 77 VBDB 37  VBDR B7
-
-        self.set_lut()
+        seq = epdseq.Sequence()
+        seq.command(0x00, 0xbf)  # panel setting: KW-BF   KWR-AF  BWROTP 0f
+        seq.command(0x30, 0x3c)  # PLL setting: 3A 100HZ   29 150Hz 39 200HZ  31 171HZ
+        seq.command(0x61, 0x01, 0x90, 0x01, 0x2c)  # resolution setting: 400 x 300
+        seq.command(0x82, 0x12)  # vcom_DC setting
+        # VCOM AND DATA INTERVAL SETTING
+        # 97white border 77black border  VBDF 17|D7 VBDW 97 VBDB 57  VBDF F7 VBDW 77 VBDB 37  VBDR B7
+        seq.command(0X50, 0x97)
+        self.set_lut(seq)
+        self.send_seq(seq)
         # EPD hardware init end
         return 0
 
@@ -356,40 +325,22 @@ class EPD:
         # EPD hardware init start
         self.reset()
 
-        self.send_command(0x01)  # POWER SETTING
-        self.send_data(0x03)  # VDS_EN, VDG_EN
-        self.send_data(0x00)  # VCOM_HV, VGHL_LV[1], VGHL_LV[0]
-        self.send_data(0x2b)  # VDH
-        self.send_data(0x2b)  # VDL
-
-        self.send_command(0x06)  # boost soft start
-        self.send_data(0x17)
-        self.send_data(0x17)
-        self.send_data(0x17)
-
-        self.send_command(0x04)  # POWER_ON
+        self.send_seq(epdseq.Sequence()
+                      .command(0x01, 0x03, 0x00, 0x2b, 0x2b)  # POWER SETTING: VDS_EN VDG_EN, VCOM_HV VGHL_LV, VDH, VDL
+                      .command(0x06, 0x17, 0x17, 0x17)  # boost soft start
+                      .command(0x04))  # POWER_ON
         self.ReadBusy()
 
-        self.send_command(0x00)  # panel setting
-        self.send_data(0xbf)  # KW-BF   KWR-AF  BWROTP 0f
-
-        self.send_command(0x30)  # PLL setting
-        self.send_data(0x3c)  # 3A 100HZ   29 150Hz 39 200HZ  31 171HZ
-
-        self.send_command(0x61)  # resolution setting
-        self.send_data(0x01)
-        self.send_data(0x90)  # 128
-        self.send_data(0x01)
-        self.send_data(0x2c)
-
-        self.send_command(0x82)  # vcom_DC setting
-        self.send_data(0x12)
-
-        self.send_command(0X50)  # VCOM AND DATA INTERVAL SETTING
-        self.send_data(
-            0x07)  # 97white border 77black border  VBDF 17|D7 VBDW 97 VBDB 57  VBDF F7 VBDW 77 VBDB 37  VBDR B7
-
-        self.Partial_SetLut()
+        seq = epdseq.Sequence()
+        seq.command(0x00, 0xbf)  # panel setting: KW-BF   KWR-AF  BWROTP 0f
+        seq.command(0x30, 0x3c)  # PLL setting: 3A 100HZ   29 150Hz 39 200HZ  31 171HZ
+        seq.command(0x61, 0x01, 0x90, 0x01, 0x2c)  # resolution setting: 400 x 300
+        seq.command(0x82, 0x12)  # vcom_DC setting
+        # VCOM AND DATA INTERVAL SETTING
+        # 97white border 77black border  VBDF 17|D7 VBDW 97 VBDB 57  VBDF F7 VBDW 77 VBDB 37  VBDR B7
+        seq.command(0X50, 0x07)
+        self.Partial_SetLut(seq)
+        self.send_seq(seq)
         # EPD hardware init end
         return 0
 
@@ -399,103 +350,24 @@ class EPD:
         # EPD hardware init start
         self.reset()
 
-        self.send_command(0x01)  # POWER SETTING
-        self.send_data(0x03)
-        self.send_data(0x00)  # VGH=20V,VGL=-20V
-        self.send_data(0x2b)  # VDH=15V
-        self.send_data(0x2b)  # VDL=-15V
-        self.send_data(0x13)
-
-        self.send_command(0x06)  # booster soft start
-        self.send_data(0x17)  # A
-        self.send_data(0x17)  # B
-        self.send_data(0x17)  # C
-
-        self.send_command(0x04)
+        self.send_seq(epdseq.Sequence()
+                      .command(0x01, 0x03, 0x00, 0x2b, 0x2b, 0x13)  # POWER SETTING: VGH=20V,VGL=-20V, VDH=15V, VDL=-15V
+                      .command(0x06, 0x17, 0x17, 0x17)  # booster soft start A, B, C
+                      .command(0x04))
         self.ReadBusy()
 
-        self.send_command(0x00)  # panel setting
-        self.send_data(0x3f)  # KW-3f   KWR-2F BWROTP 0f BWOTP 1f
-
-        self.send_command(0x30)  # PLL setting
-        self.send_data(0x3c)  # 100hz
-
-        self.send_command(0x61)  # resolution setting
-        self.send_data(0x01)  # 400
-        self.send_data(0x90)
-        self.send_data(0x01)  # 300
-        self.send_data(0x2c)
-
-        self.send_command(0x82)  # vcom_DC setting
-        self.send_data(0x12)
-
-        self.send_command(0X50)  # VCOM AND DATA INTERVAL SETTING
-        self.send_data(0x97)
+        self.send_seq(epdseq.Sequence()
+                      .command(0x00, 0x3f)  # panel setting: KW-3f   KWR-2F BWROTP 0f BWOTP 1f
+                      .command(0x30, 0x3c)  # PLL setting: 100hz
+                      .command(0x61, 0x01, 0x90, 0x01, 0x2c)  # resolution setting: 400 x 300
+                      .command(0x82, 0x12)  # vcom_DC setting
+                      .command(0X50, 0x97))  # VCOM AND DATA INTERVAL SETTING
 
     def getbuffer(self, image):
-        # logger.debug("bufsiz = ",int(self.width/8) * self.height)
-        buf = [0xFF] * (int(self.width / 8) * self.height)
-        image_monocolor = image.convert('1')
-        imwidth, imheight = image_monocolor.size
-        pixels = image_monocolor.load()
-        # logger.debug("imwidth = %d, imheight = %d",imwidth,imheight)
-        if imwidth == self.width and imheight == self.height:
-            logger.debug("Horizontal")
-            for y in range(imheight):
-                for x in range(imwidth):
-                    # Set the bits for the column of pixels at the current position.
-                    if pixels[x, y] == 0:
-                        buf[int((x + y * self.width) / 8)] &= ~(0x80 >> (x % 8))
-        elif imwidth == self.height and imheight == self.width:
-            logger.debug("Vertical")
-            for y in range(imheight):
-                for x in range(imwidth):
-                    newx = y
-                    newy = self.height - x - 1
-                    if pixels[x, y] == 0:
-                        buf[int((newx + newy * self.width) / 8)] &= ~(0x80 >> (y % 8))
-        return buf
+        return epdbuffer.pack_1bpp(image, self.width, self.height)
 
     def getbuffer_4Gray(self, image):
-        # logger.debug("bufsiz = ",int(self.width/8) * self.height)
-        buf = [0xFF] * (int(self.width / 4) * self.height)
-        image_monocolor = image.convert('L')
-        imwidth, imheight = image_monocolor.size
-        pixels = image_monocolor.load()
-        i = 0
-        # logger.debug("imwidth = %d, imheight = %d",imwidth,imheight)
-        if imwidth == self.width and imheight == self.height:
-            logger.debug("Vertical")
-            for y in range(imheight):
-                for x in range(imwidth):
-                    # Set the bits for the column of pixels at the current position.
-                    if pixels[x, y] == 0xC0:
-                        pixels[x, y] = 0x80
-                    elif pixels[x, y] == 0x80:
-                        pixels[x, y] = 0x40
-                    i = i + 1
-                    if i % 4 == 0:
-                        buf[int((x + (y * self.width)) / 4)] = (
-                                    (pixels[x - 3, y] & 0xc0) | (pixels[x - 2, y] & 0xc0) >> 2 | (
-                                        pixels[x - 1, y] & 0xc0) >> 4 | (pixels[x, y] & 0xc0) >> 6)
-
-        elif imwidth == self.height and imheight == self.width:
-            logger.debug("Horizontal")
-            for x in range(imwidth):
-                for y in range(imheight):
-                    newx = y
-                    newy = x
-                    if pixels[x, y] == 0xC0:
-                        pixels[x, y] = 0x80
-                    elif pixels[x, y] == 0x80:
-                        pixels[x, y] = 0x40
-                    i = i + 1
-                    if i % 4 == 0:
-                        buf[int((newx + (newy * self.width)) / 4)] = (
-                                    (pixels[x, y - 3] & 0xc0) | (pixels[x, y - 2] & 0xc0) >> 2 | (
-                                        pixels[x, y - 1] & 0xc0) >> 4 | (pixels[x, y] & 0xc0) >> 6)
-
-        return buf
+        return epdbuffer.pack_4gray(image, self.width, self.height, transpose=True)
 
     def display(self, image):
         if self.width % 8 == 0:
@@ -503,13 +375,15 @@ class EPD:
         else:
             linewidth = int(self.width / 8) + 1
 
-        self.send_command(0x92)
-        self.set_lut()
-        self.send_command(0x10)
-        self.send_data2([0xFF] * int(self.width * linewidth))
+        seq = epdseq.Sequence().command(0x92)
+        self.set_lut(seq)
+        self.send_seq(seq.command(0x10))
+        self.send_data2(epdbuffer.fill(0xFF, int(self.width * linewidth)))
 
         self.send_command(0x13)
         self.send_data2(image)
+        # the next partial's old data; the partial LUT wants it inverted
+        self.DATA[:] = self.frame.invert(image, len(self.DATA))
 
         self.send_command(0x12)
         self.ReadBusy()
@@ -517,50 +391,26 @@ class EPD:
     def EPD_4IN2_PartialDisplay(self, X_start, Y_start, X_end, Y_end, Image):
         # EPD_WIDTH       = 400
         # EPD_HEIGHT      = 300
-
-        if EPD_WIDTH % 8 != 0:
-            Width = int(EPD_WIDTH / 8) + 1
-        else:
-            Width = int(EPD_WIDTH / 8)
-        Height = EPD_HEIGHT
-
-        if X_start % 8 != 0:
-            X_start = int(X_start / 8) + 1
-        else:
-            X_start = int(X_start / 8)
-        if X_end % 8 != 0:
-            X_end = int(X_end / 8) + 1
-        else:
-            X_end = int(X_end / 8)
-
-        buf = [0x00] * (Y_end - Y_start) * (X_end - X_start)
-
-        self.send_command(0x91)  # This command makes the display enter partial mode
-        self.send_command(0x90)  # resolution setting
-        self.send_data(int(X_start * 8 / 256))
-        self.send_data(int(X_start * 8 % 256))  # x-start
-
-        self.send_data(int(X_end * 8 / 256))
-        self.send_data(int(X_end * 8 % 256) - 1)  # x-end
-
-        self.send_data(int(Y_start / 256))
-        self.send_data(int(Y_start % 256))  # y-start
-
-        self.send_data(int(Y_end / 256))
-        self.send_data(int(Y_end % 256) - 1)  # y-end
-        self.send_data(0x28)
+        linewidth = framediff.line_bytes(self.width)
+        window = framediff.pixel_window(X_start, Y_start, X_end, Y_end)
+        X_start, X_end = window[0] * 8, window[1] * 8 + 7
+        Y_end -= 1
+
+        self.send_seq(epdseq.Sequence()
+                      .command(0x91)  # This command makes the display enter partial mode
+                      .command(0x90,  # resolution setting
+                               X_start >> 8, X_start & 0xFF,  # x-start
+                               X_end >> 8, X_end & 0xFF,  # x-end
+                               Y_start >> 8, Y_start & 0xFF,  # y-start
+                               Y_end >> 8, Y_end & 0xFF,  # y-end
+                               0x28))
 
         self.send_command(0x10)  # writes Old data to SRAM for programming
-        for j in range(0, Y_end - Y_start):
-            for i in range(0, X_end - X_start):
-                buf[j * (X_end - X_start) + i] = self.DATA[(Y_start + j) * Width + X_start + i]
-        self.send_data2(buf)
+        self.send_data2(self.frame.window(self.DATA, linewidth, window))
 
         self.send_command(0x13)  # writes New data to SRAM.
-        for j in range(0, Y_end - Y_start):
-            for i in range(0, X_end - X_start):
-                buf[j * (X_end - X_start) + i] = ~Image[(Y_start + j) * Width + X_start + i]
-                self.DATA[(Y_start + j) * Width + X_start + i] = ~Image[(Y_start + j) * Width + X_start / 8 + i]
+        buf = self.frame.window(Image, linewidth, window, epdbuffer.INVERT_TABLE)
+        epdbuffer.store_window(self.DATA, linewidth, window, buf)
         self.send_data2(buf)
 
         self.send_command(0x12)  # DISPLAY REFRESH
@@ -568,82 +418,15 @@ class EPD:
         self.ReadBusy()
 
     def display_4Gray(self, image):
-        self.send_command(0x92)
-        self.set_lut()
-        self.send_command(0x10)
+        seq = epdseq.Sequence().command(0x92)
+        self.set_lut(seq)
+        self.send_seq(seq.command(0x10))
 
-        if self.width % 8 == 0:
-            linewidth = int(self.width / 8)
-        else:
-            linewidth = int(self.width / 8) + 1
-
-        buf = [0x00] * self.height * linewidth
-
-        for i in range(0, int(EPD_WIDTH * EPD_HEIGHT / 8)):  # EPD_WIDTH * EPD_HEIGHT / 4
-            temp3 = 0
-            for j in range(0, 2):
-                temp1 = image[i * 2 + j]
-                for k in range(0, 2):
-                    temp2 = temp1 & 0xC0
-                    if temp2 == 0xC0:
-                        temp3 |= 0x01  # white
-                    elif temp2 == 0x00:
-                        temp3 |= 0x00  # black
-                    elif temp2 == 0x80:
-                        temp3 |= 0x01  # gray1
-                    else:  # 0x40
-                        temp3 |= 0x00  # gray2
-                    temp3 <<= 1
-
-                    temp1 <<= 2
-                    temp2 = temp1 & 0xC0
-                    if temp2 == 0xC0:  # white
-                        temp3 |= 0x01
-                    elif temp2 == 0x00:  # black
-                        temp3 |= 0x00
-                    elif temp2 == 0x80:
-                        temp3 |= 0x01  # gray1
-                    else:  # 0x40
-                        temp3 |= 0x00  # gray2
-                    if j != 1 or k != 1:
-                        temp3 <<= 1
-                    temp1 <<= 2
-            buf[i] = temp3
-        self.send_data2(buf)
+        self.send_data2(self.frame.plane(image, (0, 0, 1, 1)))
 
         self.send_command(0x13)
 
-        for i in range(0, int(EPD_WIDTH * EPD_HEIGHT / 8)):  # 5808*4  46464
-            temp3 = 0
-            for j in range(0, 2):
-                temp1 = image[i * 2 + j]
-                for k in range(0, 2):
-                    temp2 = temp1 & 0xC0
-                    if temp2 == 0xC0:
-                        temp3 |= 0x01  # white
-                    elif temp2 == 0x00:
-                        temp3 |= 0x00  # black
-                    elif temp2 == 0x80:
-                        temp3 |= 0x00  # gray1
-                    else:  # 0x40
-                        temp3 |= 0x01  # gray2
-                    temp3 <<= 1
-
-                    temp1 <<= 2
-                    temp2 = temp1 & 0xC0
-                    if temp2 == 0xC0:  # white
-                        temp3 |= 0x01
-                    elif temp2 == 0x00:  # black
-                        temp3 |= 0x00
-                    elif temp2 == 0x80:
-                        temp3 |= 0x00  # gray1
-                    else:  # 0x40
-                        temp3 |= 0x01  # gray2
-                    if j != 1 or k != 1:
-                        temp3 <<= 1
-                    temp1 <<= 2
-            buf[i] = temp3
-        self.send_data2(buf)
+        self.send_data2(self.frame.plane(image, (0, 1, 0, 1)))
 
         self.Gray_SetLut()
         self.send_command(0x12)
@@ -658,10 +441,11 @@ class EPD:
             linewidth = int(self.width / 8) + 1
 
         self.send_command(0x10)
-        self.send_data2([0xff] * int(self.height * linewidth))
+        self.send_data2(epdbuffer.fill(0xff, int(self.height * linewidth)))
 
         self.send_command(0x13)
-        self.send_data2([0xff] * int(self.height * linewidth))
+        self.send_data2(epdbuffer.fill(0xff, int(self.height * linewidth)))
+        self.DATA[:] = epdbuffer.fill(0x00, len(self.DATA))
 
         self.send_command(0x12)
         self.ReadBusy()
@@ -669,8 +453,7 @@ class EPD:
     def sleep(self):
         self.send_command(0x02)  # POWER_OFF
         self.ReadBusy()
-        self.send_command(0x07)  # DEEP_SLEEP
-        self.send_data(0XA5)
+        self.send_seq(epdseq.Sequence().command(0x07, 0XA5))  # DEEP_SLEEP
 
         epdconfig.delay_ms(2000)
         epdconfig.module_exit()
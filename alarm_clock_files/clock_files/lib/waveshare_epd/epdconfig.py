@@ -31,10 +31,12 @@ import os
 import logging
 import sys
 import time
-import subprocess
 
 from ctypes import *
 
+from . import epdbusy
+from . import epdplatform
+
 logger = logging.getLogger(__name__)
 
 
@@ -95,6 +97,13 @@ class RaspberryPi:
         elif pin == self.PWR_PIN:
             return self.PWR_PIN.value
 
+    def wait_for_level(self, pin, level, timeout):
+        # Edge wait instead of polling; BUSY is a pull-down Button, so
+        # pressed means the pin is high
+        if level:
+            return self.GPIO_BUSY_PIN.wait_for_press(timeout)
+        return self.GPIO_BUSY_PIN.wait_for_release(timeout)
+
     def delay_ms(self, delaytime):
         time.sleep(delaytime / 1000.0)
 
@@ -123,9 +132,9 @@ class RaspberryPi:
                 '/usr/lib',
             ]
             self.DEV_SPI = None
+            val = epdplatform.long_bit()
+            logging.debug("System is %d bit"%val)
             for find_dir in find_dirs:
-                val = int(os.popen('getconf LONG_BIT').read())
-                logging.debug("System is %d bit"%val)
                 if val == 64:
                     so_filename = os.path.join(find_dir, 'DEV_Config_64.so')
                 else:
@@ -301,22 +310,111 @@ class SunriseX3:
         self.GPIO.cleanup([self.RST_PIN, self.DC_PIN, self.CS_PIN, self.BUSY_PIN], self.PWR_PIN)
 
 
-if sys.version_info[0] == 2:
-    process = subprocess.Popen("cat /proc/cpuinfo | grep Raspberry", shell=True, stdout=subprocess.PIPE)
-else:
-    process = subprocess.Popen("cat /proc/cpuinfo | grep Raspberry", shell=True, stdout=subprocess.PIPE, text=True)
-output, _ = process.communicate()
-if sys.version_info[0] == 2:
-    output = output.decode(sys.stdout.encoding)
+class MockBackend:
+    '''
+    No hardware: pins are remembered, SPI bytes and delays are counted,
+    and the panel finishes every BUSY wait at once. Selected with
+    EPD_PLATFORM=mock, for running drivers off the board.
+    '''
+    # Pin definition
+    RST_PIN  = 17
+    DC_PIN   = 25
+    CS_PIN   = 8
+    BUSY_PIN = 24
+    PWR_PIN  = 18
 
-if "Raspberry" in output:
+    def __init__(self):
+        self.pins = {}
+        self.spi_bytes = 0
+        self.delayed_ms = 0
+        self.SPI = self         # drivers that call SPI.writebytes2() directly
+
+    def digital_write(self, pin, value):
+        self.pins[pin] = value
+
+    def digital_read(self, pin):
+        return self.pins.get(pin, 0)
+
+    def wait_for_level(self, pin, level, timeout):
+        self.pins[pin] = level
+        return True
+
+    def delay_ms(self, delaytime):
+        self.delayed_ms += delaytime
+
+    def spi_writebyte(self, data):
+        self.spi_bytes += len(data)
+
+    def spi_writebyte2(self, data):
+        self.spi_bytes += len(data)
+
+    writebytes2 = spi_writebyte2
+
+    def DEV_SPI_write(self, data):
+        self.spi_bytes += 1
+
+    def DEV_SPI_nwrite(self, data):
+        self.spi_bytes += len(data)
+
+    def DEV_SPI_read(self):
+        return 0
+
+    def module_init(self, cleanup=False):
+        return 0
+
+    def module_exit(self, cleanup=False):
+        pass
+
+
+BusyTimeout = epdbusy.BusyTimeout
+BUSY_TIMEOUT = epdbusy.DEFAULT_TIMEOUT
+busy_stats = epdbusy.stats
+
+
+def wait_busy(pin, busy_level, name="epd", timeout=None, poll_ms=10, poll=None):
+    '''
+    function : Wait until the BUSY pin leaves busy_level
+    parameter:
+        busy_level : the pin level that means busy for this controller
+        name : key of the refresh-time metrics in busy_stats
+        timeout : seconds, BUSY_TIMEOUT when None
+        poll_ms : sampling interval where no edge wait is available, or
+                  the get-status interval when poll is given
+        poll : called before every read, e.g. to send 0x71
+    Returns the seconds spent busy; raises BusyTimeout.
+    '''
+    wait_edge = None
+    if hasattr(implementation, 'wait_for_level'):
+        wait_edge = lambda level, seconds: implementation.wait_for_level(pin, level, seconds)
+    return epdbusy.wait_level(lambda: implementation.digital_read(pin), busy_level, name,
+                              BUSY_TIMEOUT if timeout is None else timeout, poll_ms, poll, wait_edge)
+
+
+# Board detection reads /proc directly and is cached; EPD_PLATFORM=raspberrypi,
+# jetson, sunrisex3 or mock skips it
+PLATFORM = epdplatform.platform()
+
+if PLATFORM == epdplatform.RASPBERRY_PI:
     implementation = RaspberryPi()
-elif os.path.exists('/sys/bus/platform/drivers/gpio-x3'):
+elif PLATFORM == epdplatform.SUNRISE_X3:
     implementation = SunriseX3()
+elif PLATFORM == epdplatform.MOCK:
+    implementation = MockBackend()
 else:
     implementation = JetsonNano()
 
-for func in [x for x in dir(implementation) if not x.startswith('_')]:
-    setattr(sys.modules[__name__], func, getattr(implementation, func))
+
+def set_implementation(backend):
+    '''
+    function : Route the module-level functions to another backend, e.g. a
+               simulated panel; drivers look them up at call time
+    '''
+    global implementation
+    implementation = backend
+    for func in [x for x in dir(backend) if not x.startswith('_')]:
+        setattr(sys.modules[__name__], func, getattr(backend, func))
+
+
+set_implementation(implementation)
 
 ### END OF FILE ###
@@ -0,0 +1,118 @@
+# *****************************************************************************
+# * | File        :	  epdregistry.py
+# * | Function    :   Panel lookup by name, importing only the driver in use
+# * | Info        :
+# *----------------
+# * | Info        :   PANELS describes every driver module of this package
+# * |                 without importing it; get_driver() imports one module
+# * |                 (and with it epdconfig) when it is first asked for.
+# ******************************************************************************
+
+import importlib
+from collections import namedtuple
+
+# width, height : panel RAM in pixels (EPD_WIDTH, EPD_HEIGHT of the driver)
+# colors        : 2 black/white, 3 with red or yellow, 4 black/white/yellow/red,
+#                 6 or 7 for the multi-color panels
+# gray4         : has display_4Gray()
+# partial       : has a partial refresh (displayPartial, display_Partial, ...)
+# fast          : has a fast full refresh (init_fast, display_Fast, ...)
+Panel = namedtuple("Panel", "width height colors gray4 partial fast")
+
+PANELS = {
+    "epd13in3b":       Panel( 960,  680, 3, False, True , False),
+    "epd13in3k":       Panel( 960,  680, 2, True , True , False),
+    "epd1in02":        Panel(  80,  128, 2, False, True , False),
+    "epd1in54":        Panel( 200,  200, 2, False, False, False),
+    "epd1in54_V2":     Panel( 200,  200, 2, False, True , False),
+    "epd1in54b":       Panel( 200,  200, 3, False, False, False),
+    "epd1in54b_V2":    Panel( 200,  200, 3, False, False, False),
+    "epd1in54c":       Panel( 152,  152, 3, False, False, False),
+    "epd1in64g":       Panel( 168,  168, 4, False, False, False),
+    "epd2in13":        Panel( 122,  250, 2, False, False, False),
+    "epd2in13_V2":     Panel( 122,  250, 2, False, True , False),
+    "epd2in13_V3":     Panel( 122,  250, 2, False, True , False),
+    "epd2in13_V4":     Panel( 122,  250, 2, False, True , True ),
+    "epd2in13b_V3":    Panel( 104,  212, 3, False, False, False),
+    "epd2in13b_V4":    Panel( 122,  250, 3, False, False, False),
+    "epd2in13bc":      Panel( 104,  212, 3, False, False, False),
+    "epd2in13d":       Panel( 104,  212, 2, False, True , False),
+    "epd2in13g":       Panel( 122,  250, 4, False, False, False),
+    "epd2in15b":       Panel( 160,  296, 3, False, False, False),
+    "epd2in15g":       Panel( 160,  296, 4, False, False, False),
+    "epd2in36g":       Panel( 168,  296, 4, False, False, False),
+    "epd2in66":        Panel( 152,  296, 2, False, False, False),
+    "epd2in66b":       Panel( 152,  296, 3, False, False, False),
+    "epd2in66g":       Panel( 184,  360, 4, False, False, False),
+    "epd2in7":         Panel( 176,  264, 2, True , False, False),
+    "epd2in7_V2":      Panel( 176,  264, 2, True , True , True ),
+    "epd2in7b":        Panel( 176,  264, 3, False, False, False),
+    "epd2in7b_V2":     Panel( 176,  264, 3, False, False, False),
+    "epd2in9":         Panel( 128,  296, 2, False, False, False),
+    "epd2in9_V2":      Panel( 128,  296, 2, True , True , True ),
+    "epd2in9b_V3":     Panel( 128,  296, 3, False, False, False),
+    "epd2in9b_V4":     Panel( 128,  296, 3, False, True , True ),
+    "epd2in9bc":       Panel( 128,  296, 3, False, False, False),
+    "epd2in9d":        Panel( 128,  296, 2, False, True , False),
+    "epd3in0g":        Panel( 168,  400, 4, False, False, False),
+    "epd3in52":        Panel( 240,  360, 2, False, False, False),
+    "epd3in7":         Panel( 280,  480, 2, True , False, False),
+    "epd4in01f":       Panel( 640,  400, 7, False, False, False),
+    "epd4in2":         Panel( 400,  300, 2, True , True , False),
+    "epd4in26":        Panel( 800,  480, 2, True , True , True ),
+    "epd4in2_V2":      Panel( 400,  300, 2, True , True , True ),
+    "epd4in2b_V2":     Panel( 400,  300, 3, False, False, False),
+    "epd4in2b_V2_old": Panel( 400,  300, 3, False, False, False),
+    "epd4in2bc":       Panel( 400,  300, 3, False, False, False),
+    "epd4in37g":       Panel( 512,  368, 4, False, False, False),
+    "epd5in65f":       Panel( 600,  448, 7, False, False, False),
+    "epd5in79":        Panel( 792,  272, 2, True , True , True ),
+    "epd5in79b":       Panel( 792,  272, 3, False, False, False),
+    "epd5in79g":       Panel( 792,  272, 4, False, False, False),
+    "epd5in83":        Panel( 600,  448, 2, False, False, False),
+    "epd5in83_V2":     Panel( 648,  480, 2, False, False, False),
+    "epd5in83b_V2":    Panel( 648,  480, 3, False, False, False),
+    "epd5in83bc":      Panel( 600,  448, 3, False, False, False),
+    "epd7in3e":        Panel( 800,  480, 6, False, False, False),
+    "epd7in3f":        Panel( 800,  480, 7, False, False, False),
+    "epd7in3g":        Panel( 800,  480, 4, False, False, False),
+    "epd7in5":         Panel( 640,  384, 2, False, False, False),
+    "epd7in5_HD":      Panel( 880,  528, 2, False, False, False),
+    "epd7in5_V2":      Panel( 800,  480, 2, True , True , True ),
+    "epd7in5_V2_old":  Panel( 800,  480, 2, False, True , True ),
+    "epd7in5b_HD":     Panel( 880,  528, 3, False, False, False),
+    "epd7in5b_V2":     Panel( 800,  480, 3, False, True , True ),
+    "epd7in5b_V2_old": Panel( 800,  480, 3, False, False, False),
+    "epd7in5bc":       Panel( 640,  384, 3, False, False, False),
+}
+
+
+def panel_info(name):
+    '''
+    function : Metadata of a panel, without importing its driver
+    parameter:
+        name : driver module name, e.g. "epd2in13_V4"
+    '''
+    try:
+        return PANELS[name]
+    except KeyError:
+        raise ValueError("unknown e-Paper panel %r" % name) from None
+
+
+def find(**features):
+    '''
+    function : Names of the panels whose metadata match, e.g. find(partial=True, colors=2)
+    '''
+    return sorted(name for name, panel in PANELS.items()
+                  if all(getattr(panel, key) == value for key, value in features.items()))
+
+
+def get_driver(name):
+    '''
+    function : Import the driver module of a panel on first use
+    parameter:
+        name : driver module name, e.g. "epd2in13_V4"
+    Returns the module; get_driver(name).EPD() is the panel.
+    '''
+    panel_info(name)
+    return importlib.import_module("." + name, __package__)
@@ -0,0 +1,82 @@
+# *****************************************************************************
+# * | File        :	  epdseq.py
+# * | Function    :   Register sequences batched into few SPI writes
+# * | Info        :
+# *----------------
+# * | Info        :   A Sequence collects commands and their data up front
+# * |                 and keeps them as runs of equal DC level. A driver's
+# * |                 send_seq() puts each run on the bus with one DC write
+# * |                 and one spi_writebyte2(), instead of a DC/CS toggle
+# * |                 and a one-byte write per send_command()/send_data().
+# ******************************************************************************
+
+DC_COMMAND = 0
+DC_DATA = 1
+
+
+class Sequence:
+    '''
+    Commands and data in bus order, as [(dc, bytearray), ...] runs.
+    Adjacent commands (or adjacent data) share one run. The builders
+    return the sequence, so a sequence can be written as one chain.
+    '''
+
+    def __init__(self):
+        self.runs = []
+
+    def _append(self, dc, data):
+        if self.runs and self.runs[-1][0] == dc:
+            self.runs[-1][1].extend(data)
+        else:
+            self.runs.append((dc, bytearray(data)))
+
+    def command(self, command, *data):
+        '''
+        function : A command byte, optionally followed by its data bytes
+        '''
+        self._append(DC_COMMAND, (command,))
+        if data:
+            self._append(DC_DATA, data)
+        return self
+
+    def data(self, *data):
+        '''
+        function : Data bytes for the preceding command
+        '''
+        self._append(DC_DATA, data)
+        return self
+
+    def data_bytes(self, buf):
+        '''
+        function : A block of data (LUT, RAM window) from a bytes-like or list
+        '''
+        if len(buf):
+            self._append(DC_DATA, buf)
+        return self
+
+    def extend(self, other):
+        '''
+        function : Append another sequence
+        '''
+        for dc, data in other.runs:
+            self._append(dc, data)
+        return self
+
+    def __len__(self):
+        return sum(len(data) for _, data in self.runs)
+
+    def stream(self):
+        '''
+        function : The sequence as (dc, byte) pairs, the way it crosses the bus
+        '''
+        return [(dc, b) for dc, data in self.runs for b in data]
+
+    def replay(self, epd):
+        '''
+        function : Send byte by byte through send_command()/send_data(), the
+                   unbatched path (kept for comparison and debugging)
+        '''
+        for dc, data in self.runs:
+            send = epd.send_data if dc == DC_DATA else epd.send_command
+            for b in data:
+                send(b)
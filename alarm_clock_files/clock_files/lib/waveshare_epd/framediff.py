@@ -0,0 +1,88 @@
+# *****************************************************************************
+# * | File        :	  framediff.py
+# * | Function    :   Dirty-rectangle diffing of packed 1-bpp frame buffers
+# * | Info        :
+# *----------------
+# * | Info        :   A window is (x_byte_start, x_byte_end, y_start, y_end),
+# * |                 all inclusive, x in bytes (8 pixels) of controller RAM.
+# ******************************************************************************
+
+# Per-window cost of the RAM windowing commands (0x44/0x45/0x4E/0x4F/0x24
+# plus their data) in bytes on the bus. A dirty row joins the band above
+# it when the merged window, gap and widening included, is no bigger than
+# the two sent apart with this overhead for the second.
+WINDOW_OVERHEAD = 15
+
+
+def line_bytes(width):
+    """Bytes per RAM row for a panel `width` pixels wide."""
+    return (width + 7) // 8
+
+
+def pixel_window(x_start, y_start, x_end, y_end):
+    """
+    The window of a display_Partial(image, x_start, y_start, x_end, y_end)
+    call, whose ends are exclusive pixel coordinates: x_start is rounded
+    down and x_end up to whole bytes.
+    """
+    return (x_start // 8, (x_end + 7) // 8 - 1, y_start, y_end - 1)
+
+
+def _row_span(a, b):
+    """First and last differing byte index of two equal-length rows."""
+    x = int.from_bytes(a, 'big') ^ int.from_bytes(b, 'big')
+    n = len(a)
+    first = n - 1 - (x.bit_length() - 1) // 8
+    last = n - 1 - ((x & -x).bit_length() - 1) // 8
+    return first, last
+
+
+def dirty_windows(old, new, linewidth, merge=True):
+    """
+    Minimal byte-aligned windows covering every difference between two
+    packed frames with `linewidth` bytes per row. Returns [] when equal,
+    one full-frame window when there is no previous frame.
+    """
+    height = len(new) // linewidth
+    if old is None or len(old) != len(new):
+        return [(0, linewidth - 1, 0, height - 1)]
+    if old == new:
+        return []
+
+    windows = []
+    band = None
+    for y in range(height):
+        start = y * linewidth
+        a = old[start:start + linewidth]
+        b = new[start:start + linewidth]
+        if a == b:
+            continue
+        x0, x1 = _row_span(a, b)
+        if band is not None and merge:
+            bx0, bx1, by0, by1 = band
+            nx0, nx1 = min(bx0, x0), max(bx1, x1)
+            merged = (nx1 - nx0 + 1) * (y - by0 + 1)
+            apart = (bx1 - bx0 + 1) * (by1 - by0 + 1) + (x1 - x0 + 1) + WINDOW_OVERHEAD
+            if merged <= apart:
+                band = (nx0, nx1, by0, y)
+                continue
+        if band is not None:
+            windows.append(band)
+        band = (x0, x1, y, y)
+    if band is not None:
+        windows.append(band)
+    return windows
+
+
+def window_bytes(buf, linewidth, window):
+    """The bytes of `buf` inside `window`, row by row."""
+    x0, x1, y0, y1 = window
+    if x0 == 0 and x1 == linewidth - 1:
+        return bytes(buf[y0 * linewidth:(y1 + 1) * linewidth])
+    mv = memoryview(buf)
+    return b''.join(mv[y * linewidth + x0:y * linewidth + x1 + 1] for y in range(y0, y1 + 1))
+
+
+def transfer_size(windows):
+    """Bytes on the bus for a list of windows, including windowing commands."""
+    return sum((x1 - x0 + 1) * (y1 - y0 + 1) + WINDOW_OVERHEAD for x0, x1, y0, y1 in windows)
@@ -1,36 +1,52 @@
 import threading
-import time
-import datetime
-
-import RPi.GPIO as GPIO
-import neopixel
-import board
 
+import hal
+import animation
 import gpio_setup
+import pwm
+import input_events
+import leds
 from config_manager import read_config, write_config
-from stepper import forward, backward
+from stepper import StepperEngine
+from motion import MotionController
+from scheduler import RenderScheduler, PRIORITY_BACKGROUND
 import f_update
 
+# Real board unless CLOCK_HAL=sim; all pins, pixels and time go through it
+hw = hal.hardware()
+GPIO = hw.gpio
+clock = hw.clock
+
 # ----- Constants -----
 LONG_PRESS = 2
-STEP_DELAY = 0.003
+STEPPER_MODE = "half"
 STEP_PER_REV = 512
 MINUTES_PER_REV = 60
+ENCODER_MINUTES = 5          # hand move per encoder step in calibrate/set_alarm
+
+LED_PWM_HZ = 15000           # hardware PWM rate; pwm.SoftwarePWM caps it
 
-NEOPIXEL_PIN = board.D18
+NEOPIXEL_PIN = f"D{gpio_setup.neopixel}"      # board.D18
 NEOPIXEL_PIXELS = 1
 
-step_accumulator = 0.0
+motion = None
 
-last_clk = None
-last_tick_time = 0.0
-direction_latch = None
+# One worker renders the e-paper; rapid requests collapse to the latest
+screens = RenderScheduler({
+    "main": f_update.update_display_main,
+    "calibrate": f_update.show_calibrate_screen,
+    "set_alarm": f_update.show_set_alarm_screen,
+}, cond=clock.Condition())
 
 led_nood_pwm = None
 chromatek = None
+lights = None                # animation.LedEngine: led_nood, led_PM and the Chromatek
 
-alarm_event = threading.Event()
-fade_event = threading.Event()
+# Made by the clock so a simulated clock can follow who waits on them
+alarm_event = clock.Event()
+alarm_quiet = clock.Event()         # set whenever alarm_event is cleared; ends a beep early
+alarm_quiet.set()
+tick_event = clock.Event()          # re-run the clock tick now (an input changed something)
 config_lock = threading.Lock()
 
 # ========================= CONFIG ============================
@@ -39,39 +55,45 @@ def read_cfg_threadsafe():
 
 def write_cfg_threadsafe(cfg):
     with config_lock:
+        # The motion controller is the only source of truth for the hands
+        if motion is not None:
+            cfg['hand_position'] = motion.position
         write_config(cfg)
 
 # ========================= LED HELPERS ============================
+def set_pm_led(level):
+    GPIO.output(gpio_setup.led_PM, GPIO.HIGH if level else GPIO.LOW)
+
 def set_pm_led_from_hand(cfg):
-    pos = cfg.get("hand_position", 0)
-    GPIO.output(gpio_setup.led_PM, GPIO.HIGH if pos >= 720 else GPIO.LOW)
+    lights.set_base(pm=1 if cfg.get("hand_position", 0) >= 720 else 0)
 
-def ensure_brightness_pwm(cfg):
+def backlight():
     global led_nood_pwm
     if led_nood_pwm is None:
-        led_nood_pwm = GPIO.PWM(gpio_setup.led_nood, 15000)
+        # the NeoPixel's PWM channel rules out hardware PWM for the backlight
+        led_nood_pwm = hw.pwm(gpio_setup.led_nood, LED_PWM_HZ, pixel_pins=(gpio_setup.neopixel,))
         led_nood_pwm.start(0)
-    brightness = max(0, min(100, int(cfg.get("brightness", 50))))
-    led_nood_pwm.ChangeDutyCycle(brightness)
+        print(f"[DEBUG] led_nood PWM: {led_nood_pwm.name}")
+    return led_nood_pwm
+
+def ensure_brightness_pwm(cfg):
+    # brightness is perceived; pwm.duty() maps it through the gamma table
+    lights.set_base(backlight=pwm.duty(cfg.get("brightness", 50)))
 
 def init_chromatek():
     global chromatek
     if chromatek is None:
-        chromatek = neopixel.NeoPixel(
+        # Pushed only when the light changes, color and brightness in one show()
+        chromatek = leds.PixelOutput(hw.pixels(
             NEOPIXEL_PIN,
             NEOPIXEL_PIXELS,
-            auto_write=True,
-            pixel_order=neopixel.GRB
-        )
-        chromatek.brightness = 0.0
-        chromatek[0] = (0, 0, 0)
+            auto_write=False,
+            pixel_order="GRB"
+        ))
+        chromatek.set(0, (0, 0, 0), brightness=0.0)
 
-def set_chromatek_color(r, g, b, brightness=None):
-    if chromatek is None:
-        init_chromatek()
-    if brightness is not None:
-        chromatek.brightness = max(0.0, min(1.0, brightness))
-    chromatek[0] = (int(r), int(g), int(b))
+def set_chromatek_color(r, g, b, brightness):
+    lights.set_base(pixel=((int(r), int(g), int(b)), max(0.0, min(1.0, brightness))))
 
 # ========================= ALARM ============================
 def start_alarm(cfg, now_min):
@@ -79,9 +101,12 @@ def start_alarm(cfg, now_min):
     cfg['alarm_active'] = True
     cfg['alarm_start_min'] = now_min
     cfg['last_ring_min'] = now_min
+    cfg['last_ring_date'] = clock.now().date().isoformat()
     cfg.pop('snooze_until', None)
     write_cfg_threadsafe(cfg)
+    alarm_quiet.clear()
     alarm_event.set()
+    lights.play("alarm")
     print("[DEBUG] alarm_event SET")
 
 def stop_alarm(cfg):
@@ -90,55 +115,44 @@ def stop_alarm(cfg):
     cfg.pop('alarm_start_min', None)
     write_cfg_threadsafe(cfg)
     alarm_event.clear()
+    alarm_quiet.set()
+    lights.stop("alarm", "sunrise")
     print("[DEBUG] alarm_event CLEARED in stop_alarm")
 
 def cancel_alarm_for_day(cfg):
     print("[DEBUG] cancel_alarm_for_day()")
-    today = datetime.date.today().isoformat()
+    today = clock.now().date().isoformat()
     cfg['alarm_disabled_date'] = today
     cfg['alarm_active'] = False
     cfg.pop('alarm_start_min', None)
     cfg.pop('snooze_until', None)
     write_cfg_threadsafe(cfg)
     alarm_event.clear()
+    alarm_quiet.set()
+    lights.stop("alarm", "sunrise")
     print("[DEBUG] alarm_event CLEARED in cancel_alarm_for_day")
 
 # ========================= REAL-TIME SYNC ============================
 def sync_hands_to_real_time(cfg):
-    now = datetime.datetime.now()
-    now_min = now.hour * 60 + now.minute
-    current = cfg.get('hand_position', 0)
-
-    now_min %= 1440
-    current %= 1440
-
-    if current == now_min:
+    """
+    Queue a shortest-path move to the current time; returns immediately.
+    hand_position is updated by on_hand_moved() as the hands get there.
+    """
+    now = clock.now()
+    now_min = (now.hour * 60 + now.minute) % 1440
+
+    if motion.target == now_min:
         print("[SYNC] Already aligned.")
         return cfg
 
-    forward_m = (now_min - current) % 1440
-    backward_m = (current - now_min) % 1440
-
-    if forward_m <= backward_m:
-        move_m = forward_m
-        direction = "forward"
-    else:
-        move_m = backward_m
-        direction = "backward"
-
-    steps = round((STEP_PER_REV / MINUTES_PER_REV) * move_m)
-
-    print(f"[SYNC] Moving {move_m} minutes → {steps} steps {direction}")
-
-    if direction == "forward":
-        forward(STEP_DELAY, steps)
-    else:
-        backward(STEP_DELAY, steps)
+    print(f"[SYNC] Moving {motion.target} → {now_min}")
+    motion.move_to(now_min)
+    return cfg
 
-    cfg['hand_position'] = now_min
+def on_hand_moved(pos):
+    cfg = read_cfg_threadsafe()
     write_cfg_threadsafe(cfg)
     set_pm_led_from_hand(cfg)
-    return cfg
 
 # ========================= BUZZER THREAD ============================
 def buzzer_thread():
@@ -146,326 +160,328 @@ def buzzer_thread():
     while True:
         if alarm_event.is_set():
             print("[DEBUG] buzzer: BEEP")
-            end_t = time.time() + 0.2
             GPIO.output(gpio_setup.piezo, GPIO.HIGH)
-            while time.time() < end_t:
-                if not alarm_event.is_set():
-                    print("[DEBUG] buzzer abort early")
-                    break
-                time.sleep(0.005)
+            if alarm_quiet.wait(0.2):
+                print("[DEBUG] buzzer abort early")
             GPIO.output(gpio_setup.piezo, GPIO.LOW)
-            time.sleep(0.2)
+            clock.sleep(0.2)
         else:
             GPIO.output(gpio_setup.piezo, GPIO.LOW)
-            time.sleep(0.05)
-
-# ========================= LED FADE THREAD ============================
-def led_fade_thread():
-    global led_nood_pwm
-    v = 0.1
-    direction = 1
-    print("[DEBUG] fade thread start")
-    while True:
-        if fade_event.is_set():
-            if led_nood_pwm is None:
-                led_nood_pwm = GPIO.PWM(gpio_setup.led_nood, 15000)
-                led_nood_pwm.start(0)
-            led_nood_pwm.ChangeDutyCycle(v * 100)
-            v += direction * 0.04
-            if v >= 1.0:
-                v = 1.0
-                direction = -1
-            if v <= 0.05:
-                v = 0.05
-                direction = 1
-            time.sleep(0.03)
-        else:
-            time.sleep(0.1)
+            alarm_event.wait()
 
 # ========================= EPAPER THREAD ============================
 def epaper_auto_thread():
     last_hour = -1
     print("[DEBUG] epaper thread start")
     while True:
-        now = datetime.datetime.now()
+        now = clock.now()
         if now.hour != last_hour:
             print("[EPAPER] Hour changed -> refresh")
-            threading.Thread(target=f_update.update_display_main, daemon=True).start()
+            screens.request("main", PRIORITY_BACKGROUND)
             last_hour = now.hour
-        time.sleep(60)
+        clock.sleep(60)
 
 # ========================= BUTTON + ENCODER THREAD ============================
-def button_polling():
-    global last_clk, last_tick_time, direction_latch
-    last_clk = GPIO.input(gpio_setup.clk)
-    last_tick_time = time.time()
-    direction_latch = None
+def update_chromatek(cfg):
+    if cfg.get("alarm_armed", False):
+        b = cfg.get("brightness", 50)
+        set_chromatek_color(255, 255, 0, brightness=max(0.02, b / 100.0))
+    else:
+        set_chromatek_color(0, 0, 0, brightness=0.0)
+
+def on_arm_switch(pressed):
+    cfg = read_cfg_threadsafe()
+    if cfg.get("alarm_armed", False) != pressed:
+        cfg['alarm_armed'] = bool(pressed)
+        write_cfg_threadsafe(cfg)
+        print(f"[DEBUG] alarm_armed={cfg['alarm_armed']}")
+    update_chromatek(cfg)
+
+def on_re_button(long_press):
+    cfg = read_cfg_threadsafe()
+    mode = cfg.get('mode', 'idle')
+
+    # LONG PRESS
+    if long_press:
+        if mode == "idle":
+            print("[DEBUG] RE long → CALIBRATE")
+            cfg['mode'] = 'calibrate'
+            lights.play("breathe")
+            write_cfg_threadsafe(cfg)
+            screens.request("calibrate")
 
-    cfg0 = read_cfg_threadsafe()
-    ensure_brightness_pwm(cfg0)
-    init_chromatek()
-    set_pm_led_from_hand(cfg0)
+        elif mode == "calibrate":
+            print("[DEBUG] RE long in CALIBRATE → set hand_position=0, then sync to real time")
 
-    print("[DEBUG] button_polling start")
-    while True:
-        cfg = read_cfg_threadsafe()
-        mode = cfg.get('mode', 'idle')
+            # 1. Set mechanical zero (after any encoder moves still running)
+            motion.set_position(0)
 
-        # ----- ARMING -----
-        rg_pressed = GPIO.input(gpio_setup.RGButton) == GPIO.LOW
-        if cfg.get("alarm_armed", False) != rg_pressed:
-            cfg['alarm_armed'] = bool(rg_pressed)
+            # 2. Sync to real time
+            cfg = sync_hands_to_real_time(read_cfg_threadsafe())
+
+            # 3. Return to idle
+            cfg['mode'] = 'idle'
+            lights.stop("breathe")
             write_cfg_threadsafe(cfg)
-            print(f"[DEBUG] alarm_armed={cfg['alarm_armed']}")
+            screens.request("main")
 
-        # Chromatek brightness
-        b = cfg.get("brightness", 50)
-        neo_b = max(0.02, b / 100.0)
-        if cfg.get("alarm_armed", False):
-            set_chromatek_color(255, 255, 0, brightness=neo_b)
+        elif mode == "set_alarm":
+            print("[DEBUG] RE long → save alarm_time & sync")
+            motion.wait_idle()
+            new_alarm = motion.position
+            cfg['alarm_time'] = new_alarm
+            write_cfg_threadsafe(cfg)
+            cfg = sync_hands_to_real_time(cfg)
+            cfg['mode'] = 'idle'
+            lights.stop("breathe")
+            write_cfg_threadsafe(cfg)
+            screens.request("main")
+
+    # SHORT PRESS
+    else:
+        if cfg.get("alarm_active", False):
+            print("[DEBUG] RE short → stop_alarm()")
+            stop_alarm(cfg)
         else:
-            set_chromatek_color(0, 0, 0, brightness=0.0)
-
-        # ----- RE BUTTON -----
-        if GPIO.input(gpio_setup.sw) == GPIO.LOW:
-            t0 = time.time()
-            while GPIO.input(gpio_setup.sw) == GPIO.LOW:
-                time.sleep(0.01)
-            d = time.time() - t0
-
-            cfg = read_cfg_threadsafe()
-            mode = cfg.get('mode', 'idle')
-
-            # LONG PRESS
-            if d >= LONG_PRESS:
-                if mode == "idle":
-                    print("[DEBUG] RE long → CALIBRATE")
-                    cfg['mode'] = 'calibrate'
-                    fade_event.set()
-                    write_cfg_threadsafe(cfg)
-                    threading.Thread(target=f_update.show_calibrate_screen, daemon=True).start()
-
-                elif mode == "calibrate":
-                    print("[DEBUG] RE long in CALIBRATE → set hand_position=0, then sync to real time")
-                    
-                    # 1. Set mechanical zero
-                    cfg['hand_position'] = 0
-                    write_cfg_threadsafe(cfg)
-                    set_pm_led_from_hand(cfg)
-
-                    # 2. Sync to real time
-                    cfg = sync_hands_to_real_time(cfg)
-
-                    # 3. Return to idle
-                    cfg['mode'] = 'idle'
-                    fade_event.clear()
-                    write_cfg_threadsafe(cfg)
-                    threading.Thread(target=f_update.update_display_main, daemon=True).start()
-
-                elif mode == "set_alarm":
-                    print("[DEBUG] RE long → save alarm_time & sync")
-                    new_alarm = cfg.get('hand_position', 0)
-                    cfg['alarm_time'] = new_alarm
-                    write_cfg_threadsafe(cfg)
-                    cfg = sync_hands_to_real_time(cfg)
-                    cfg['mode'] = 'idle'
-                    fade_event.clear()
-                    write_cfg_threadsafe(cfg)
-                    threading.Thread(target=f_update.update_display_main, daemon=True).start()
-
-            # SHORT PRESS
+            if mode == "idle":
+                print("[DEBUG] RE short idle → refresh epaper")
+                screens.request("main")
+            elif mode == "set_alarm":
+                print("confirm time")
+                screens.request("set_alarm")
             else:
-                if cfg.get("alarm_active", False):
-                    print("[DEBUG] RE short → stop_alarm()")
-                    stop_alarm(cfg)
-                else:
-                    if mode == "idle":
-                        print("[DEBUG] RE short idle → refresh epaper")
-                        threading.Thread(target=f_update.update_display_main, daemon=True).start()
-                    elif mode == "set_alarm":
-                        print("confirm time")
-                        threading.Thread(target=f_update.show_set_alarm_screen, daemon=True).start()
-                    else:
-                        print(f"[DEBUG] RE short in mode {mode}")
-
-        # ----- SNOOZE BUTTON -----
-        if GPIO.input(gpio_setup.snz) == GPIO.LOW:
-            t0 = time.time()
-            while GPIO.input(gpio_setup.snz) == GPIO.LOW:
-                time.sleep(0.01)
-            d = time.time() - t0
-
-            cfg = read_cfg_threadsafe()
-            now = datetime.datetime.now()
-            now_min = now.hour * 60 + now.minute
-
-            if cfg.get("alarm_active", False):
-                if d >= LONG_PRESS:
-                    print("[DEBUG] Snooze LONG → cancel_alarm_for_day()")
-                    cancel_alarm_for_day(cfg)
-                else:
-                    snooze_min = (now_min + 5) % 1440
-                    cfg['snooze_until'] = snooze_min
-                    write_cfg_threadsafe(cfg)
-                    stop_alarm(cfg)
-                    print(f"[DEBUG] Snooze SHORT → snooze_until={snooze_min}")
-                continue
-
-            if mode == "idle" and d >= LONG_PRESS:
-                print("[DEBUG] Snooze long in idle → SET_ALARM")
-                cfg['mode'] = 'set_alarm'
-                write_cfg_threadsafe(cfg)
-                fade_event.set()
-                threading.Thread(target=f_update.show_set_alarm_screen, daemon=True).start()
-
-        # ----- ENCODER -----
-        clk = GPIO.input(gpio_setup.clk)
-        if clk != last_clk:
-            now_t = time.time()
-            if now_t - last_tick_time < 0.002:
-                last_clk = clk
-                continue
-
-            if clk == GPIO.LOW:
-                time.sleep(0.001)
-                d1 = GPIO.input(gpio_setup.dt)
-                time.sleep(0.0005)
-                d2 = GPIO.input(gpio_setup.dt)
-                if d1 == d2:
-                    direction_latch = "CW" if d1 else "CCW"
-                else:
-                    direction_latch = None
-
-            elif clk == GPIO.HIGH and direction_latch is not None:
-                cfg = read_cfg_threadsafe()
-                mode = cfg.get('mode', 'idle')
-                direction = direction_latch
-                direction_latch = None
-
-                if mode in ("calibrate", "set_alarm"):
-                    steps5 = round((STEP_PER_REV / MINUTES_PER_REV) * 5)
-                    if direction == "CW":
-                        forward(STEP_DELAY, steps5)
-                        cfg['hand_position'] = (cfg.get('hand_position', 0) + 5) % 1440
-                    else:
-                        backward(STEP_DELAY, steps5)
-                        cfg['hand_position'] = (cfg.get('hand_position', 0) - 5) % 1440
-                    write_cfg_threadsafe(cfg)
-                    set_pm_led_from_hand(cfg)
-                    print(f"[DEBUG] {mode}: encoder {direction} → +/-5 min")
-
-                else:
-                    b = cfg.get('brightness', 50)
-                    if direction == "CW":
-                        b = min(100, b + 5)
-                    else:
-                        b = max(0, b - 5)
-                    cfg['brightness'] = b
-                    write_cfg_threadsafe(cfg)
-                    if not fade_event.is_set():
-                        ensure_brightness_pwm(cfg)
-                    if cfg.get("alarm_armed", False):
-                        set_chromatek_color(255, 255, 0, brightness=max(0.02, b/100.0))
-                    else:
-                        set_chromatek_color(0, 0, 0, brightness=0.0)
-                    print(f"[DEBUG] Idle enc {direction} → brightness {b}%")
-
-            last_clk = clk
-            last_tick_time = now_t
-
-        time.sleep(0.002)
+                print(f"[DEBUG] RE short in mode {mode}")
 
-# ========================= CLOCK THREAD ============================
-def clock_thread():
-    global step_accumulator
-    print("[DEBUG] clock_thread start")
-    while True:
-        now = datetime.datetime.now()
-        now_min = now.hour * 60 + now.minute
-        today = now.date().isoformat()
-
-        cfg = read_cfg_threadsafe()
-        mode = cfg.get('mode', 'idle')
+def on_snooze_button(long_press):
+    cfg = read_cfg_threadsafe()
+    mode = cfg.get('mode', 'idle')
+    now = clock.now()
+    now_min = now.hour * 60 + now.minute
 
-        rg_pressed = (GPIO.input(gpio_setup.RGButton) == GPIO.LOW)
-        if cfg.get("alarm_armed", False) != rg_pressed:
-            cfg['alarm_armed'] = rg_pressed
+    if cfg.get("alarm_active", False):
+        if long_press:
+            print("[DEBUG] Snooze LONG → cancel_alarm_for_day()")
+            cancel_alarm_for_day(cfg)
+        else:
+            snooze_min = (now_min + 5) % 1440
+            cfg['snooze_until'] = snooze_min
             write_cfg_threadsafe(cfg)
+            stop_alarm(cfg)
+            print(f"[DEBUG] Snooze SHORT → snooze_until={snooze_min}")
+        return
+
+    if mode == "idle" and long_press:
+        print("[DEBUG] Snooze long in idle → SET_ALARM")
+        cfg['mode'] = 'set_alarm'
+        write_cfg_threadsafe(cfg)
+        lights.play("breathe")
+        screens.request("set_alarm")
+
+def on_encoder(direction, steps=1):
+    """steps: 1 per detent, more when the knob is spun fast (input_events.ACCELERATION)."""
+    cfg = read_cfg_threadsafe()
+    mode = cfg.get('mode', 'idle')
+
+    if mode in ("calibrate", "set_alarm"):
+        minutes = ENCODER_MINUTES * steps
+        motion.move_by(minutes if direction == "CW" else -minutes)
+        print(f"[DEBUG] {mode}: encoder {direction} x{steps} → +/-{minutes} min (target {motion.target})")
+
+    else:
+        # brightness keeps one 5 % step per detent, however fast
+        b = cfg.get('brightness', 50)
+        if direction == "CW":
+            b = min(100, b + 5)
+        else:
+            b = max(0, b - 5)
+        cfg['brightness'] = b
+        write_cfg_threadsafe(cfg)
+        ensure_brightness_pwm(cfg)
+        update_chromatek(cfg)
+        print(f"[DEBUG] Idle enc {direction} → brightness {b}%")
+
+def on_input(event_type, name, steps=1):
+    if name == "rg":
+        if event_type in ("down", "up"):
+            on_arm_switch(event_type == "down")
+    elif name == "re":
+        if event_type in ("short", "long"):
+            on_re_button(event_type == "long")
+    elif name == "snooze":
+        if event_type in ("short", "long"):
+            on_snooze_button(event_type == "long")
+    elif name == "encoder":
+        on_encoder(event_type.upper(), steps)
+    tick_event.set()
+
+def button_polling(backend=None):
+    """
+    Input thread: blocks on the edge-event queue instead of polling.
+    backend defaults to the hardware's edge source (RPi.GPIO edge detection,
+    or the FakeBackend of SimHardware).
+    """
+    cfg0 = read_cfg_threadsafe()
+    ensure_brightness_pwm(cfg0)
+    set_pm_led_from_hand(cfg0)
 
-        if mode == "set_alarm":
-            time.sleep(1)
-            continue
+    if backend is None:
+        backend = hw.input_backend()
+    dispatcher = input_events.InputDispatcher(
+        backend,
+        buttons={
+            "re": gpio_setup.sw,
+            "snooze": gpio_setup.snz,
+            "rg": gpio_setup.RGButton,
+        },
+        encoder=(gpio_setup.clk, gpio_setup.dt),
+        long_press=LONG_PRESS,
+        clock=clock,
+    )
+
+    on_arm_switch(backend.read(gpio_setup.RGButton) == GPIO.LOW)
 
-        # auto-move clock
-        if mode == "idle":
-            pos = cfg.get("hand_position", 0)
-            if pos != now_min:
-                mins = (now_min - pos) % 1440
-                step_accumulator += (STEP_PER_REV / MINUTES_PER_REV) * mins
-                steps = int(step_accumulator)
-                step_accumulator -= steps
-                if steps:
-                    forward(STEP_DELAY, steps)
-                cfg['hand_position'] = now_min
-                write_cfg_threadsafe(cfg)
-                set_pm_led_from_hand(cfg)
-                if not fade_event.is_set():
-                    ensure_brightness_pwm(cfg)
-
-        # alarm trigger logic
-        cfg = read_cfg_threadsafe()
-        armed = cfg.get("alarm_armed", False)
-        alarm_time = cfg.get("alarm_time", None)
-        snooze_until = cfg.get("snooze_until", None)
-        disabled_date = cfg.get("alarm_disabled_date", None)
-        active = cfg.get("alarm_active", False)
-        last_ring = cfg.get("last_ring_min", None)
-
-        should_ring = False
-        if armed and not active and disabled_date != today:
-            if last_ring != now_min:
-                if alarm_time == now_min:
-                    should_ring = True
-                elif snooze_until == now_min:
-                    should_ring = True
-
-        if should_ring:
-            print(f"[DEBUG] Alarm SHOULD ring! now_min={now_min}")
-            start_alarm(cfg, now_min)
-
-        # auto-cancel alarm after 10 min
-        cfg = read_cfg_threadsafe()
-        if cfg.get("alarm_active", False):
-            start_m = cfg.get("alarm_start_min", None)
-            if start_m is not None:
-                elapsed = (now_min - start_m) % 1440
-                if elapsed >= 10:
-                    print("[DEBUG] Auto-cancel (10 min)")
-                    cancel_alarm_for_day(cfg)
+    print("[DEBUG] button_polling start")
+    dispatcher.run(on_input)
 
-        time.sleep(1)
+# ========================= CLOCK THREAD ============================
+def clock_tick(now):
+    """
+    One pass of the clock: follow the arm switch, move the hands to `now`,
+    start, re-ring (snooze) or auto-cancel the alarm.
+    """
+    now_min = now.hour * 60 + now.minute
+    today = now.date().isoformat()
+
+    cfg = read_cfg_threadsafe()
+    mode = cfg.get('mode', 'idle')
+
+    rg_pressed = (GPIO.input(gpio_setup.RGButton) == GPIO.LOW)
+    if cfg.get("alarm_armed", False) != rg_pressed:
+        cfg['alarm_armed'] = rg_pressed
+        write_cfg_threadsafe(cfg)
+
+    if mode == "set_alarm":
+        return
+
+    # auto-move clock
+    if mode == "idle":
+        if motion.target != now_min:
+            motion.move_to(now_min, "forward")
+            ensure_brightness_pwm(cfg)
+
+    # alarm trigger logic
+    cfg = read_cfg_threadsafe()
+    armed = cfg.get("alarm_armed", False)
+    alarm_time = cfg.get("alarm_time", None)
+    snooze_until = cfg.get("snooze_until", None)
+    disabled_date = cfg.get("alarm_disabled_date", None)
+    active = cfg.get("alarm_active", False)
+    # a minute only counts as rung on the day it rang
+    rang_now = (cfg.get("last_ring_min", None) == now_min
+                and cfg.get("last_ring_date", None) == today)
+
+    should_ring = False
+    if armed and not active and disabled_date != today:
+        if not rang_now:
+            if alarm_time == now_min:
+                should_ring = True
+            elif snooze_until == now_min:
+                should_ring = True
+
+    if should_ring:
+        print(f"[DEBUG] Alarm SHOULD ring! now_min={now_min}")
+        start_alarm(cfg, now_min)
+
+    # auto-cancel alarm after 10 min
+    cfg = read_cfg_threadsafe()
+    if cfg.get("alarm_active", False):
+        start_m = cfg.get("alarm_start_min", None)
+        if start_m is not None:
+            elapsed = (now_min - start_m) % 1440
+            if elapsed >= 10:
+                print("[DEBUG] Auto-cancel (10 min)")
+                cancel_alarm_for_day(cfg)
+
+    update_sunrise(read_cfg_threadsafe(), now)
+
+def update_sunrise(cfg, now):
+    """Play the sunrise ramp in the SUNRISE_MINUTES before an armed alarm_time."""
+    if cfg.get("alarm_active", False):
+        return                  # the alarm pulse is showing; stop_alarm() ends both
+    alarm_time = cfg.get("alarm_time", None)
+    lead = animation.SUNRISE_MINUTES * 60
+    if (alarm_time is not None and cfg.get("alarm_armed", False)
+            and cfg.get("alarm_disabled_date", None) != now.date().isoformat()):
+        seconds = now.hour * 3600 + now.minute * 60 + now.second + now.microsecond / 1e6
+        until = (alarm_time * 60 - seconds) % 86400
+        if 0 < until <= lead:
+            lights.play("sunrise", elapsed=lead - until)
+            return
+    lights.stop("sunrise")
+
+def clock_thread():
+    """
+    Runs clock_tick() at the start of every minute, which is when any of its
+    decisions can change, and at once when an input sets tick_event.
+    """
+    print("[DEBUG] clock_thread start")
+    while True:
+        tick_event.clear()
+        now = clock.now()
+        clock_tick(now)
+        tick_event.wait(60 - now.second - now.microsecond / 1e6)
 
 # ========================= MAIN ============================
-if __name__ == "__main__":
-    gpio_setup.setup_pins()
+def setup(driver=None):
+    """
+    Pins, the LED engine and the MotionController. driver(steps, more)
+    replaces the StepperEngine (simulations that only count steps).
+    """
+    global motion, lights
+    gpio_setup.setup_pins(backlight=False)      # backlight() sets up led_nood
     GPIO.output(gpio_setup.led_PM, GPIO.LOW)
 
+    init_chromatek()
+    lights = animation.LedEngine(clock, backlight=backlight(), pixel=chromatek, pm=set_pm_led)
     cfg0 = read_cfg_threadsafe()
     ensure_brightness_pwm(cfg0)
     set_pm_led_from_hand(cfg0)
-    init_chromatek()
+
+    if driver is None:
+        driver = StepperEngine(gpio_setup.stepper_pins, mode=STEPPER_MODE, gpio=GPIO,
+                               sleep=clock.sleep, clock=clock.monotonic).move
+    motion = MotionController(
+        driver=driver,
+        position=cfg0.get("hand_position", 0),
+        steps_per_minute=STEP_PER_REV / MINUTES_PER_REV,
+        on_position=on_hand_moved,
+        cond=clock.Condition(),
+    ).start()
+    return motion
+
+def start():
+    """setup() and start every thread; returns immediately."""
+    setup()
+    # the boot render finds no weather; draw the main screen again once it lands
+    f_update.weather.service.on_ready = lambda: screens.request("main", PRIORITY_BACKGROUND)
+    f_update.weather.service.start()
+    screens.start()
 
     print("[DEBUG] Starting threads...")
 
     threading.Thread(target=buzzer_thread, daemon=True).start()
     threading.Thread(target=button_polling, daemon=True).start()
     threading.Thread(target=clock_thread, daemon=True).start()
-    threading.Thread(target=led_fade_thread, daemon=True).start()
+    threading.Thread(target=lights.run, daemon=True).start()
     threading.Thread(target=epaper_auto_thread, daemon=True).start()
 
+
+if __name__ == "__main__":
+    start()
+
     try:
         while True:
-            time.sleep(1)
+            clock.sleep(1)
     except KeyboardInterrupt:
         print("[DEBUG] KeyboardInterrupt, cleaning up")
         if led_nood_pwm:
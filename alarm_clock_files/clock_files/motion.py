@@ -0,0 +1,156 @@
+import threading
+from concurrent.futures import Future
+
+MINUTES_PER_DAY = 1440
+# Longest stretch handed to the driver at once; position is reported and
+# newly queued moves are merged between chunks.
+CHUNK_MINUTES = 10
+
+
+class MotionController:
+    """
+    Background owner of the stepper (gpio_setup.stepper_pins).
+
+    Moves are queued in clock minutes and never block the caller:
+      move_by(+5)            relative move
+      move_to(420)           absolute move, shortest way round
+      move_to(420, "forward") absolute move, forward only
+    Each call returns a Future resolved with the hand position once the
+    hands stop. Pending moves are merged into one net delta (so +5 then -5
+    cancels) and folded into a move that is already running.
+
+    The hands are driven in chunks of up to CHUNK_MINUTES; position is only
+    advanced after the steps for a chunk were issued, and on_position(pos)
+    is called each time so bookkeeping follows the real hands.
+
+    cond is the threading.Condition guarding the queue; pass
+    clock.Condition() from a hal clock so a VirtualClock can follow hand-offs.
+    """
+
+    def __init__(self, driver, position=0, steps_per_minute=512 / 60, on_position=None, cond=None):
+        self.driver = driver                    # driver(steps, more): signed, blocking
+        self.steps_per_minute = steps_per_minute
+        self.on_position = on_position
+        self._position = int(position) % MINUTES_PER_DAY
+        self._residual = 0.0                    # fractional steps carried between minutes
+        self._remaining = 0                     # minutes left in the running move
+        self._pending = 0                       # minutes queued but not yet picked up
+        self._pending_futures = []
+        self._active_futures = []
+        self._cond = threading.Condition() if cond is None else cond
+        self._thread = None
+        self.steps_issued = 0
+
+    # ----- state -----
+    @property
+    def position(self):
+        """Minute the hands are physically at."""
+        with self._cond:
+            return self._position
+
+    @property
+    def target(self):
+        """Minute the hands will be at once every queued move has run."""
+        with self._cond:
+            return self._projected()
+
+    def _projected(self):
+        return (self._position + self._remaining + self._pending) % MINUTES_PER_DAY
+
+    def _idle(self):
+        return (self._remaining == 0 and self._pending == 0
+                and not self._pending_futures and not self._active_futures)
+
+    def is_idle(self):
+        with self._cond:
+            return self._idle()
+
+    # ----- requests -----
+    def move_by(self, minutes):
+        fut = Future()
+        with self._cond:
+            self._pending += int(minutes)
+            self._pending_futures.append(fut)
+            self._cond.notify_all()
+        return fut
+
+    def move_to(self, minute, direction="shortest"):
+        with self._cond:
+            current = self._projected()
+            minute = int(minute) % MINUTES_PER_DAY
+            forward_m = (minute - current) % MINUTES_PER_DAY
+            backward_m = (current - minute) % MINUTES_PER_DAY
+            if direction == "forward" or (direction == "shortest" and forward_m <= backward_m):
+                delta = forward_m
+            else:
+                delta = -backward_m
+            return self.move_by(delta)
+
+    def set_position(self, minute):
+        """Redefine where the hands are (mechanical zero) once they stop."""
+        self.wait_idle()
+        with self._cond:
+            self._position = int(minute) % MINUTES_PER_DAY
+            self._residual = 0.0
+        self._report(self._position)
+
+    def wait_idle(self, timeout=None):
+        with self._cond:
+            return self._cond.wait_for(self._idle, timeout)
+
+    # ----- worker -----
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._idle():
+                    self._cond.wait()
+                # Merge everything queued into the running move
+                self._remaining += self._pending
+                self._pending = 0
+                self._active_futures.extend(self._pending_futures)
+                self._pending_futures = []
+                if self._remaining == 0:
+                    done, self._active_futures = self._active_futures, []
+                    pos = self._position
+                    self._cond.notify_all()
+                else:
+                    done = None
+                    sign = 1 if self._remaining > 0 else -1
+                    chunk = min(abs(self._remaining), CHUNK_MINUTES)
+                    # more: the next chunk continues in the same direction,
+                    # so the driver can skip its ramp-down
+                    more = abs(self._remaining) > chunk
+                    self._residual += sign * chunk * self.steps_per_minute
+                    steps = int(self._residual)
+                    self._residual -= steps
+
+            if done is not None:
+                for fut in done:
+                    fut.set_result(pos)
+                continue
+
+            try:
+                if steps:
+                    self.driver(steps, more)
+            except Exception as e:
+                print(f"[MOTION] driver error: {e}")
+            with self._cond:
+                self.steps_issued += abs(steps)
+                self._position = (self._position + sign * chunk) % MINUTES_PER_DAY
+                self._remaining -= sign * chunk
+                pos = self._position
+                self._cond.notify_all()
+            self._report(pos)
+
+    def _report(self, pos):
+        if self.on_position is not None:
+            try:
+                self.on_position(pos)
+            except Exception as e:
+                print(f"[MOTION] on_position error: {e}")
@@ -0,0 +1,228 @@
+import os
+import time
+
+# CLOCK_PWM=sysfs|pigpio|software forces a backend; unset tries them in
+# default_backends() order and falls back to RPi.GPIO's software PWM.
+ENV_VAR = "CLOCK_PWM"
+BACKENDS = ("sysfs", "pigpio", "software")
+
+SYSFS_ROOT = "/sys/class/pwm"
+# BCM pin -> channel of the SoC's PWM block (pwmchip0). 19 needs
+# dtoverlay=pwm,pin=19,func=2 in config.txt to be routed to PWM1.
+HARDWARE_CHANNELS = {12: 0, 18: 0, 13: 1, 19: 1}
+# rpi_ws281x sends to a NeoPixel on a channel 0 pin by reprogramming the
+# whole block, clock and both channels, so with a pixel there neither
+# hardware backend is tried unless asked for.
+PIXEL_BACKENDS = ("software",)
+
+# RPi.GPIO times its software PWM with a sleeping thread; above about
+# 1 kHz it only burns CPU and the duty cycle drifts.
+SOFTWARE_MAX_HZ = 1000
+
+GAMMA = 2.2
+
+
+def gamma_table(gamma=GAMMA, levels=100):
+    """Duty cycle (0-100) for each perceived brightness level 0..levels."""
+    return tuple(round(100.0 * (i / levels) ** gamma, 3) for i in range(levels + 1))
+
+
+DUTY = gamma_table()
+
+
+def duty(level):
+    """Gamma-corrected duty cycle for brightness level 0-100 (clamped, rounded)."""
+    return DUTY[max(0, min(100, int(round(level))))]
+
+
+class SysfsPWM:
+    """
+    One channel of the kernel's PWM driver under /sys/class/pwm.
+
+    The waveform comes from the SoC's PWM block; setting the duty cycle is a
+    single sysfs write, skipped when it has not changed. Raises OSError if
+    the channel cannot be exported (no overlay, no permission).
+    """
+
+    name = "sysfs"
+
+    def __init__(self, pin, frequency, root=SYSFS_ROOT, chip=0, export_timeout=1.0):
+        if pin not in HARDWARE_CHANNELS:
+            raise OSError(f"BCM {pin} has no hardware PWM channel")
+        self.pin = pin
+        self.chip_dir = os.path.join(root, f"pwmchip{chip}")
+        self.dir = os.path.join(self.chip_dir, f"pwm{HARDWARE_CHANNELS[pin]}")
+        self.period = None
+        self.duty = None
+        if not os.path.isdir(self.dir):
+            self._write(os.path.join(self.chip_dir, "export"), HARDWARE_CHANNELS[pin])
+            # udev fixes the new attributes' permissions a moment later
+            deadline = time.monotonic() + export_timeout
+            while not os.access(os.path.join(self.dir, "enable"), os.W_OK):
+                if time.monotonic() > deadline:
+                    raise OSError(f"{self.dir} did not appear after export")
+                time.sleep(0.01)
+        self.ChangeFrequency(frequency)
+
+    @staticmethod
+    def _write(path, value):
+        with open(path, "w") as f:
+            f.write(str(value))
+
+    def _set(self, name, value):
+        self._write(os.path.join(self.dir, name), value)
+
+    def start(self, duty):
+        self.ChangeDutyCycle(duty)
+        self._set("enable", 1)
+
+    def ChangeDutyCycle(self, duty):
+        ns = int(self.period * max(0.0, min(100.0, duty)) / 100)
+        if ns != self.duty:
+            self._set("duty_cycle", ns)
+            self.duty = ns
+
+    def ChangeFrequency(self, frequency):
+        period = int(1e9 / frequency)
+        if period == self.period:
+            return
+        percent = 0.0 if self.duty is None else 100.0 * self.duty / self.period
+        # the driver rejects a duty cycle longer than the period
+        if self.duty:
+            self._set("duty_cycle", 0)
+            self.duty = 0
+        self._set("period", period)
+        self.period = period
+        self.ChangeDutyCycle(percent)
+
+    def stop(self):
+        self.ChangeDutyCycle(0)
+        self._set("enable", 0)
+
+
+class PigpioPWM:
+    """
+    Hardware PWM through the pigpio daemon (hardware_PWM()). Raises OSError
+    if pigpio is missing or pigpiod is not running.
+    """
+
+    name = "pigpio"
+
+    def __init__(self, pin, frequency):
+        if pin not in HARDWARE_CHANNELS:
+            raise OSError(f"BCM {pin} has no hardware PWM channel")
+        try:
+            import pigpio
+        except ImportError as e:
+            raise OSError("pigpio is not installed") from e
+        self.pi = pigpio.pi()
+        if not self.pi.connected:
+            raise OSError("pigpiod is not running")
+        self.pin = pin
+        self.frequency = int(frequency)
+        self.duty = 0
+        self.running = False
+
+    def _apply(self):
+        self.pi.hardware_PWM(self.pin, self.frequency if self.running else 0, self.duty)
+
+    def start(self, duty):
+        self.running = True
+        self.duty = None
+        self.ChangeDutyCycle(duty)
+
+    def ChangeDutyCycle(self, duty):
+        value = int(max(0.0, min(100.0, duty)) * 10000)     # pigpio: 0..1,000,000
+        if value != self.duty:
+            self.duty = value
+            self._apply()
+
+    def ChangeFrequency(self, frequency):
+        self.frequency = int(frequency)
+        self._apply()
+
+    def stop(self):
+        self.running = False
+        self.duty = 0
+        self._apply()
+
+
+class SoftwarePWM:
+    """
+    RPi.GPIO's software PWM (gpio.PWM) on a pin it sets up as an output,
+    capped at SOFTWARE_MAX_HZ. At 0 % and 100 % its timing thread is
+    stopped and the pin driven steadily, and unchanged duty cycles are not
+    passed on.
+    """
+
+    name = "software"
+
+    def __init__(self, gpio, pin, frequency):
+        self.gpio = gpio
+        self.pin = pin
+        self.frequency = min(frequency, SOFTWARE_MAX_HZ)
+        self.pwm = None
+        self.duty = None
+        gpio.setup(pin, gpio.OUT, initial=gpio.LOW)
+
+    def start(self, duty):
+        self.duty = None
+        self.ChangeDutyCycle(duty)
+
+    def ChangeDutyCycle(self, duty):
+        duty = max(0.0, min(100.0, duty))
+        if duty == self.duty:
+            return
+        self.duty = duty
+        if duty in (0.0, 100.0):
+            if self.pwm is not None:
+                self.pwm.stop()
+                self.pwm = None
+            self.gpio.output(self.pin, self.gpio.HIGH if duty else self.gpio.LOW)
+        elif self.pwm is None:
+            self.pwm = self.gpio.PWM(self.pin, self.frequency)
+            self.pwm.start(duty)
+        else:
+            self.pwm.ChangeDutyCycle(duty)
+
+    def ChangeFrequency(self, frequency):
+        self.frequency = min(frequency, SOFTWARE_MAX_HZ)
+        if self.pwm is not None:
+            self.pwm.ChangeFrequency(self.frequency)
+
+    def stop(self):
+        if self.pwm is not None:
+            self.pwm.stop()
+            self.pwm = None
+        self.gpio.output(self.pin, self.gpio.LOW)
+        self.duty = None
+
+
+def default_backends(pixel_pins=()):
+    """BACKENDS, or PIXEL_BACKENDS if a NeoPixel is on a PWM channel 0 pin."""
+    if any(HARDWARE_CHANNELS.get(p) == 0 for p in pixel_pins):
+        return PIXEL_BACKENDS
+    return BACKENDS
+
+
+def open_pwm(pin, frequency, gpio, backend=None, root=SYSFS_ROOT, pixel_pins=()):
+    """
+    A PWM output on BCM pin with RPi.GPIO.PWM's methods (start,
+    ChangeDutyCycle, ChangeFrequency, stop), from the first backend that
+    works: backend, else $CLOCK_PWM, else default_backends(pixel_pins) in
+    order. pixel_pins are the BCM pins rpi_ws281x drives NeoPixels on.
+    """
+    backend = backend or os.environ.get(ENV_VAR, "").strip().lower() or None
+    if backend is not None and backend not in BACKENDS:
+        raise ValueError(f"{ENV_VAR}={backend!r}, expected one of {', '.join(BACKENDS)}")
+    for name in (backend,) if backend else default_backends(pixel_pins):
+        try:
+            if name == "sysfs":
+                return SysfsPWM(pin, frequency, root=root)
+            if name == "pigpio":
+                return PigpioPWM(pin, frequency)
+            return SoftwarePWM(gpio, pin, frequency)
+        except OSError as e:
+            if backend:
+                raise
+            print(f"[DEBUG] PWM {name} unavailable on BCM {pin}: {e}")
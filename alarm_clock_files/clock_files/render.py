@@ -0,0 +1,159 @@
+import os
+import time
+import logging
+from functools import lru_cache
+
+from PIL import Image, ImageDraw, ImageFont
+
+logger = logging.getLogger(__name__)
+
+picdir = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'pic')
+FONT_FILE = os.path.join(picdir, 'Font.ttc')
+ICON_DIR = '/home/edison/weather_icons'
+DROPLET_ICON = '/home/edison/droplet.bmp'
+
+# epd2in13_V4 is 122x250, drawn in landscape
+SCREEN_W = 250
+SCREEN_H = 122
+
+ICON_MAP = {
+    (200, 232): 'thunderstorm.bmp',
+    (300, 531): 'raining2.bmp',
+    (600, 622): 'snowing.bmp',
+    (701, 781): 'atmosphere.bmp',
+    (800, 800): 'clear.bmp',
+    (801, 802): 'cloud.bmp',
+    (803, 804): 'very_cloudy.bmp'
+}
+
+# screen name -> {stage: seconds} for the most recent render
+last_timings = {}
+
+
+# ========================= CACHES ============================
+@lru_cache(maxsize=16)
+def get_font(size):
+    return ImageFont.truetype(FONT_FILE, size)
+
+@lru_cache(maxsize=32)
+def get_icon(path, size=None):
+    icon = Image.open(path).convert('1')
+    if size is not None:
+        icon = icon.resize(size)
+    return icon
+
+def get_icon_path(weather_id):
+    for id_range, name in ICON_MAP.items():
+        if id_range[0] <= weather_id <= id_range[1]:
+            return os.path.join(ICON_DIR, name)
+
+def clear_caches():
+    get_font.cache_clear()
+    get_icon.cache_clear()
+    _static_layer.cache_clear()
+
+
+class StageTimer:
+    """Accumulates wall time per named render stage."""
+
+    def __init__(self, screen):
+        self.screen = screen
+        self.stages = {}
+        self._t = time.perf_counter()
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + (now - self._t)
+        self._t = now
+
+    def done(self):
+        self.stages["total"] = sum(self.stages.values())
+        last_timings[self.screen] = self.stages
+        logger.debug("render %s: %s", self.screen,
+                     ", ".join(f"{k}={v * 1000:.2f}ms" for k, v in self.stages.items()))
+
+
+# ========================= STATIC LAYERS ============================
+@lru_cache(maxsize=8)
+def _static_layer(screen):
+    """Everything on a screen that does not depend on data."""
+    w, h = SCREEN_W, SCREEN_H
+    image = Image.new('1', (w, h), 255)
+    draw = ImageDraw.Draw(image)
+
+    if screen == "calibrate":
+        draw.text((10, 5), "CALIBRATE MODE", font=get_font(24), fill=0)
+        draw.line([(0, 35), (w, 35)], fill=0, width=1)
+        draw.text((10, 45), "- Turn encoder to move hands", font=get_font(14), fill=0)
+        draw.text((10, 65), "- Hold RE button to exit", font=get_font(14), fill=0)
+
+    elif screen == "set_alarm":
+        draw.text((10, 5), "SET ALARM MODE", font=get_font(24), fill=0)
+        draw.line([(0, 35), (w, 35)], fill=0, width=1)
+        draw.text((10, 40), "- Turn encoder to set time", font=get_font(14), fill=0)
+        draw.text((10, 80), "- Hold RE to save & exit", font=get_font(14), fill=0)
+        draw.text((10, 60), "- Press RE to see exact time", font=get_font(14), fill=0)
+
+    elif screen == "main":
+        draw.line([(0, 25), (250, 25)], fill=0, width=1)
+        draw.rectangle([(0, 28), (39, 42)], fill=0, outline=0, width=1)
+        draw.rectangle([(52, 45), (81, 58)], fill=0, outline=0, width=1)
+        draw.rectangle([(190, 0), (250, 25)], fill=0, outline=0, width=1)
+        draw.text((192, 24), 'last updated', font=get_font(10), fill=0)
+        image.paste(get_icon(DROPLET_ICON, (13, 13)), (50, 78))
+        draw.line([(0, 98), (250, 98)], fill=0, width=1)
+        draw.line([(83, 98), (83, 122)], fill=0, width=1)
+        draw.line([(166, 98), (166, 122)], fill=0, width=1)
+
+    return image
+
+
+# ========================= SCREENS ============================
+def render_calibrate_screen():
+    timer = StageTimer("calibrate")
+    image = _static_layer("calibrate").copy()
+    timer.mark("static")
+    timer.done()
+    return image
+
+def render_set_alarm_screen(time_str=None):
+    timer = StageTimer("set_alarm")
+    image = _static_layer("set_alarm").copy()
+    timer.mark("static")
+    if time_str is not None:
+        ImageDraw.Draw(image).text((10, 100), f"Alarm Time: {time_str}", font=get_font(14), fill=0)
+    timer.mark("text")
+    timer.done()
+    return image
+
+def render_main_screen(forecast, current_date, current_time, alarm_str, city=''):
+    """forecast: list of at least 4 daily dicts as built by f_update."""
+    timer = StageTimer("main")
+    image = _static_layer("main").copy()
+    draw = ImageDraw.Draw(image)
+    font20 = get_font(20)
+    font12 = get_font(12)
+    font15 = get_font(14)
+    timer.mark("static")
+
+    draw.text((2, 0), current_date, font=font20, fill=0)
+    draw.text((2, 27), city, font=font12, fill=255)
+    draw.text((43, 27), str(forecast[0]['description']), font=font12, fill=0)
+    draw.text((53, 43), f"{forecast[0]['max_temp']} F", font=font15, fill=255)
+    draw.text((52, 59), f"{forecast[0]['min_temp']} F", font=font15, fill=0)
+    draw.text((64, 76), f"{forecast[0]['precipitation']}%", font=font15, fill=0)
+    draw.text((195, 2), current_time, font=font20, fill=255)
+    draw.text((0, 103), f"{forecast[1]['min_date']}|{forecast[1]['avg_temp']} F", font=font15, fill=0)
+    draw.text((85, 103), f"{forecast[2]['min_date']}|{forecast[2]['avg_temp']} F", font=font15, fill=0)
+    draw.text((168, 103), f"{forecast[3]['min_date']}|{forecast[3]['avg_temp']} F", font=font15, fill=0)
+    draw.text((120, 55), f"Alarm Time: {alarm_str}", font=font15, fill=0)
+    timer.mark("text")
+
+    image.paste(get_icon(get_icon_path(forecast[0]['id'])), (0, 45))
+    for day, x in ((1, 58), (2, 143), (3, 230)):
+        image.paste(get_icon(get_icon_path(forecast[day]['id']), (23, 23)), (x, 99))
+    # Frame around today's icon sits on top of it
+    draw.rectangle([(0, 45), (50, 95)], fill=None, outline=0, width=1)
+    timer.mark("icons")
+    timer.done()
+    return image
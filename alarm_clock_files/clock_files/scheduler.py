@@ -0,0 +1,96 @@
+import threading
+from concurrent.futures import Future
+
+# Request priorities: a pending request is only replaced by one of equal or
+# higher priority, so a button's mode-change screen is never dropped for
+# the hourly weather refresh, while the refresh gives way to it.
+PRIORITY_BACKGROUND = 0
+PRIORITY_INTERACTIVE = 1
+
+
+class RenderScheduler:
+    """
+    Single render worker with a latest-wins request slot.
+
+    screens maps a screen name to the function that renders and shows it
+    (f_update.update_display_main, ...). request(name) never blocks: it
+    puts the screen in the slot, replacing whatever was waiting there
+    unless that had a higher priority. The worker takes one request at a
+    time, so while a refresh runs any number of requests collapse into at
+    most one follow-up refresh.
+
+    request() returns a Future resolved with the name of the screen that
+    was shown once the request, or the one that superseded it, is done.
+
+    cond works as in MotionController: a hal clock's Condition() lets a
+    VirtualClock follow the hand-off to the worker.
+    """
+
+    def __init__(self, screens, cond=None):
+        self.screens = dict(screens)
+        self._pending = None                    # (priority, name)
+        self._pending_futures = []
+        self._busy = False
+        self._cond = threading.Condition() if cond is None else cond
+        self._thread = None
+        self.stats = {"requested": 0, "dropped": 0, "rendered": 0}
+
+    # ----- requests -----
+    def request(self, name, priority=PRIORITY_INTERACTIVE):
+        if name not in self.screens:
+            raise KeyError(f"unknown screen {name!r}")
+        fut = Future()
+        with self._cond:
+            self.stats["requested"] += 1
+            if self._pending is None or priority >= self._pending[0]:
+                if self._pending is not None:
+                    self.stats["dropped"] += 1
+                self._pending = (priority, name)
+            else:
+                self.stats["dropped"] += 1
+            self._pending_futures.append(fut)
+            self._cond.notify_all()
+        return fut
+
+    @property
+    def pending(self):
+        """Name of the screen waiting for the worker, or None."""
+        with self._cond:
+            return None if self._pending is None else self._pending[1]
+
+    def _idle(self):
+        return self._pending is None and not self._busy
+
+    def wait_idle(self, timeout=None):
+        with self._cond:
+            return self._cond.wait_for(self._idle, timeout)
+
+    # ----- worker -----
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None:
+                    self._cond.wait()
+                _, name = self._pending
+                futures = self._pending_futures
+                self._pending = None
+                self._pending_futures = []
+                self._busy = True
+
+            try:
+                self.screens[name]()
+            except Exception as e:
+                print(f"[RENDER] {name} failed: {e}")
+
+            for fut in futures:
+                fut.set_result(name)
+            with self._cond:
+                self.stats["rendered"] += 1
+                self._busy = False
+                self._cond.notify_all()
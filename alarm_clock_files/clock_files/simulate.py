@@ -0,0 +1,290 @@
+"""
+Accelerated-time simulation of the clock and alarm state machine.
+
+Runs main's clock_thread, button_polling (its InputDispatcher), buzzer_thread
+and the LED engine on hal.SimHardware for a number of simulated days, and
+replays a weekly script of button, encoder and arm-switch events against
+them. The stepper is replaced by a driver that only counts steps and takes
+as long as the real move, and the e-paper is not rendered (bench_sim.py
+covers both).
+
+Every minute the script's own model says whether the alarm should ring
+(armed, at alarm_time or a snooze, not cancelled for the day); rings are
+read back off the piezo pin. Prints a line per day and the totals: alarms
+missed or unexpected, stepper steps issued and config writes. Exits 1 if
+any alarm was missed or unexpected.
+
+    python simulate.py [days] [script] [-v]
+
+Script lines are `days time action`, `#` starts a comment:
+    days    mon-fri, sat,sun, * (every day) or a day number (1 = first)
+    time    HH:MM:SS, or ring+S / ringN+S: S seconds after every (or the
+            Nth) ring of that day starts
+    action  arm | disarm | press re|snooze SECONDS | turn cw|ccw DETENTS
+"""
+import contextlib
+import datetime
+import heapq
+import os
+import sys
+import tempfile
+import threading
+import time
+
+libdir = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'lib')
+if os.path.exists(libdir):
+    sys.path.append(libdir)
+
+import hal
+
+START = datetime.datetime(2025, 1, 5, 12, 0)    # a Sunday noon; the script sets the alarm that evening
+DAYS = 30
+DAY_NAMES = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+# Seconds between encoder edges in a scripted turn: 5 detents a second,
+# slow enough that every detent is one step (input_events.ACCELERATION)
+TURN_EDGE = 0.05
+
+DEFAULT_SCRIPT = """
+sun       21:00:00  press snooze 2.5    # set alarm mode, hands show 21:00
+sun       21:00:05  turn cw 117         # 21:00 + 117 x 5 min = 06:45
+sun       21:01:00  press re 2.5        # save, hands back to the time
+mon-fri   06:00:00  arm
+sat       09:00:00  disarm
+mon,wed   ring+20   press re 0.2        # up after 20 s
+tue       ring1+15  press snooze 0.2    # snooze once, up at the re-ring
+tue       ring2+30  press re 0.2
+fri       ring+40   press snooze 2.5    # off for the day
+sun       10:00:00  turn ccw 4          # dim the light in idle
+sun       10:00:30  turn cw 4
+"""
+# thu and sat: nobody reacts, the alarm auto-cancels after 10 minutes
+
+
+def parse_days(spec):
+    if spec == "*":
+        return lambda day, weekday: True
+    if spec.isdigit():
+        return lambda day, weekday: day == int(spec)
+    names = set()
+    for part in spec.split(","):
+        if "-" in part:
+            a, b = (DAY_NAMES.index(p) for p in part.split("-"))
+            names.update(DAY_NAMES[a:b + 1])
+        else:
+            DAY_NAMES.index(part)
+            names.add(part)
+    return lambda day, weekday: DAY_NAMES[weekday] in names
+
+
+def parse_script(text):
+    """[(day matcher, seconds of day or None, ring index or 0 or None, offset, action)]"""
+    entries = []
+    for n, line in enumerate(text.splitlines(), 1):
+        line = line.split("#")[0].split()
+        if not line:
+            continue
+        try:
+            days, when, action = parse_days(line[0]), line[1], line[2:]
+            if action[0] in ("arm", "disarm"):
+                action = (action[0],)
+            elif action[0] == "press" and action[1] in ("re", "snooze"):
+                action = ("press", action[1], float(action[2]))
+            elif action[0] == "turn" and action[1] in ("cw", "ccw"):
+                action = ("turn", 1 if action[1] == "cw" else -1, int(action[2]))
+            else:
+                raise ValueError(action[0])
+            if when.startswith("ring"):
+                ring, offset = when[4:].split("+")
+                entries.append((days, None, int(ring or 0), float(offset), action))
+            else:
+                h, m, s = (int(x) for x in when.split(":"))
+                entries.append((days, h * 3600 + m * 60 + s, None, 0.0, action))
+        except (ValueError, IndexError) as e:
+            raise ValueError(f"script line {n}: {' '.join(line)} ({e})")
+    return entries
+
+
+def counting_driver(clock, mode):
+    """driver(steps, more) for MotionController: no GPIO, same duration as StepperEngine."""
+    import stepper
+    seq, start_delay, cruise_delay = stepper.DRIVE_MODES[mode]
+    ramp = stepper.build_ramp(start_delay, cruise_delay)
+    top = len(ramp) - 1
+
+    def driver(steps, more=False):
+        n = abs(int(steps)) * len(seq)
+        clock.sleep(sum(ramp[min(i, top) if more else min(i, n - 1 - i, top)] for i in range(n)))
+    return driver
+
+
+def simulate(days=DAYS, script=DEFAULT_SCRIPT, start=START, workdir=None, log=print):
+    """Run `days` days from `start`; log(line) gets one line per day. Returns the totals."""
+    hw = hal.use(hal.SimHardware(start=start))
+    clock = hw.clock
+    entries = parse_script(script)
+
+    import config_manager
+    config_manager.store.path = os.path.join(workdir or tempfile.mkdtemp(), "config.json")
+
+    import gpio_setup
+    import main
+
+    main.setup(driver=counting_driver(clock, main.STEPPER_MODE))
+    for target in (main.buzzer_thread, main.button_polling, main.clock_thread, main.lights.run):
+        threading.Thread(target=target, daemon=True).start()
+
+    buttons = {"re": gpio_setup.sw, "snooze": gpio_setup.snz}
+    transitions = hw.gpio.transitions
+    model = {"armed": False, "cancelled": False, "snooze_due": None, "ring_start": None}
+    totals = {"expected": 0, "rang": 0, "missed": 0, "unexpected": 0, "snoozes": 0,
+              "auto_cancels": 0, "max_latency": 0.0}
+    day_log = []
+
+    def at(t):
+        return start + datetime.timedelta(seconds=t)
+
+    def act(action):
+        if action[0] in ("arm", "disarm"):
+            hw.inputs.set_level(gpio_setup.RGButton, 0 if action[0] == "arm" else 1)
+            model["armed"] = action[0] == "arm"
+            return
+        if action[0] == "turn":
+            hw.inputs.turn(gpio_setup.clk, gpio_setup.dt, action[1], detents=action[2], delay=TURN_EDGE)
+            return
+        _, name, held = action
+        if model["ring_start"] is not None:
+            model["ring_start"] = None
+            if name == "re":
+                day_log.append("up")
+            elif held >= main.LONG_PRESS:
+                model["cancelled"] = True
+                day_log.append("off for the day")
+            else:
+                now = at(clock.monotonic())
+                model["snooze_due"] = (now.hour * 60 + now.minute + 5) % 1440
+                day_log.append("snooze")
+        hw.inputs.press(buttons[name], held)
+
+    def close_day(day):
+        alarm = main.read_cfg_threadsafe().get("alarm_time", 0)
+        log(f"{day:%a %m-%d}  alarm {alarm // 60:02d}:{alarm % 60:02d}  " + (", ".join(day_log) or "-"))
+        day_log.clear()
+
+    queue = []                      # (virtual t, seq, action)
+    seq = 0
+    seen = 0                        # transitions already scanned
+    last_high = None
+    rings_today = 0
+    today = day = midnight = None
+    end = days * 86400.0
+    next_min = (60 - start.second - start.microsecond / 1e6) % 60
+    t0 = time.perf_counter()
+
+    while next_min < end:
+        when = at(next_min)
+        if when.date() != today:
+            if today is not None:
+                close_day(today)
+            today = when.date()
+            day = (today - start.date()).days + 1
+            midnight = next_min - (when - datetime.datetime.combine(today, datetime.time())).total_seconds()
+            for days_match, tod, ring, offset, action in entries:
+                if tod is not None and days_match(day, today.weekday()) and midnight + tod >= next_min:
+                    heapq.heappush(queue, (midnight + tod, seq, action))
+                    seq += 1
+            model["cancelled"] = False
+            rings_today = 0
+
+        if queue and queue[0][0] <= next_min:
+            t, _, action = heapq.heappop(queue)
+            clock.run_for(max(0.0, t - clock.monotonic()))
+            act(action)
+            continue
+
+        # what the minute starting now should do, by the script's own account
+        clock.run_for(next_min - clock.monotonic())
+        m = when.hour * 60 + when.minute
+        expected = False
+        if model["ring_start"] is not None and (m - model["ring_start"]) % 1440 >= 10:
+            model["ring_start"] = None
+            model["cancelled"] = True
+            totals["auto_cancels"] += 1
+            day_log.append("auto-cancel")
+        if model["ring_start"] is None:
+            if model["snooze_due"] == m:
+                model["snooze_due"] = None
+                totals["snoozes"] += 1
+                expected = True
+            elif (model["armed"] and not model["cancelled"]
+                  and main.read_cfg_threadsafe().get("alarm_time") == m):
+                expected = True
+        totals["expected"] += expected
+
+        # a ring is a piezo HIGH after more than a second of silence
+        clock.run_for(0.5)
+        rang = False
+        for t, pin, level in transitions[seen:]:
+            if pin != gpio_setup.piezo or level != 1:
+                continue
+            if last_high is None or t - last_high > 1.0:
+                rang = True
+                rings_today += 1
+                day_log.append(f"rang {at(t):%H:%M:%S}")
+                if expected:
+                    totals["rang"] += 1
+                    totals["max_latency"] = max(totals["max_latency"], t - next_min)
+                    model["ring_start"] = m
+                else:
+                    totals["unexpected"] += 1
+                    day_log.append("UNEXPECTED")
+                for days_match, tod, ring, offset, action in entries:
+                    if tod is None and days_match(day, today.weekday()) and ring in (0, rings_today):
+                        heapq.heappush(queue, (t + offset, seq, action))
+                        seq += 1
+            last_high = t
+        seen = len(transitions)
+        if expected and not rang:
+            totals["missed"] += 1
+            day_log.append(f"MISSED {m // 60:02d}:{m % 60:02d}")
+        next_min += 60
+
+    close_day(today)
+    real_s = time.perf_counter() - t0
+    config_manager.store.flush()
+    return dict(totals, days=days, real_s=real_s, virtual_s=clock.monotonic(),
+                events=clock.events, stalls=clock.stalls,
+                steps=main.motion.steps_issued,
+                config_writes=config_manager.store.stats["writes"],
+                disk_writes=config_manager.store.stats["disk_writes"],
+                screen_requests=main.screens.stats["requested"],
+                pixel_requests=main.chromatek.stats["requests"],
+                pixel_shows=main.chromatek.stats["shows"])
+
+
+def main():
+    args = [a for a in sys.argv[1:] if a != "-v"]
+    verbose = "-v" in sys.argv[1:]
+    days = int(args[0]) if args else DAYS
+    script = DEFAULT_SCRIPT
+    if len(args) > 1:
+        with open(args[1]) as f:
+            script = f.read()
+
+    quiet = open(os.devnull, "w")
+    out = sys.stdout
+    with contextlib.redirect_stdout(out if verbose else quiet):
+        r = simulate(days, script, log=lambda line: print(line, file=out))
+
+    print(f"\n{r['days']} days in {r['real_s']:.1f} s ({r['virtual_s'] / r['real_s']:.0f}x), "
+          f"{r['events']} clock events, {r['stalls']} stalls")
+    print(f"alarms expected {r['expected']}, rang {r['rang']}, missed {r['missed']}, "
+          f"unexpected {r['unexpected']}, latest {r['max_latency'] * 1000:.0f} ms after the minute")
+    print(f"snoozes {r['snoozes']}, auto-cancels {r['auto_cancels']}")
+    print(f"stepper steps issued {r['steps']}, config writes {r['config_writes']} "
+          f"({r['disk_writes']} to disk), screen requests {r['screen_requests']}")
+    print(f"chromatek color requests {r['pixel_requests']}, pushed to the strip {r['pixel_shows']}")
+    sys.exit(1 if r["missed"] or r["unexpected"] else 0)
+
+
+if __name__ == "__main__":
+    main()
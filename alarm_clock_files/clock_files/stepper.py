@@ -1,13 +1,59 @@
 #!/usr/bin/env python
-import RPi.GPIO as GPIO
 import time
-from gpio_setup import IN1, IN2, IN3, IN4
+from gpio_setup import IN1, IN2, IN3, IN4, stepper_pins
+
+import hal
+
+# Legacy forward()/setStep() output through this; None means the hal
+# hardware's GPIO. StepperEngine takes its gpio object as an argument.
+GPIO = None
+
+# Coil patterns for IN1..IN4, one row per phase.
+# One "step" in this module (and in main.STEP_PER_REV) is one full electrical
+# cycle, i.e. one pass through a table.
+WAVE_SEQ = (
+    (1, 0, 0, 0),
+    (0, 1, 0, 0),
+    (0, 0, 1, 0),
+    (0, 0, 0, 1),
+)
+FULL_STEP_SEQ = (               # two coils on: more torque than wave drive
+    (1, 1, 0, 0),
+    (0, 1, 1, 0),
+    (0, 0, 1, 1),
+    (1, 0, 0, 1),
+)
+HALF_STEP_SEQ = (               # alternates one and two coils, 8 phases
+    (1, 0, 0, 0),
+    (1, 1, 0, 0),
+    (0, 1, 0, 0),
+    (0, 1, 1, 0),
+    (0, 0, 1, 0),
+    (0, 0, 1, 1),
+    (0, 0, 0, 1),
+    (1, 0, 0, 1),
+)
+
+# mode: (phase table, start delay, cruise delay) in seconds per phase.
+# The 28BYJ-48's datasheet gives 600 pps pull-in and 1000 pps pull-out at
+# 5 V, counted in half-steps (4096 to an output turn); a full-step phase
+# is two of them. Half-step cruise at 1.2 ms is 833 pps, about 12 RPM and
+# 17 % under pull-out; both modes start at 500 pps.
+PULL_OUT_PPS = 1000
+DRIVE_MODES = {
+    "half": (HALF_STEP_SEQ, 0.0020, 0.0012),
+    "full": (FULL_STEP_SEQ, 0.0040, 0.0024),
+    "wave": (WAVE_SEQ, 0.0030, 0.0030),
+}
+RAMP_PHASES = 48                # phases to accelerate from start to cruise
+RESUME_WINDOW = 0.05            # a move queued this soon after a "more" move keeps its speed
 
 def setStep(w1, w2, w3, w4):
-    GPIO.output(IN1, w1)
-    GPIO.output(IN2, w2)
-    GPIO.output(IN3, w3)
-    GPIO.output(IN4, w4)
+    gpio = GPIO if GPIO is not None else hal.hardware().gpio
+    gpio.output(IN1, w1)
+    gpio.output(IN2, w2)
+    gpio.output(IN3, w3)
+    gpio.output(IN4, w4)
 
 def forward(delay, steps):
     """
@@ -45,3 +91,99 @@ def backward(delay, steps):
     Convenience wrapper: positive steps -> backward.
     """
     forward(delay, -abs(int(steps)))
+
+
+def build_ramp(start_delay, cruise_delay, phases=RAMP_PHASES):
+    """Per-phase delays for a linear speed ramp from start to cruise speed."""
+    if phases <= 0 or start_delay <= cruise_delay:
+        return (cruise_delay,)
+    v0 = 1.0 / start_delay
+    v1 = 1.0 / cruise_delay
+    return tuple(1.0 / (v0 + (v1 - v0) * i / phases) for i in range(phases + 1))
+
+
+class StepperEngine:
+    """
+    Table-driven 28BYJ-48 / ULN2003 driver.
+
+    Each phase is one multi-pin GPIO.output() call from a precomputed table,
+    timed against absolute deadlines on a trapezoidal speed profile: ramp up
+    over RAMP_PHASES, cruise, ramp down before the end. The phase index is
+    kept between moves so the coil sequence never jumps.
+
+    move(steps, more=True) skips the ramp-down because another move in the
+    same direction follows immediately; that move then starts at full speed.
+    """
+
+    def __init__(self, pins=stepper_pins, mode="half", gpio=None,
+                 sleep=time.sleep, clock=time.perf_counter):
+        self.gpio = gpio if gpio is not None else hal.hardware().gpio
+        self.pins = list(pins)
+        self.sleep = sleep
+        self.clock = clock
+        self.set_mode(mode)
+        self.gpio_calls = 0
+        self.phases_issued = 0
+
+    def set_mode(self, mode):
+        seq, start_delay, cruise_delay = DRIVE_MODES[mode]
+        self.mode = mode
+        self.phases = [list(p) for p in seq]
+        self.ramp = build_ramp(start_delay, cruise_delay)
+        self._phase = 0
+        self._speed_index = 0
+        self._moving_dir = 0
+        self._last_end = None
+
+    def move(self, steps, more=False):
+        """Run `steps` electrical cycles (signed) and block until done."""
+        steps = int(steps)
+        if steps == 0:
+            return
+        direction = 1 if steps > 0 else -1
+        n = abs(steps) * len(self.phases)
+        ramp = self.ramp
+        top = len(ramp) - 1
+        table = self.phases
+        nphase = len(table)
+        output = self.gpio.output
+        pins = self.pins
+        clock = self.clock
+        sleep = self.sleep
+
+        now = clock()
+        if (self._moving_dir == direction and self._last_end is not None
+                and now - self._last_end <= RESUME_WINDOW):
+            speed = self._speed_index
+        else:
+            speed = 0
+
+        phase = self._phase
+        deadline = now
+        for left in range(n - 1, -1, -1):
+            phase = (phase + direction) % nphase
+            output(pins, table[phase])
+            idx = speed if more else min(speed, left)
+            deadline += ramp[idx]
+            wait = deadline - clock()
+            if wait > 0:
+                sleep(wait)
+            else:
+                # Running late: never compress the next phases to catch up
+                deadline = clock()
+            if speed < top:
+                speed += 1
+
+        self._phase = phase
+        self.gpio_calls += n
+        self.phases_issued += n
+        self._moving_dir = direction if more else 0
+        self._speed_index = speed if more else 0
+        self._last_end = clock()
+
+    def release(self):
+        """De-energise all coils."""
+        self.gpio.output(self.pins, [0, 0, 0, 0])
+        self.gpio_calls += 1
+        self._moving_dir = 0
+        self._speed_index = 0
@@ -0,0 +1,183 @@
+import os
+import json
+import time
+import logging
+import threading
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+API_KEY = ''        # your API key
+LAT = '00.00'       # find the latitude and longitude of your location online
+LON = '00.00'
+UNITS = 'imperial'  # your preferred units
+BASE_URL = 'https://api.openweathermap.org/data/3.0/onecall'
+
+CACHE_FILE = "/home/edison/alarm_clock_files/clock_files/weather_cache.json"
+TTL = 3600              # seconds a forecast is considered fresh
+REFRESH_AHEAD = 300     # background refresh starts this long before expiry
+RETRY_DELAY = 120       # wait after a failed fetch before trying again
+TIMEOUT = 10
+
+
+class WeatherService:
+    """
+    Forecast source that never makes the display wait on the network.
+
+    get() answers from memory, falling back to the on-disk cache, and
+    returns stale data rather than nothing when a fetch fails. A background
+    thread (start()) refreshes REFRESH_AHEAD seconds before the TTL runs out
+    using a pooled requests.Session and ETag/Last-Modified conditional
+    requests. Entries are keyed by location and units. on_ready, if set, is
+    called from that thread when a fetch fills an empty cache.
+    """
+
+    def __init__(self, base_url=BASE_URL, api_key=API_KEY, lat=LAT, lon=LON, units=UNITS,
+                 ttl=TTL, refresh_ahead=REFRESH_AHEAD, cache_file=CACHE_FILE,
+                 session=None, timeout=TIMEOUT):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.lat = lat
+        self.lon = lon
+        self.units = units
+        self.ttl = ttl
+        self.refresh_ahead = min(refresh_ahead, ttl / 2)
+        self.cache_file = cache_file
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        self._lock = threading.Lock()
+        self._fetch_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._entries = None
+        self._thread = None
+        self._retry_at = 0.0
+        self.on_ready = None
+        self.stats = {"hits": 0, "misses": 0, "fetches": 0, "not_modified": 0, "errors": 0,
+                      "stale_served": 0}
+
+    @property
+    def key(self):
+        return f"{self.lat},{self.lon},{self.units}"
+
+    # ----- cache -----
+    def _load(self):
+        if self._entries is None:
+            self._entries = {}
+            if self.cache_file and os.path.exists(self.cache_file):
+                try:
+                    with open(self.cache_file, "r") as f:
+                        self._entries = json.load(f)
+                except (OSError, ValueError) as e:
+                    logger.warning("weather cache unreadable: %s", e)
+        return self._entries
+
+    def _save(self):
+        if not self.cache_file:
+            return
+        tmp_file = self.cache_file + ".tmp"
+        try:
+            with open(tmp_file, "w") as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_file, self.cache_file)
+        except OSError as e:
+            logger.warning("weather cache not saved: %s", e)
+
+    def _entry(self):
+        with self._lock:
+            return self._load().get(self.key)
+
+    def age(self):
+        entry = self._entry()
+        return None if entry is None else time.time() - entry["fetched_at"]
+
+    # ----- fetch -----
+    def refresh(self):
+        """Fetch now. Returns True if the cache holds fresh data afterwards."""
+        with self._fetch_lock:
+            entry = self._entry()
+            headers = {}
+            if entry is not None:
+                if entry.get("etag"):
+                    headers["If-None-Match"] = entry["etag"]
+                if entry.get("last_modified"):
+                    headers["If-Modified-Since"] = entry["last_modified"]
+            params = {
+                "appid": self.api_key,
+                "lat": self.lat,
+                "lon": self.lon,
+                "units": self.units,
+                "exclude": "minutely,hourly",
+            }
+            try:
+                resp = self.session.get(self.base_url, params=params, headers=headers,
+                                        timeout=self.timeout)
+                if resp.status_code == 304 and entry is not None:
+                    self.stats["not_modified"] += 1
+                    new_entry = dict(entry, fetched_at=time.time())
+                else:
+                    resp.raise_for_status()
+                    self.stats["fetches"] += 1
+                    new_entry = {
+                        "fetched_at": time.time(),
+                        "etag": resp.headers.get("ETag"),
+                        "last_modified": resp.headers.get("Last-Modified"),
+                        "data": resp.json(),
+                    }
+            except (requests.RequestException, ValueError) as e:
+                self.stats["errors"] += 1
+                self._retry_at = time.time() + RETRY_DELAY
+                logger.warning("weather fetch failed: %s", e)
+                return False
+            with self._lock:
+                self._load()[self.key] = new_entry
+                self._save()
+        if entry is None and self.on_ready is not None:
+            self.on_ready()
+        return True
+
+    def get(self):
+        """
+        Latest forecast JSON (the onecall response), or None if nothing was
+        ever fetched. Never waits on the network: an empty cache wakes the
+        background refresh, which calls on_ready once it has data.
+        """
+        entry = self._entry()
+        if entry is None:
+            self.stats["misses"] += 1
+            self._wake.set()
+            return None
+        if time.time() - entry["fetched_at"] >= self.ttl:
+            self.stats["stale_served"] += 1
+            self._wake.set()
+        else:
+            self.stats["hits"] += 1
+        return entry["data"]
+
+    # ----- background refresh -----
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._refresh_loop, daemon=True)
+            self._thread.start()
+        return self
+
+    def _next_refresh_in(self):
+        age = self.age()
+        if age is None:
+            due = 0.0
+        else:
+            due = self.ttl - self.refresh_ahead - age
+        return max(due, self._retry_at - time.time(), 0.0)
+
+    def _refresh_loop(self):
+        while True:
+            self._wake.wait(self._next_refresh_in())
+            woken = self._wake.is_set()
+            self._wake.clear()
+            if woken and time.time() < self._retry_at:
+                continue
+            if self._next_refresh_in() <= 0 or woken:
+                self.refresh()
+
+
+service = WeatherService()
@@ -29,6 +29,7 @@
 
 import logging
 from . import epdconfig
+from . import epdbuffer
 
 # Display resolution
 EPD_WIDTH       = 160
@@ -44,6 +45,7 @@ class EPD:
         self.cs_pin = epdconfig.CS_PIN
         self.width = EPD_WIDTH
         self.height = EPD_HEIGHT
+        self.frame = epdbuffer.FrameBuffer((self.width + 7) // 8 * self.height)
 
     # hardware reset
     def reset(self):
@@ -78,8 +80,7 @@ class EPD:
     # judge e-Paper whether is busy
     def busy(self):
         logger.debug("e-Paper busy")
-        while(epdconfig.digital_read(self.busy_pin) != 0): 
-            epdconfig.delay_ms(10)
+        epdconfig.wait_busy(self.busy_pin, 1, __name__, poll_ms=10)
         epdconfig.delay_ms(10)
         logger.debug("e-Paper busy release")
 
@@ -138,36 +139,15 @@ class EPD:
 
     # image converted to bytearray
     def getbuffer(self, image):
-        img = image
-        imwidth, imheight = img.size
-        if(imwidth == self.width and imheight == self.height):
-            img = img.convert('1')
-        elif(imwidth == self.height and imheight == self.width):
-            # image has correct dimensions, but needs to be rotated
-            img = img.rotate(90, expand=True).convert('1')
-        else:
-            logger.warning("Wrong image dimensions: must be " + str(self.width) + "x" + str(self.height))
-            # return a blank buffer
-            return [0x00] * (int(self.width/8) * self.height)
-
-        buf = bytearray(img.tobytes('raw'))
-        return buf
+        return epdbuffer.pack_1bpp(image, self.width, self.height, blank=0x00, rotate_first=True)
 
     # display image
     def display(self, imageblack, imagered):
-        if self.width%8 == 0:
-            linewidth = int(self.width/8)
-        else:
-            linewidth = int(self.width/8) + 1
-
         self.send_command(0x24)
         self.send_data2(imageblack)
         
-        for j in range(0, self.height):
-            for i in range(0, linewidth):
-                imagered[i+j*linewidth] = (~imagered[i+j*linewidth])&0xFF
         self.send_command(0x26)
-        self.send_data2(imagered)
+        self.send_data2(self.frame.invert(imagered))
         
         self.ondisplay()
         
@@ -178,12 +158,12 @@ class EPD:
         else:
             linewidth = int(self.width/8) + 1
             
-        buf = [0xff] * (int(linewidth * self.height))
+        buf = epdbuffer.fill(0xff, int(linewidth * self.height))
             
         self.send_command(0x24)
         self.send_data2(buf)
         
-        buf = [0x00] * (int(linewidth * self.height))
+        buf = epdbuffer.fill(0x00, int(linewidth * self.height))
         self.send_command(0x26)
         self.send_data2(buf)
         
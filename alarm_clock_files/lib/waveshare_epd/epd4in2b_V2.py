@@ -29,6 +29,7 @@
 
 import logging
 from . import epdconfig
+from . import epdbuffer
 
 # Display resolution
 EPD_WIDTH       = 400
@@ -44,6 +45,7 @@ class EPD:
         self.cs_pin = epdconfig.CS_PIN
         self.width = EPD_WIDTH
         self.height = EPD_HEIGHT
+        self.frame = epdbuffer.FrameBuffer((self.width + 7) // 8 * self.height)
         self.flag = 0
         
         if (epdconfig.module_init(cleanup=True) != 0):
@@ -81,12 +83,10 @@ class EPD:
     def ReadBusy(self):
         logger.debug("e-Paper busy")
         if(self.flag == 1):
-            while(epdconfig.digital_read(self.busy_pin) == 1): 
-                epdconfig.delay_ms(100) 
+            epdconfig.wait_busy(self.busy_pin, 1, __name__, poll_ms=100)
         
         else:
-            while(epdconfig.digital_read(self.busy_pin) == 0): 
-                epdconfig.delay_ms(100) 
+            epdconfig.wait_busy(self.busy_pin, 0, __name__, poll_ms=100)
         logger.debug("e-Paper busy release")
 
     def TurnOnDisplay(self):
@@ -155,28 +155,7 @@ class EPD:
         return 0
 
     def getbuffer(self, image):
-        # logger.debug("bufsiz = ",int(self.width/8) * self.height)
-        buf = [0xFF] * (int(self.width/8) * self.height)
-        image_monocolor = image.convert('1')
-        imwidth, imheight = image_monocolor.size
-        pixels = image_monocolor.load()
-        # logger.debug("imwidth = %d, imheight = %d",imwidth,imheight)
-        if(imwidth == self.width and imheight == self.height):
-            logger.debug("Horizontal")
-            for y in range(imheight):
-                for x in range(imwidth):
-                    # Set the bits for the column of pixels at the current position.
-                    if pixels[x, y] == 0:
-                        buf[int((x + y * self.width) / 8)] &= ~(0x80 >> (x % 8))
-        elif(imwidth == self.height and imheight == self.width):
-            logger.debug("Vertical")
-            for y in range(imheight):
-                for x in range(imwidth):
-                    newx = y
-                    newy = self.height - x - 1
-                    if pixels[x, y] == 0:
-                        buf[int((newx + newy*self.width) / 8)] &= ~(0x80 >> (y % 8))
-        return buf
+        return epdbuffer.pack_1bpp(image, self.width, self.height)
 
     def display(self, imageblack, imagered):
         high = self.height
@@ -192,9 +171,7 @@ class EPD:
                     self.send_data(imageblack[i + j * wide]) 
                     
             self.send_command(0x26)
-            for j in range(0, high):
-                for i in range(0, wide):
-                    self.send_data(~imagered[i + j * wide]) 
+            self.send_data2(self.frame.invert(imagered, wide * high))
         
         else:
             self.send_command(0x10)
@@ -203,9 +180,7 @@ class EPD:
                     self.send_data(imageblack[i + j * wide]) 
                     
             self.send_command(0x13)
-            for j in range(0, high):
-                for i in range(0, wide):
-                    self.send_data(~imagered[i + j * wide]) 
+            self.send_data2(self.frame.invert(imagered, wide * high))
 
         self.TurnOnDisplay()
         
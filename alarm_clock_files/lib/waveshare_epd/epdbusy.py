@@ -0,0 +1,81 @@
+# *****************************************************************************
+# * | File        :	  epdbusy.py
+# * | Function    :   Bounded wait on the BUSY pin, with per-driver timing
+# * | Info        :
+# *----------------
+# * | Info        :   Hardware-free core of epdconfig.wait_busy(); the pin
+# * |                 access is passed in, so this module imports nothing
+# * |                 platform specific.
+# ******************************************************************************
+
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Seconds a panel may hold BUSY before it is given up on. The slowest full
+# refreshes (7-color, 13.3") take around 30 s.
+DEFAULT_TIMEOUT = 60.0
+
+# driver name -> {"waits", "total", "max", "last", "timeouts"}, seconds
+stats = {}
+
+
+class BusyTimeout(RuntimeError):
+    '''The panel kept BUSY asserted past the timeout (hung, unpowered or unplugged)'''
+
+    def __init__(self, name, busy_level, timeout):
+        super().__init__("%s: BUSY still %d after %.1f s" % (name, busy_level, timeout))
+        self.name = name
+        self.busy_level = busy_level
+        self.timeout = timeout
+
+
+def record(name, seconds, timed_out=False):
+    '''
+    function : Add one wait to the stats of a driver
+    '''
+    entry = stats.setdefault(name, {"waits": 0, "total": 0.0, "max": 0.0, "last": 0.0, "timeouts": 0})
+    entry["waits"] += 1
+    entry["total"] += seconds
+    entry["max"] = max(entry["max"], seconds)
+    entry["last"] = seconds
+    if timed_out:
+        entry["timeouts"] += 1
+
+
+def wait_level(read, busy_level, name="epd", timeout=DEFAULT_TIMEOUT, poll_ms=10, poll=None,
+               wait_edge=None, clock=time.monotonic, sleep=time.sleep):
+    '''
+    function : Block while read() == busy_level
+    parameter:
+        read : returns the current BUSY level (0 or 1)
+        poll : called before every read, for controllers that only update
+               BUSY after a get-status command (0x71)
+        wait_edge : wait_edge(level, seconds) blocks until the pin reaches
+                    level or the time runs out. Without poll it is given the
+                    whole remaining timeout; with poll, poll_ms at a time.
+                    When None the pin is sampled every poll_ms.
+    Returns the seconds spent waiting; raises BusyTimeout.
+    '''
+    start = clock()
+    deadline = start + timeout
+    while True:
+        if poll is not None:
+            poll()
+        if read() != busy_level:
+            break
+        remaining = deadline - clock()
+        if remaining <= 0:
+            record(name, clock() - start, timed_out=True)
+            logger.error("%s: BUSY timeout after %.1f s", name, timeout)
+            raise BusyTimeout(name, busy_level, timeout)
+        if wait_edge is not None and poll is None:
+            wait_edge(1 - busy_level, remaining)
+        elif wait_edge is not None:
+            wait_edge(1 - busy_level, min(remaining, poll_ms / 1000.0))
+        else:
+            sleep(min(remaining, poll_ms / 1000.0))
+    elapsed = clock() - start
+    record(name, elapsed)
+    return elapsed
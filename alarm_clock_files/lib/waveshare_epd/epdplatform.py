@@ -0,0 +1,72 @@
+# *****************************************************************************
+# * | File        :	  epdplatform.py
+# * | Function    :   Board detection for epdconfig, without subprocesses
+# * | Info        :
+# *----------------
+# * | Info        :   Reads /proc/device-tree/model and /proc/cpuinfo
+# * |                 directly instead of forking `cat | grep` and
+# * |                 `getconf`. The result is cached per process and can be
+# * |                 forced with the EPD_PLATFORM environment variable.
+# ******************************************************************************
+
+import os
+import struct
+from functools import lru_cache
+
+ENV_VAR = "EPD_PLATFORM"
+
+RASPBERRY_PI = "raspberrypi"
+JETSON_NANO = "jetson"
+SUNRISE_X3 = "sunrisex3"
+MOCK = "mock"
+
+PLATFORMS = (RASPBERRY_PI, JETSON_NANO, SUNRISE_X3, MOCK)
+
+
+def _read(path):
+    try:
+        with open(path, "rb") as f:
+            return f.read().decode("ascii", "replace")
+    except OSError:
+        return ""
+
+
+def detect(environ=os.environ, root="/"):
+    '''
+    function : Name of the board, one of PLATFORMS
+    parameter:
+        environ : EPD_PLATFORM in here overrides the detection
+        root : prefix for /proc and /sys (for tests)
+    Same order as the old epdconfig: Raspberry Pi, then Sunrise X3, and
+    Jetson Nano when neither is found.
+    '''
+    forced = environ.get(ENV_VAR, "").strip().lower()
+    if forced:
+        if forced not in PLATFORMS:
+            raise ValueError("%s=%r, expected one of %s" % (ENV_VAR, forced, ", ".join(PLATFORMS)))
+        return forced
+
+    if "Raspberry" in _read(os.path.join(root, "proc/device-tree/model")):
+        return RASPBERRY_PI
+    if "Raspberry" in _read(os.path.join(root, "proc/cpuinfo")):
+        return RASPBERRY_PI
+    if os.path.exists(os.path.join(root, "sys/bus/platform/drivers/gpio-x3")):
+        return SUNRISE_X3
+    return JETSON_NANO
+
+
+@lru_cache(maxsize=None)
+def platform():
+    '''
+    function : detect() for this process, computed once
+    '''
+    return detect()
+
+
+@lru_cache(maxsize=None)
+def long_bit():
+    '''
+    function : Word size of this interpreter (32 or 64), for picking the
+               DEV_Config_32/64.so it can load
+    '''
+    return struct.calcsize("P") * 8
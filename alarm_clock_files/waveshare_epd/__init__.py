@@ -0,0 +1,2 @@
+# Driver modules are imported on demand, see epdregistry.get_driver()
+from .epdregistry import Panel, PANELS, panel_info, find, get_driver
@@ -30,6 +30,8 @@
 
 import logging
 from . import epdconfig
+from . import epdbuffer
+from . import framediff
 
 # Display resolution
 EPD_WIDTH       = 960
@@ -50,6 +52,7 @@ class EPD:
         self.cs_pin = epdconfig.CS_PIN
         self.width = EPD_WIDTH
         self.height = EPD_HEIGHT
+        self.frame = epdbuffer.FrameBuffer()
         if (epdconfig.module_init() != 0):
             return -1
     
@@ -82,10 +85,7 @@ class EPD:
 
     def ReadBusy(self):
         logger.debug("e-Paper busy")
-        busy = epdconfig.digital_read(self.busy_pin)
-        while(busy == 1):
-            busy = epdconfig.digital_read(self.busy_pin)
-            epdconfig.delay_ms(20)
+        epdconfig.wait_busy(self.busy_pin, 1, __name__, poll_ms=20)
         epdconfig.delay_ms(20)
         logger.debug("e-Paper busy release")
 
@@ -156,78 +156,43 @@ class EPD:
 
 
     def getbuffer(self, image):
-        # logger.debug("bufsiz = ",int(self.width/8) * self.height)
-        buf = [0xFF] * (int(self.width / 8) * self.height)
-        image_monocolor = image.convert('1')
-        imwidth, imheight = image_monocolor.size
-        pixels = image_monocolor.load()
-        # logger.debug("imwidth = %d, imheight = %d",imwidth,imheight)
-        if imwidth == self.width and imheight == self.height:
-            logger.debug("Horizontal")
-            for y in range(imheight):
-                for x in range(imwidth):
-                    # Set the bits for the column of pixels at the current position.
-                    if pixels[x, y] == 0:
-                        buf[int((x + y * self.width) / 8)] &= ~(0x80 >> (x % 8))
-        elif imwidth == self.height and imheight == self.width:
-            logger.debug("Vertical")
-            for y in range(imheight):
-                for x in range(imwidth):
-                    newx = y
-                    newy = self.height - x - 1
-                    if pixels[x, y] == 0:
-                        buf[int((newx + newy * self.width) / 8)] &= ~(0x80 >> (y % 8))
-        return buf
+        return epdbuffer.pack_1bpp(image, self.width, self.height)
 
     def Clear(self):
         self.send_command(0x24)
-        self.send_data2([0xFF] * (int(self.width/8) * self.height))
+        self.send_data2(epdbuffer.fill(0xFF, (int(self.width/8) * self.height)))
         self.send_command(0x26)
-        self.send_data2([0x00] * (int(self.width/8) * self.height))
+        self.send_data2(epdbuffer.fill(0x00, (int(self.width/8) * self.height)))
 
         self.TurnOnDisplay()
 
     def Clear_Base(self):
         self.send_command(0x24)
-        self.send_data2([0xFF] * (int(self.width/8) * self.height))
+        self.send_data2(epdbuffer.fill(0xFF, (int(self.width/8) * self.height)))
         self.send_command(0x26)
-        self.send_data2([0x00] * (int(self.width/8) * self.height))
+        self.send_data2(epdbuffer.fill(0x00, (int(self.width/8) * self.height)))
 
         self.TurnOnDisplay()
         self.send_command(0x26)
-        self.send_data2([0xFF] * (int(self.width/8) * self.height))
+        self.send_data2(epdbuffer.fill(0xFF, (int(self.width/8) * self.height)))
     
     def display(self, blackimage, ryimage):
-        if(self.width % 8 == 0):
-            Width = self.width // 8
-        else:
-            Width = self.width // 8 +1
-        Height = self.height
         if (blackimage != None):
             self.send_command(0x24)
             self.send_data2(blackimage)        
         if (ryimage != None):
-            for j in range(Height):
-                for i in range(Width):
-                    ryimage[i + j * Width] = ~ryimage[i + j * Width]
+            ryimage = epdbuffer.invert(ryimage)
             self.send_command(0x26)
             self.send_data2(ryimage)
 
         self.TurnOnDisplay()
 
     def display_Base(self, blackimage, ryimage):
-        if(self.width % 8 == 0):
-            Width = self.width // 8
-        else:
-            Width = self.width // 8 +1
-        Height = self.height
         if (blackimage != None):
             self.send_command(0x24)
             self.send_data2(blackimage)        
         if (ryimage != None):
-            for j in range(Height):
-                for i in range(Width):
-                    ryimage[i + j * Width] = ~ryimage[i + j * Width]
+            ryimage = epdbuffer.invert(ryimage)
             self.send_command(0x26)
             self.send_data2(ryimage)
 
@@ -237,24 +202,9 @@ class EPD:
         self.send_data2(blackimage)
 
     def display_Partial(self, Image, Xstart, Ystart, Xend, Yend):
-        if((Xstart % 8 + Xend % 8 == 8 & Xstart % 8 > Xend % 8) | Xstart % 8 + Xend % 8 == 0 | (Xend - Xstart)%8 == 0):
-            Xstart = Xstart // 8
-            Xend = Xend // 8
-        else:
-            Xstart = Xstart // 8 
-            if Xend % 8 == 0:
-                Xend = Xend // 8
-            else:
-                Xend = Xend // 8 + 1
-                
-        if(self.width % 8 == 0):
-            Width = self.width // 8
-        else:
-            Width = self.width // 8 +1
-        Height = self.height
-
-        Xend -= 1
-        Yend -= 1
+        linewidth = framediff.line_bytes(self.width)
+        window = framediff.pixel_window(Xstart, Ystart, Xend, Yend)
+        Xstart, Xend, Ystart, Yend = window
 
         self.send_command(0x3C) 
         self.send_data(0x80)
@@ -277,18 +227,13 @@ class EPD:
         self.send_data(Ystart & 0xff)
         self.send_data((Ystart>>8) & 0x01)
 
+        data = self.frame.window(Image, linewidth, window)
         self.send_command(0x24) 
-        for j in range(Height):
-            for i in range(Width):
-                if((j > Ystart-1) & (j < (Yend + 1)) & (i > Xstart-1) & (i < (Xend + 1))):
-                    self.send_data(Image[i + j * Width])
+        self.send_data2(data)
         self.TurnOnDisplay_Part()
 
         self.send_command(0x26) 
-        for j in range(Height):
-            for i in range(Width):
-                if((j > Ystart-1) & (j < (Yend + 1)) & (i > Xstart-1) & (i < (Xend + 1))):
-                    self.send_data(Image[i + j * Width])
+        self.send_data2(data)
 
     def sleep(self):
         self.send_command(0x10) # DEEP_SLEEP
@@ -30,6 +30,9 @@
 
 import logging
 from . import epdconfig
+from . import epdbuffer
+from . import framediff
+from . import epdseq
 
 # Display resolution
 EPD_WIDTH       = 122
@@ -86,6 +89,18 @@ class EPD:
         epdconfig.digital_write(self.cs_pin, 0)
         epdconfig.spi_writebyte2(data)
         epdconfig.digital_write(self.cs_pin, 1)
+
+    '''
+    function :send a batched sequence, one DC write and SPI write per run
+    parameter:
+     seq : epdseq.Sequence
+    '''
+    def send_seq(self, seq):
+        epdconfig.digital_write(self.cs_pin, 0)
+        for dc, data in seq.runs:
+            epdconfig.digital_write(self.dc_pin, dc)
+            epdconfig.spi_writebyte2(data)
+        epdconfig.digital_write(self.cs_pin, 1)
     
     '''
     function :Wait until the busy_pin goes LOW
@@ -93,8 +108,7 @@ class EPD:
     '''
     def ReadBusy(self):
         logger.debug("e-Paper busy")
-        while(epdconfig.digital_read(self.busy_pin) == 1):      # 0: idle, 1: busy
-            epdconfig.delay_ms(10)  
+        epdconfig.wait_busy(self.busy_pin, 1, __name__, poll_ms=10)      # 0: idle, 1: busy
         logger.debug("e-Paper busy release")
 
     '''
@@ -102,9 +116,9 @@ class EPD:
     parameter:
     '''
     def TurnOnDisplay(self):
-        self.send_command(0x22) # Display Update Control
-        self.send_data(0xf7)
-        self.send_command(0x20) # Activate Display Update Sequence
+        self.send_seq(epdseq.Sequence()
+                      .command(0x22, 0xf7)  # Display Update Control
+                      .command(0x20))       # Activate Display Update Sequence
         self.ReadBusy()
 
     '''
@@ -112,9 +126,9 @@ class EPD:
     parameter:
     '''
     def TurnOnDisplay_Fast(self):
-        self.send_command(0x22) # Display Update Control
-        self.send_data(0xC7)    # fast:0x0c, quality:0x0f, 0xcf
-        self.send_command(0x20) # Activate Display Update Sequence
+        self.send_seq(epdseq.Sequence()
+                      .command(0x22, 0xC7)  # Display Update Control; fast:0x0c, quality:0x0f, 0xcf
+                      .command(0x20))       # Activate Display Update Sequence
         self.ReadBusy()
     
     '''
@@ -122,9 +136,9 @@ class EPD:
     parameter:
     '''
     def TurnOnDisplayPart(self):
-        self.send_command(0x22) # Display Update Control
-        self.send_data(0xff)    # fast:0x0c, quality:0x0f, 0xcf
-        self.send_command(0x20) # Activate Display Update Sequence
+        self.send_seq(epdseq.Sequence()
+                      .command(0x22, 0xff)  # Display Update Control; fast:0x0c, quality:0x0f, 0xcf
+                      .command(0x20))       # Activate Display Update Sequence
         self.ReadBusy()
 
 
@@ -135,34 +149,49 @@ class EPD:
         ystart : Y-axis starting position
         xend : End position of X-axis
         yend : End position of Y-axis
+        seq : append to this epdseq.Sequence instead of sending now
     '''
-    def SetWindow(self, x_start, y_start, x_end, y_end):
-        self.send_command(0x44) # SET_RAM_X_ADDRESS_START_END_POSITION
+    def SetWindow(self, x_start, y_start, x_end, y_end, seq=None):
+        out = epdseq.Sequence() if seq is None else seq
+        # SET_RAM_X_ADDRESS_START_END_POSITION
         # x point must be the multiple of 8 or the last 3 bits will be ignored
-        self.send_data((x_start>>3) & 0xFF)
-        self.send_data((x_end>>3) & 0xFF)
-        
-        self.send_command(0x45) # SET_RAM_Y_ADDRESS_START_END_POSITION
-        self.send_data(y_start & 0xFF)
-        self.send_data((y_start >> 8) & 0xFF)
-        self.send_data(y_end & 0xFF)
-        self.send_data((y_end >> 8) & 0xFF)
+        out.command(0x44, (x_start>>3) & 0xFF, (x_end>>3) & 0xFF)
+        # SET_RAM_Y_ADDRESS_START_END_POSITION
+        out.command(0x45, y_start & 0xFF, (y_start >> 8) & 0xFF, y_end & 0xFF, (y_end >> 8) & 0xFF)
+        if seq is None:
+            self.send_seq(out)
 
     '''
     function : Set Cursor
     parameter:
         x : X-axis starting position
         y : Y-axis starting position
+        seq : append to this epdseq.Sequence instead of sending now
     '''
-    def SetCursor(self, x, y):
-        self.send_command(0x4E) # SET_RAM_X_ADDRESS_COUNTER
+    def SetCursor(self, x, y, seq=None):
+        out = epdseq.Sequence() if seq is None else seq
+        # SET_RAM_X_ADDRESS_COUNTER
         # x point must be the multiple of 8 or the last 3 bits will be ignored
-        self.send_data(x & 0xFF)
-        
-        self.send_command(0x4F) # SET_RAM_Y_ADDRESS_COUNTER
-        self.send_data(y & 0xFF)
-        self.send_data((y >> 8) & 0xFF)
+        out.command(0x4E, x & 0xFF)
+        # SET_RAM_Y_ADDRESS_COUNTER
+        out.command(0x4F, y & 0xFF, (y >> 8) & 0xFF)
+        if seq is None:
+            self.send_seq(out)
     
+    # Register setup after a reset, shared by init() and wake()
+    def _init_seq(self):
+        seq = epdseq.Sequence()
+        seq.command(0x01, 0xf9, 0x00, 0x00) #Driver output control
+        seq.command(0x11, 0x03) #data entry mode
+
+        self.SetWindow(0, 0, self.width-1, self.height-1, seq)
+        self.SetCursor(0, 0, seq)
+
+        seq.command(0x3c, 0x05)
+        seq.command(0x21, 0x00, 0x80) #  Display update control
+        seq.command(0x18, 0x80)
+        return seq
+
     '''
     function : Initialize the e-Paper register
     parameter:
@@ -177,29 +206,26 @@ class EPD:
         self.send_command(0x12)  #SWRESET
         self.ReadBusy() 
 
-        self.send_command(0x01) #Driver output control      
-        self.send_data(0xf9)
-        self.send_data(0x00)
-        self.send_data(0x00)
-    
-        self.send_command(0x11) #data entry mode       
-        self.send_data(0x03)
+        self.send_seq(self._init_seq())
 
-        self.SetWindow(0, 0, self.width-1, self.height-1)
-        self.SetCursor(0, 0)
+        self.ReadBusy()
         
-        self.send_command(0x3c)
-        self.send_data(0x05)
+        return 0
 
-        self.send_command(0x21) #  Display update control
-        self.send_data(0x00)
-        self.send_data(0x80)
-    
-        self.send_command(0x18)
-        self.send_data(0x80)
-        
+    '''
+    function : Wake from deep_sleep(): the short reset pulse of displayPartial()
+               and the register setup of init(), without module_init() and
+               SWRESET. Deep sleep mode 1 keeps both RAM banks, so partials can
+               go on from the last frame.
+    parameter:
+    '''
+    def wake(self):
+        epdconfig.digital_write(self.reset_pin, 0)
+        epdconfig.delay_ms(1)
+        epdconfig.digital_write(self.reset_pin, 1)
         self.ReadBusy()
-        
+
+        self.send_seq(self._init_seq())
         return 0
 
     '''
@@ -215,27 +241,23 @@ class EPD:
         self.send_command(0x12)  #SWRESET
         self.ReadBusy() 
 
-        self.send_command(0x18) # Read built-in temperature sensor
-        self.send_command(0x80)
+        seq = epdseq.Sequence()
+        seq.command(0x18) # Read built-in temperature sensor
+        seq.command(0x80)
+        seq.command(0x11, 0x03) # data entry mode
 
-        self.send_command(0x11) # data entry mode       
-        self.send_data(0x03)    
+        self.SetWindow(0, 0, self.width-1, self.height-1, seq)
+        self.SetCursor(0, 0, seq)
 
-        self.SetWindow(0, 0, self.width-1, self.height-1)
-        self.SetCursor(0, 0)
-        
-        self.send_command(0x22) # Load temperature value
-        self.send_data(0xB1)	
-        self.send_command(0x20)
+        seq.command(0x22, 0xB1) # Load temperature value
+        seq.command(0x20)
+        self.send_seq(seq)
         self.ReadBusy()
 
-        self.send_command(0x1A) # Write to temperature register
-        self.send_data(0x64)
-        self.send_data(0x00)
-                        
-        self.send_command(0x22) # Load temperature value
-        self.send_data(0x91)	
-        self.send_command(0x20)
+        self.send_seq(epdseq.Sequence()
+                      .command(0x1A, 0x64, 0x00)  # Write to temperature register
+                      .command(0x22, 0x91)        # Load temperature value
+                      .command(0x20))
         self.ReadBusy()
         
         return 0
@@ -245,20 +267,7 @@ class EPD:
         image : Image data
     '''
     def getbuffer(self, image):
-        img = image
-        imwidth, imheight = img.size
-        if(imwidth == self.width and imheight == self.height):
-            img = img.convert('1')
-        elif(imwidth == self.height and imheight == self.width):
-            # image has correct dimensions, but needs to be rotated
-            img = img.rotate(90, expand=True).convert('1')
-        else:
-            logger.warning("Wrong image dimensions: must be " + str(self.width) + "x" + str(self.height))
-            # return a blank buffer
-            return [0x00] * (int(self.width/8) * self.height)
-
-        buf = bytearray(img.tobytes('raw'))
-        return buf
+        return epdbuffer.pack_1bpp(image, self.width, self.height, blank=0x00, rotate_first=True)
         
     '''
     function : Sends the image buffer in RAM to e-Paper and displays
@@ -279,6 +288,13 @@ class EPD:
         self.send_command(0x24)
         self.send_data2(image) 
         self.TurnOnDisplay_Fast()
+    # BorderWavefrom, Driver output control and data entry mode ahead of a partial
+    def _partial_seq(self):
+        return (epdseq.Sequence()
+                .command(0x3C, 0x80)
+                .command(0x01, 0xF9, 0x00, 0x00)
+                .command(0x11, 0x03))
+
     '''
     function : Sends the image buffer in RAM to e-Paper and partial refresh
     parameter:
@@ -289,22 +305,38 @@ class EPD:
         epdconfig.delay_ms(1)
         epdconfig.digital_write(self.reset_pin, 1)  
 
-        self.send_command(0x3C) # BorderWavefrom
-        self.send_data(0x80)
-
-        self.send_command(0x01) # Driver output control      
-        self.send_data(0xF9) 
-        self.send_data(0x00)
-        self.send_data(0x00)
+        seq = self._partial_seq()
+        self.SetWindow(0, 0, self.width - 1, self.height - 1, seq)
+        self.SetCursor(0, 0, seq)
+        seq.command(0x24) # WRITE_RAM
+        self.send_seq(seq)
+        self.send_data2(image)
+        self.TurnOnDisplayPart()
 
-        self.send_command(0x11) # data entry mode       
-        self.send_data(0x03)
+    '''
+    function : Partial refresh that only sends the changed RAM windows
+    parameter:
+        image : Image data (full packed frame)
+        windows : [(x_byte_start, x_byte_end, y_start, y_end), ...] from
+                  framediff.dirty_windows(); RAM outside them keeps the
+                  previous frame
+    '''
+    def displayPartialWindows(self, image, windows):
+        epdconfig.digital_write(self.reset_pin, 0)
+        epdconfig.delay_ms(1)
+        epdconfig.digital_write(self.reset_pin, 1)
 
-        self.SetWindow(0, 0, self.width - 1, self.height - 1)
-        self.SetCursor(0, 0)
-        
-        self.send_command(0x24) # WRITE_RAM
-        self.send_data2(image)  
+        # every window (address, cursor, WRITE_RAM and its bytes) goes out
+        # in the same batch as the preamble
+        seq = self._partial_seq()
+        linewidth = framediff.line_bytes(self.width)
+        for window in windows:
+            x0, x1, y0, y1 = window
+            self.SetWindow(x0 * 8, y0, x1 * 8 + 7, y1, seq)
+            self.SetCursor(x0, y0, seq)
+            seq.command(0x24) # WRITE_RAM
+            seq.data_bytes(framediff.window_bytes(image, linewidth, window))
+        self.send_seq(seq)
         self.TurnOnDisplayPart()
 
     '''
@@ -332,16 +364,23 @@ class EPD:
         # logger.debug(linewidth)
         
         self.send_command(0x24)
-        self.send_data2([color] * int(self.height * linewidth))  
+        self.send_data2(epdbuffer.fill(color, int(self.height * linewidth)))  
         self.TurnOnDisplay()
 
+    '''
+    function : Enter deep sleep mode 1 (RAM kept) and leave the bus open;
+               wake() brings the panel back
+    parameter:
+    '''
+    def deep_sleep(self):
+        self.send_seq(epdseq.Sequence().command(0x10, 0x01)) #enter deep sleep
+
     '''
     function : Enter sleep mode
     parameter:
     '''
     def sleep(self):
-        self.send_command(0x10) #enter deep sleep
-        self.send_data(0x01)
+        self.send_seq(epdseq.Sequence().command(0x10, 0x01)) #enter deep sleep
         
         epdconfig.delay_ms(2000)
         epdconfig.module_exit()
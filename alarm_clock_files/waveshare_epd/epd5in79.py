@@ -30,6 +30,8 @@
 
 import logging
 from . import epdconfig
+from . import epdbuffer
+from . import framediff
 
 # Display resolution
 EPD_WIDTH       = 792
@@ -50,6 +52,7 @@ class EPD:
         self.cs_pin = epdconfig.CS_PIN
         self.width = EPD_WIDTH
         self.height = EPD_HEIGHT
+        self.frame = epdbuffer.FrameBuffer((self.width + 7) // 8 * self.height)
         self.GRAY1  = GRAY1 #white
         self.GRAY2  = GRAY2
         self.GRAY3  = GRAY3 #gray
@@ -127,8 +130,7 @@ class EPD:
         
     def ReadBusy(self):
         logger.debug("e-Paper busy")
-        while(epdconfig.digital_read(self.busy_pin) == 1):      #  0: idle, 1: busy
-            epdconfig.delay_ms(200)
+        epdconfig.wait_busy(self.busy_pin, 1, __name__, poll_ms=200)      #  0: idle, 1: busy
         logger.debug("e-Paper busy release")
 
     def TurnOnDisplay(self):
@@ -371,64 +373,10 @@ class EPD:
         return 0
 
     def getbuffer(self, image):
-        # logger.debug("bufsiz = ",int(self.width/8) * self.height)
-        buf = [0xFF] * (int(self.width / 8) * self.height)
-        image_monocolor = image.convert('1')
-        imwidth, imheight = image_monocolor.size
-        pixels = image_monocolor.load()
-        # logger.debug("imwidth = %d, imheight = %d",imwidth,imheight)
-        if imwidth == self.width and imheight == self.height:
-            logger.debug("Horizontal")
-            for y in range(imheight):
-                for x in range(imwidth):
-                    # Set the bits for the column of pixels at the current position.
-                    if pixels[x, y] == 0:
-                        buf[int((x + y * self.width) / 8)] &= ~(0x80 >> (x % 8))
-        elif imwidth == self.height and imheight == self.width:
-            logger.debug("Vertical")
-            for y in range(imheight):
-                for x in range(imwidth):
-                    newx = y
-                    newy = self.height - x - 1
-                    if pixels[x, y] == 0:
-                        buf[int((newx + newy * self.width) / 8)] &= ~(0x80 >> (y % 8))
-        return buf
+        return epdbuffer.pack_1bpp(image, self.width, self.height)
     
     def getbuffer_4Gray(self, image):
-        # logger.debug("bufsiz = ",int(self.width/8) * self.height)
-        buf = [0xFF] * (int(self.width / 4) * self.height)
-        image_monocolor = image.convert('L')
-        imwidth, imheight = image_monocolor.size
-        pixels = image_monocolor.load()
-        i=0
-        # logger.debug("imwidth = %d, imheight = %d",imwidth,imheight)
-        if(imwidth == self.width and imheight == self.height):
-            logger.debug("Vertical")
-            for y in range(imheight):
-                for x in range(imwidth):
-                    # Set the bits for the column of pixels at the current position.
-                    if(pixels[x, y] == 0xC0):
-                        pixels[x, y] = 0x80
-                    elif (pixels[x, y] == 0x80):
-                        pixels[x, y] = 0x40
-                    i= i+1
-                    if(i%4 == 0):
-                        buf[int((x + (y * self.width))/4)] = ((pixels[x-3, y]&0xc0) | (pixels[x-2, y]&0xc0)>>2 | (pixels[x-1, y]&0xc0)>>4 | (pixels[x, y]&0xc0)>>6)
-                        
-        elif(imwidth == self.height and imheight == self.width):
-            logger.debug("Horizontal")
-            for x in range(imwidth):
-                for y in range(imheight):
-                    newx = y
-                    newy = self.height - x - 1
-                    if(pixels[x, y] == 0xC0):
-                        pixels[x, y] = 0x80
-                    elif (pixels[x, y] == 0x80):
-                        pixels[x, y] = 0x40
-                    i= i+1
-                    if(i%4 == 0):
-                        buf[int((newx + (newy * self.width))/4)] = ((pixels[x, y-3]&0xc0) | (pixels[x, y-2]&0xc0)>>2 | (pixels[x, y-1]&0xc0)>>4 | (pixels[x, y]&0xc0)>>6) 
-        return buf
+        return epdbuffer.pack_4gray(image, self.width, self.height)
 
     def display(self, imageblack):
         Width =int(self.width / 16)+1
@@ -438,13 +386,13 @@ class EPD:
         for i in range(self.height):
             self.send_data2(imageblack[i * Width1 : i * Width1+Width])
         self.send_command(0X26)
-        self.send_data2([0x00] * 13600)
+        self.send_data2(epdbuffer.fill(0x00, 13600))
 
         self.send_command(0xA4)
         for i in range(self.height):
             self.send_data2(imageblack[i * Width1 + Width - 1 : i * Width1 + Width * 2 - 1])
         self.send_command(0xA6)
-        self.send_data2([0x00] * 13600)
+        self.send_data2(epdbuffer.fill(0x00, 13600))
 
         self.TurnOnDisplay()
 
@@ -456,13 +404,13 @@ class EPD:
         for i in range(self.height):
             self.send_data2(imageblack[i * Width1 : i * Width1+Width])
         self.send_command(0X26)
-        self.send_data2([0x00] * 13600)
+        self.send_data2(epdbuffer.fill(0x00, 13600))
 
         self.send_command(0xA4)
         for i in range(self.height):
             self.send_data2(imageblack[i * Width1 + Width - 1 : i * Width1 + Width * 2 - 1])
         self.send_command(0xA6)
-        self.send_data2([0x00] * 13600)
+        self.send_data2(epdbuffer.fill(0x00, 13600))
 
         self.TurnOnDisplay()
 
@@ -479,22 +427,22 @@ class EPD:
         Width1 =int(self.width / 8)
         
         self.send_command(0x24)
-        self.send_data2([color] * 13600)
+        self.send_data2(epdbuffer.fill(color, 13600))
         self.send_command(0X26)
-        self.send_data2([0x00] * 13600)
+        self.send_data2(epdbuffer.fill(0x00, 13600))
 
         self.send_command(0xA4)
-        self.send_data2([color] * 13600)
+        self.send_data2(epdbuffer.fill(color, 13600))
         self.send_command(0xA6)
-        self.send_data2([0x00] * 13600)
+        self.send_data2(epdbuffer.fill(0x00, 13600))
 
         self.TurnOnDisplay()
 
         self.send_command(0x26)
-        self.send_data2([color] * 13600)
+        self.send_data2(epdbuffer.fill(color, 13600))
 
         self.send_command(0xA6)
-        self.send_data2([color] * 13600)
+        self.send_data2(epdbuffer.fill(color, 13600))
 
     def display_Fast(self, imageblack):
         Width =int(self.width / 16)+1
@@ -504,13 +452,13 @@ class EPD:
         for i in range(self.height):
             self.send_data2(imageblack[i * Width1 : i * Width1+Width])
         self.send_command(0X26)
-        self.send_data2([0x00] * 13600)
+        self.send_data2(epdbuffer.fill(0x00, 13600))
 
         self.send_command(0xA4)
         for i in range(self.height):
             self.send_data2(imageblack[i * Width1 + Width - 1 : i * Width1 + Width * 2 - 1])
         self.send_command(0xA6)
-        self.send_data2([0x00] * 13600)
+        self.send_data2(epdbuffer.fill(0x00, 13600))
 
         self.TurnOnDisplay_Fast()
     
@@ -562,103 +510,39 @@ class EPD:
     def display_4Gray(self, image):
         Width =int(self.width / 16)+1
         Width1 =int(self.width / 8)
+        # each controller gets Width bytes of every row, the second one
+        # starting on the first one's last byte
+        master = (0, Width - 1, 0, self.height - 1)
+        slave = (Width - 1, 2 * Width - 2, 0, self.height - 1)
+        # both planes share the frame buffer: cut the windows out of the
+        # first before the second overwrites it
+        plane = self.frame.plane(image, (0, 1, 0, 1))
+        master1 = framediff.window_bytes(plane, Width1, master)
+        slave1 = framediff.window_bytes(plane, Width1, slave)
+        plane = self.frame.plane(image, (0, 0, 1, 1))
 
         self.send_command(0x24)
-        for j in range(self.height):   
-            for i in range(Width):
-                temp3=0
-                for o in range(0, 2):
-                    temp1 = image[(j * Width1 + i)*2+o]
-                    for k in range(0, 4):
-                        temp2 = temp1&0xC0 
-                        if(temp2 == 0xC0):
-                            temp3 |= 0x01
-                        elif(temp2 == 0x00):
-                            temp3 |= 0x00  
-                        elif(temp2 == 0x80): 
-                            temp3 |= 0x00 
-                        else: #0x40
-                            temp3 |= 0x01 
-                        if(o!=1 or k!=3):
-                            temp3 <<= 1
-                        temp1 <<= 2
-                self.send_data(temp3)
-            
-        self.send_command(0x26)	       
-        for j in range(self.height):   
-            for i in range(Width):
-                temp3=0
-                for o in range(0, 2):
-                    temp1 = image[(j * Width1 + i)*2+o]
-                    for k in range(0, 4):
-                        temp2 = temp1&0xC0 
-                        if(temp2 == 0xC0):
-                            temp3 |= 0x01
-                        elif(temp2 == 0x00):
-                            temp3 |= 0x00  
-                        elif(temp2 == 0x80): 
-                            temp3 |= 0x01 
-                        else: #0x40
-                            temp3 |= 0x00 
-                        if(o!=1 or k!=3):
-                            temp3 <<= 1
-                        temp1 <<= 2
-                self.send_data(temp3)
+        self.send_data2(master1)
+        self.send_command(0x26)
+        self.send_data2(framediff.window_bytes(plane, Width1, master))
 
         self.send_command(0xA4)
-        for j in range(self.height):   
-            for i in range(Width):
-                temp3=0
-                for o in range(0, 2):
-                    temp1 = image[(j * Width1 + i + Width - 1)*2+o]
-                    for k in range(0, 4):
-                        temp2 = temp1&0xC0 
-                        if(temp2 == 0xC0):
-                            temp3 |= 0x01
-                        elif(temp2 == 0x00):
-                            temp3 |= 0x00  
-                        elif(temp2 == 0x80): 
-                            temp3 |= 0x00 
-                        else: #0x40
-                            temp3 |= 0x01 
-                        if(o!=1 or k!=3):
-                            temp3 <<= 1
-                        temp1 <<= 2
-                self.send_data(temp3)
-            
-        self.send_command(0xA6)	       
-        for j in range(self.height):   
-            for i in range(Width):
-                temp3=0
-                for o in range(0, 2):
-                    temp1 = image[(j * Width1 + i + Width - 1)*2+o]
-                    for k in range(0, 4):
-                        temp2 = temp1&0xC0 
-                        if(temp2 == 0xC0):
-                            temp3 |= 0x01
-                        elif(temp2 == 0x00):
-                            temp3 |= 0x00  
-                        elif(temp2 == 0x80): 
-                            temp3 |= 0x01 
-                        else: #0x40
-                            temp3 |= 0x00 
-                        if(o!=1 or k!=3):
-                            temp3 <<= 1
-                        temp1 <<= 2
-                self.send_data(temp3)
-        
+        self.send_data2(slave1)
+        self.send_command(0xA6)
+        self.send_data2(framediff.window_bytes(plane, Width1, slave))
+
         self.TurnOnDisplay_4GRAY()
 
     def Clear(self):
         self.send_command(0x24)
-        self.send_data2([0xFF] * 13600)
+        self.send_data2(epdbuffer.fill(0xFF, 13600))
         self.send_command(0X26)
-        self.send_data2([0x00] * 13600)
+        self.send_data2(epdbuffer.fill(0x00, 13600))
 
         self.send_command(0xA4)
-        self.send_data2([0xFF] * 13600)
+        self.send_data2(epdbuffer.fill(0xFF, 13600))
         self.send_command(0xA6)
-        self.send_data2([0x00] * 13600)
+        self.send_data2(epdbuffer.fill(0x00, 13600))
 
         self.TurnOnDisplay()
 
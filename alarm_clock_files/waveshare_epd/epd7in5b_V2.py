@@ -30,6 +30,8 @@
 
 import logging
 from . import epdconfig
+from . import epdbuffer
+from . import framediff
 
 # Display resolution
 EPD_WIDTH       = 800
@@ -46,6 +48,7 @@ class EPD:
         self.width = EPD_WIDTH
         self.height = EPD_HEIGHT
         self.partFlag=1
+        self.frame = epdbuffer.FrameBuffer()
 
     # Hardware reset
     def reset(self):
@@ -76,11 +79,7 @@ class EPD:
 
     def ReadBusy(self):
         logger.debug("e-Paper busy")
-        self.send_command(0x71)
-        busy = epdconfig.digital_read(self.busy_pin)
-        while(busy == 0):
-            self.send_command(0x71)
-            busy = epdconfig.digital_read(self.busy_pin)
+        epdconfig.wait_busy(self.busy_pin, 0, __name__, poll=lambda: self.send_command(0x71))
         epdconfig.delay_ms(200)
         logger.debug("e-Paper busy release")
         
@@ -185,24 +184,9 @@ class EPD:
         return 0
 
     def getbuffer(self, image):
-        img = image
-        imwidth, imheight = img.size
-        if(imwidth == self.width and imheight == self.height):
-            img = img.convert('1')
-        elif(imwidth == self.height and imheight == self.width):
-            # image has correct dimensions, but needs to be rotated
-            img = img.rotate(90, expand=True).convert('1')
-        else:
-            logger.warning("Wrong image dimensions: must be " + str(self.width) + "x" + str(self.height))
-            # return a blank buffer
-            return [0x00] * (int(self.width/8) * self.height)
-
-        buf = bytearray(img.tobytes('raw'))
         # The bytes need to be inverted, because in the PIL world 0=black and 1=white, but
         # in the e-paper world 0=white and 1=black.
-        for i in range(len(buf)):
-            buf[i] ^= 0xFF
-        return buf
+        return epdbuffer.pack_1bpp(image, self.width, self.height, blank=0x00, invert=True, rotate_first=True)
 
     def display(self, imageblack, imagered):
         self.send_command(0x10)
@@ -239,18 +223,8 @@ class EPD:
         self.ReadBusy()
 
     def display_Partial(self, Image, Xstart, Ystart, Xend, Yend):
-        if((Xstart % 8 + Xend % 8 == 8 & Xstart % 8 > Xend % 8) | Xstart % 8 + Xend % 8 == 0 | (Xend - Xstart)%8 == 0):
-            Xstart = Xstart // 8 * 8
-            Xend = Xend // 8 * 8
-        else:
-            Xstart = Xstart // 8 * 8
-            if Xend % 8 == 0:
-                Xend = Xend // 8 * 8
-            else:
-                Xend = Xend // 8 * 8 + 1
-                
-        Width = (Xend - Xstart) // 8
-        Height = Yend - Ystart
+        window = framediff.pixel_window(Xstart, Ystart, Xend, Yend)
+        Xstart, Xend = window[0] * 8, (window[1] + 1) * 8
 	
         # self.send_command(0x50)
         # self.send_data(0xA9)
@@ -274,20 +248,18 @@ class EPD:
         if self.partFlag == 1:
             self.partFlag = 0
             self.send_command(0x10)
-            for j in range(Height):
-                    for i in range(Width):
-                        self.send_data(0xff)
+            self.send_data2(epdbuffer.fill(0xff, (Xend - Xstart) // 8 * (Yend - Ystart)))
 
         self.send_command(0x13)   #Write Black and White image to RAM
-        self.send_data2(Image)
+        self.send_data2(self.frame.window(Image, framediff.line_bytes(self.width), window))
 
         self.send_command(0x12)
         epdconfig.delay_ms(100)
         self.ReadBusy()
         
     def Clear(self):
-        buf = [0x00] * (int(self.width/8) * self.height)
-        buf2 = [0xff] * (int(self.width/8) * self.height)
+        buf = epdbuffer.fill(0x00, int(self.width/8) * self.height)
+        buf2 = epdbuffer.fill(0xff, int(self.width/8) * self.height)
         self.send_command(0x10)
         self.send_data2(buf2)
             
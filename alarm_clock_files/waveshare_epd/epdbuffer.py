@@ -0,0 +1,295 @@
+# *****************************************************************************
+# * | File        :	  epdbuffer.py
+# * | Function    :   Shared frame buffer packing for the monochrome and 4Gray drivers
+# * | Info        :
+# *----------------
+# * | Info        :   All packing runs inside PIL (convert/rotate/tobytes)
+# * |                 instead of a per-pixel Python loop. Output is
+# * |                 byte-identical to the loops it replaces.
+# * |                 FrameBuffer and fill() keep display()/Clear() free
+# * |                 of per-frame allocations.
+# ******************************************************************************
+
+import logging
+from functools import lru_cache
+
+from PIL import Image
+
+from .framediff import line_bytes
+
+logger = logging.getLogger(__name__)
+
+# bytes.translate() table flipping every bit of a byte
+INVERT_TABLE = bytes(0xFF - i for i in range(256))
+
+# One packed 1-bpp byte (8 pixels, 1 = white) expanded to the wider pixel
+# formats of the older controllers.
+# epd7in5: 4 bits per pixel, white = 0x3, black = 0x0
+EXPAND_4BPP = tuple(
+    bytes(((0x30 if b & (0x80 >> (2 * k)) else 0) | (0x03 if b & (0x40 >> (2 * k)) else 0))
+          for k in range(4))
+    for b in range(256))
+# epd5in83: 2 bits per pixel, white = 0b11, black = 0b00
+EXPAND_2BPP = tuple(
+    bytes(sum(0xC0 >> (2 * j) for j in range(4) if b & (0x80 >> (4 * k + j))) for k in range(2))
+    for b in range(256))
+
+# 4Gray: getbuffer_4Gray() moves 0xC0 to 0x80 and 0x80 to 0x40, then keeps
+# the top two bits. One table per crumb position turns an 'L' byte straight
+# into its 2-bit level shifted into place (first pixel in the top bits).
+GRAY_LEVELS = bytes((0x80 if v == 0xC0 else 0x40 if v == 0x80 else v) >> 6 for v in range(256))
+GRAY_TABLES = tuple(bytes(level << (6 - 2 * k) for level in GRAY_LEVELS) for k in range(4))
+
+# FrameBuffer transforms walk the source this many output bytes at a time,
+# so no frame-sized temporary is ever built
+CHUNK = 4096
+
+
+def oriented(image, width, height, rotate_first=False):
+    '''
+    function : The image as a mode '1' image in panel orientation
+    parameter:
+        image : PIL image, width x height or height x width
+        rotate_first : rotate before dithering to 1 bit (the order some
+                       drivers always used) instead of after
+    Returns None when the image fits neither orientation.
+    '''
+    imwidth, imheight = image.size
+    if imwidth == width and imheight == height:
+        return image.convert('1')
+    if imwidth == height and imheight == width:
+        # same mapping as the old loops: newx = y, newy = height - x - 1
+        if rotate_first:
+            return image.rotate(90, expand=True).convert('1')
+        return image.convert('1').rotate(90, expand=True)
+    logger.warning("Wrong image dimensions: must be %dx%d", width, height)
+    return None
+
+
+def pack_1bpp(image, width, height, blank=0xFF, invert=False, rotate_first=False):
+    '''
+    function : Pack a PIL image into the controller's 1-bpp RAM layout
+    parameter:
+        image : PIL image, native (width x height) or rotated (height x width)
+        blank : fill byte returned for an image of the wrong size
+        invert : 1 = black instead of PIL's 1 = white
+    Rows are MSB first and padded to whole bytes. The padding bits are 1
+    (white) as the per-pixel loops left them; with rotate_first they stay
+    0 as in the drivers that always used tobytes(). Returns a bytearray.
+    '''
+    img = oriented(image, width, height, rotate_first)
+    if img is None:
+        return bytearray([blank]) * (line_bytes(width) * height)
+    if width % 8 and not rotate_first:
+        frame = Image.new('1', (line_bytes(width) * 8, height), 255)
+        frame.paste(img, (0, 0))
+        img = frame
+    buf = img.tobytes('raw')
+    if invert:
+        buf = buf.translate(INVERT_TABLE)
+    return bytearray(buf)
+
+
+def invert(buf):
+    '''
+    function : A bit-inverted copy of a packed buffer (list or bytes-like)
+    '''
+    return bytearray(bytes(buf).translate(INVERT_TABLE))
+
+
+def expand(buf, table):
+    '''
+    function : Widen a packed 1-bpp buffer with one of the EXPAND_* tables
+    '''
+    return bytearray(b''.join(map(table.__getitem__, buf)))
+
+
+def pack_1bpp_mirrored(image, width, height):
+    '''
+    function : pack_1bpp() for controllers with mirrored RAM columns (epd2in13_V2)
+    Image column x lands in RAM column width - x, i.e. one column further
+    right than a plain flip, exactly as the original loop wrote it. A
+    rotated image is transposed instead, which the same loop amounted to.
+    '''
+    imwidth, imheight = image.size
+    if imwidth == height and imheight == width:
+        return pack_1bpp(image.convert('1').transpose(Image.TRANSPOSE), width, height)
+    if imwidth != width or imheight != height:
+        return pack_1bpp(image, width, height)
+    frame = Image.new('1', (line_bytes(width) * 8, height), 255)
+    frame.paste(image.convert('1').transpose(Image.FLIP_LEFT_RIGHT), (1, 0))
+    return bytearray(frame.tobytes('raw'))
+
+
+def _or_bytes(parts, n):
+    """Byte-wise OR of equal-length byte strings with disjoint bits."""
+    out = 0
+    for part in parts:
+        out |= int.from_bytes(part, 'big')
+    return bytearray(out.to_bytes(n, 'big'))
+
+
+def pack_4gray(image, width, height, blank=0xFF, transpose=False):
+    '''
+    function : getbuffer_4Gray(): 2 bits per pixel, four pixels per byte
+    parameter:
+        image : PIL image, native or rotated, converted to 'L'
+        transpose : map a rotated image (x, y) -> (y, x) as epd4in2 and
+                    epd4in2_V2 do, instead of rotating it
+    '''
+    imwidth, imheight = image.size
+    img = image.convert('L')
+    if imwidth == height and imheight == width:
+        img = img.transpose(Image.TRANSPOSE) if transpose else img.rotate(90, expand=True)
+    elif imwidth != width or imheight != height:
+        logger.warning("Wrong image dimensions: must be %dx%d", width, height)
+        return bytearray([blank]) * (width // 4 * height)
+    data = img.tobytes('raw')
+    return _or_bytes((data[k::4].translate(GRAY_TABLES[k]) for k in range(4)), len(data) // 4)
+
+
+def store_window(dst, linewidth, window, data):
+    '''
+    function : Write window bytes (laid out as FrameBuffer.window() returns
+               them) back into the packed frame dst
+    '''
+    x0, x1, y0, y1 = window
+    w = x1 - x0 + 1
+    dst = memoryview(dst)
+    data = memoryview(data)
+    start = y0 * linewidth + x0
+    for off in range(0, len(data), w):
+        dst[start:start + w] = data[off:off + w]
+        start += linewidth
+
+
+@lru_cache(maxsize=None)
+def _plane_tables(bits):
+    nibbles = bytes(sum(bits[(b >> (6 - 2 * j)) & 3] << (3 - j) for j in range(4)) for b in range(256))
+    return bytes(n << 4 for n in nibbles), nibbles
+
+
+def gray_plane(buf, bits):
+    '''
+    function : One 1-bpp RAM plane of a pack_4gray() buffer
+    parameter:
+        bits : the plane's bit for each 2-bit level, indexed by level
+               (0 = black, 1 = 0x40, 2 = 0x80, 3 = white)
+    Every two 2-bpp bytes become one plane byte, first pixel in the MSB.
+    '''
+    hi, lo = _plane_tables(tuple(bits))
+    buf = bytes(buf)
+    return _or_bytes((buf[0::2].translate(hi), buf[1::2].translate(lo)), len(buf) // 2)
+
+
+@lru_cache(maxsize=32)
+def fill(value, size):
+    '''
+    function : A constant buffer of size bytes, built once and shared by
+               every Clear() of that panel
+    '''
+    return bytes([value & 0xFF]) * size
+
+
+def _source(buf):
+    """A memoryview on a packed frame; lists of 0-255 (or ~x) are packed once."""
+    if isinstance(buf, list):
+        buf = bytes(b & 0xFF for b in buf)
+    return memoryview(buf)
+
+
+class FrameBuffer:
+    '''
+    One transfer buffer per panel, reused by every display().
+
+    Frames that must be transformed before they go out (inverted, split
+    into 4Gray planes) are written into it CHUNK bytes at a time, and the
+    filled part is returned as a memoryview that spidev's writebytes2()
+    sends as is. The buffer only grows, the first time a larger frame
+    comes through.
+    '''
+
+    def __init__(self, size=0):
+        self.buf = bytearray(size)
+        self.view = memoryview(self.buf)
+
+    def reserve(self, size):
+        '''
+        function : Make room for size bytes; returns the view on them
+        '''
+        if len(self.buf) < size:
+            self.buf = bytearray(size)
+            self.view = memoryview(self.buf)
+        return self.view[:size]
+
+    def translate(self, buf, table, count=None, size=None, pad=0x00):
+        '''
+        function : buf mapped through a 256-byte table
+        parameter:
+            count : use only the first count bytes of buf (no copy is made)
+            size : length of the result when longer than that, the tail
+                   filled with pad
+        '''
+        src = _source(buf)[:count]
+        n = len(src)
+        size = n if size is None else size
+        out = self.reserve(size)
+        for off in range(0, n, CHUNK):
+            end = min(off + CHUNK, n)
+            out[off:end] = src[off:end].tobytes().translate(table)
+        if size > n:
+            out[n:] = fill(pad, size - n)
+        return out
+
+    def invert(self, buf, count=None, size=None, pad=0xFF):
+        '''
+        function : buf with every bit flipped (the drivers' ~image loops)
+        '''
+        return self.translate(buf, INVERT_TABLE, count, size, pad)
+
+    def window(self, buf, linewidth, window, table=None):
+        '''
+        function : The bytes of a packed frame inside a framediff window,
+                   contiguous for one send_data2()
+        parameter:
+            buf : the whole frame, linewidth bytes per row
+            window : (x_byte_start, x_byte_end, y_start, y_end), inclusive
+            table : optional 256-byte translate table (INVERT_TABLE)
+        Rows are copied as memoryview slices, so no byte goes through
+        Python on its own. A full-width window without a table is a view
+        on buf itself.
+        '''
+        x0, x1, y0, y1 = window
+        src = _source(buf)
+        w = x1 - x0 + 1
+        n = w * (y1 - y0 + 1)
+        if w == linewidth:
+            out = src[y0 * linewidth:y0 * linewidth + n]
+            if table is None:
+                return out
+            return self.translate(out, table)
+        out = self.reserve(n)
+        start = y0 * linewidth + x0
+        for off in range(0, n, w):
+            out[off:off + w] = src[start:start + w]
+            start += linewidth
+        if table is not None:
+            for off in range(0, n, CHUNK):
+                end = min(off + CHUNK, n)
+                out[off:end] = out[off:end].tobytes().translate(table)
+        return out
+
+    def plane(self, buf, bits):
+        '''
+        function : gray_plane() of a pack_4gray() buffer, into this buffer
+        '''
+        hi, lo = _plane_tables(tuple(bits))
+        src = _source(buf)
+        n = len(src) // 2
+        out = self.reserve(n)
+        for off in range(0, n, CHUNK):
+            end = min(off + CHUNK, n)
+            part = src[2 * off:2 * end].tobytes()
+            word = int.from_bytes(part[0::2].translate(hi), 'big') | int.from_bytes(part[1::2].translate(lo), 'big')
+            out[off:end] = word.to_bytes(end - off, 'big')
+        return out
@@ -0,0 +1,152 @@
+# *****************************************************************************
+# * | File        :	  epdcolor.py
+# * | Function    :   Palette quantization and pixel packing for the color panels
+# * | Info        :
+# *----------------
+# * | Info        :   4-color (g) panels take 2 bits per pixel, 7-color (f/e)
+# * |                 panels 4 bits per pixel, first pixel in the top bits.
+# * |                 The default (Floyd-Steinberg) output is byte-identical
+# * |                 to the per-driver loops it replaces.
+# ******************************************************************************
+
+import logging
+from functools import lru_cache
+
+from PIL import Image, ImageChops
+
+logger = logging.getLogger(__name__)
+
+# Panel palettes in index order, as the drivers define them
+PALETTE_4COLOR = (0,0,0,  255,255,255,  255,255,0,   255,0,0)
+PALETTE_7COLOR = (0,0,0,  255,255,255,  0,255,0,   0,0,255,  255,0,0,  255,255,0, 255,128,0)
+PALETTE_7IN3E = (0,0,0,  255,255,255,  255,255,0,  255,0,0,  0,0,0,  0,0,255,  0,255,0)
+
+WHITE = 1           # palette index of white on every panel
+
+# dither modes for quantize()
+NONE = "none"
+ORDERED = "ordered"
+FLOYDSTEINBERG = "floydsteinberg"
+
+BAYER_4X4 = (0, 8, 2, 10,
+             12, 4, 14, 6,
+             3, 11, 1, 9,
+             15, 7, 13, 5)
+
+# v << shift for every byte value, one table per pixel slot in a byte
+CRUMB_TABLES = tuple(bytes(((v & 3) << (6 - 2 * k)) for v in range(256)) for k in range(4))
+NIBBLE_HIGH = bytes(((v & 0x0F) << 4) for v in range(256))
+
+
+@lru_cache(maxsize=None)
+def palette_image(palette):
+    '''
+    function : The "P" image quantize() maps onto, built once per palette
+    '''
+    pal_image = Image.new("P", (1, 1))
+    pal_image.putpalette(palette + (0, 0, 0) * (256 - len(palette) // 3))
+    return pal_image
+
+
+@lru_cache(maxsize=4)
+def _bayer_image(width, height):
+    rows = [(bytes(v * 16 + 8 for v in BAYER_4X4[4 * y:4 * y + 4]) * (width // 4 + 1))[:width]
+            for y in range(4)]
+    pattern = Image.frombytes("L", (width, height), b''.join(rows[y % 4] for y in range(height)))
+    return Image.merge("RGB", (pattern, pattern, pattern))
+
+
+def oriented(image, width, height):
+    '''
+    function : The image in panel orientation, or None if it fits neither
+    '''
+    imwidth, imheight = image.size
+    if imwidth == width and imheight == height:
+        return image
+    if imwidth == height and imheight == width:
+        return image.rotate(90, expand=True)
+    logger.warning("Invalid image dimensions: %d x %d, expected %d x %d" % (imwidth, imheight, width, height))
+    return None
+
+
+def quantize(image, palette, dither=FLOYDSTEINBERG):
+    '''
+    function : Palette indices of an image, one byte per pixel
+    parameter:
+        palette : one of the PALETTE_* tuples
+        dither : NONE, ORDERED (4x4 Bayer threshold) or FLOYDSTEINBERG
+    '''
+    rgb = image.convert("RGB")
+    if dither == ORDERED:
+        rgb = ImageChops.add(rgb, _bayer_image(*rgb.size), 1.0, -128)
+        dither = NONE
+    mode = Image.FLOYDSTEINBERG if dither == FLOYDSTEINBERG else Image.NONE
+    return rgb.quantize(palette=palette_image(palette), dither=mode).tobytes('raw')
+
+
+def pack_crumbs(indices, width, height):
+    '''
+    function : 2 bits per pixel, rows padded to whole bytes with index 0
+    '''
+    linewidth = (width + 3) // 4
+    if width % 4:
+        rows = Image.frombytes("L", (width, height), indices)
+        padded = Image.new("L", (linewidth * 4, height), 0)
+        padded.paste(rows, (0, 0))
+        indices = padded.tobytes('raw')
+    out = 0
+    for k in range(4):
+        out |= int.from_bytes(indices[k::4].translate(CRUMB_TABLES[k]), 'big')
+    return bytearray(out.to_bytes(linewidth * height, 'big'))
+
+
+def pack_nibbles(indices):
+    '''
+    function : 4 bits per pixel, two pixels per byte
+    '''
+    out = int.from_bytes(indices[0::2].translate(NIBBLE_HIGH), 'big') | int.from_bytes(indices[1::2], 'big')
+    return bytearray(out.to_bytes(len(indices) // 2, 'big'))
+
+
+def pack_4color(image, width, height, palette=PALETTE_4COLOR, dither=FLOYDSTEINBERG):
+    '''
+    function : getbuffer() of the 4-color panels
+    '''
+    img = oriented(image, width, height)
+    if img is None:
+        return bytearray([WHITE * 0x55]) * ((width + 3) // 4 * height)
+    return pack_crumbs(quantize(img, palette, dither), width, height)
+
+
+def pack_7color(image, width, height, palette=PALETTE_7COLOR, dither=FLOYDSTEINBERG):
+    '''
+    function : getbuffer() of the 7-color panels
+    '''
+    img = oriented(image, width, height)
+    if img is None:
+        return bytearray([WHITE * 0x11]) * (width * height // 2)
+    return pack_nibbles(quantize(img, palette, dither))
+
+
+# epd4in01f takes exact palette colors only; anything else becomes black.
+# Each channel is classified through point() and the three codes are
+# summed into one key, which a last point() turns into the palette index.
+_EXACT_R = [0 if v == 0 else 16 if v == 255 else 128 for v in range(256)]
+_EXACT_G = [0 if v == 0 else 4 if v == 255 else 8 if v == 128 else 128 for v in range(256)]
+_EXACT_B = [0 if v == 0 else 1 if v == 255 else 128 for v in range(256)]
+_EXACT_INDEX = [0] * 256
+for _index in range(len(PALETTE_7COLOR) // 3):
+    _r, _g, _b = PALETTE_7COLOR[3 * _index:3 * _index + 3]
+    _EXACT_INDEX[_EXACT_R[_r] + _EXACT_G[_g] + _EXACT_B[_b]] = _index
+
+
+def pack_7color_exact(image, width, height):
+    '''
+    function : epd4in01f getbuffer(): exact color match, no quantization
+    '''
+    img = oriented(image, width, height)
+    if img is None:
+        return bytearray(width * height // 2)
+    r, g, b = img.convert("RGB").split()
+    key = ImageChops.add(ImageChops.add(r.point(_EXACT_R), g.point(_EXACT_G)), b.point(_EXACT_B))
+    return pack_nibbles(key.point(_EXACT_INDEX).tobytes('raw'))